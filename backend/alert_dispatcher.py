@@ -0,0 +1,222 @@
+"""
+Alert Dispatcher for fire notifications.
+Alerts are queued (bounded) and delivered by a small worker pool, so
+detection loops never block on Telegram or SMTP. Repeated alerts for the
+same source are coalesced within a time window, failed deliveries are
+retried with exponential backoff, and Telegram calls share one pooled HTTP
+session behind a token-bucket rate limiter.
+"""
+
+import os
+import time
+from queue import Queue, Full
+from threading import Lock, Thread
+
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+from rate_limit import TokenBucket
+
+load_dotenv()
+
+BOT_TOKEN = os.getenv("BOT_TOKEN")
+CHAT_ID = os.getenv("CHAT_ID")
+
+
+class AlertFailed(Exception):
+    """Delivery failed; `retry` tells the dispatcher whether trying again can help."""
+
+    def __init__(self, message: str, retry: bool = True, retry_after: float = None):
+        super().__init__(message)
+        self.retry = retry
+        self.retry_after = retry_after
+
+
+class AlertDispatcher:
+    """Bounded alert queue with coalescing, retries and a fixed worker pool."""
+
+    def __init__(self, max_queue: int = 100, workers: int = 2, coalesce_window: float = 30.0,
+                 max_retries: int = 3, backoff: float = 2.0):
+        """
+        Args:
+            max_queue: Alerts waiting for delivery before new ones are dropped
+            workers: Delivery threads
+            coalesce_window: Seconds during which repeated alerts from the same
+                source and channel are merged into the pending/last one
+            max_retries: Retries after the first failed attempt
+            backoff: Delay before the first retry (doubles on each retry)
+        """
+        self.coalesce_window = coalesce_window
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.workers = workers
+
+        self.handlers = {}
+        self._queue = Queue(maxsize=max_queue)
+        self._lock = Lock()
+        self._pending = {}    # (channel, source) -> queued alert not yet delivered
+        self._last_sent = {}  # (channel, source) -> time the last alert was accepted (cleared if it failed)
+        self._threads = []
+        self.stats = {"queued": 0, "sent": 0, "coalesced": 0, "dropped": 0, "retries": 0, "failed": 0}
+
+    def register(self, channel: str, handler):
+        """Register a delivery function: handler(payload), raising AlertFailed on errors."""
+        self.handlers[channel] = handler
+
+    def _ensure_workers(self):
+        if self._threads:
+            return
+        for i in range(self.workers):
+            thread = Thread(target=self._worker, name=f"alert-worker-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def dispatch(self, channel: str, source: str, payload: dict) -> bool:
+        """
+        Queue an alert without blocking.
+
+        Args:
+            channel: Registered channel name ("telegram", "email", ...)
+            source: What raised the alert (camera id, zone name, ...); used for coalescing
+            payload: Channel-specific alert content
+
+        Returns:
+            True if queued, False if coalesced into a recent alert or dropped
+        """
+        if channel not in self.handlers:
+            print(f"⚠️ No handler for alert channel '{channel}'")
+            return False
+
+        key = (channel, source)
+        now = time.monotonic()
+        with self._lock:
+            pending = self._pending.get(key)
+            if pending is not None:
+                # Still waiting for delivery: send the newest content once
+                pending["payload"] = payload
+                self.stats["coalesced"] += 1
+                return False
+            if now - self._last_sent.get(key, float("-inf")) < self.coalesce_window:
+                self.stats["coalesced"] += 1
+                return False
+
+            alert = {"key": key, "channel": channel, "payload": payload, "accepted": now}
+            try:
+                self._queue.put_nowait(alert)
+            except Full:
+                self.stats["dropped"] += 1
+                print(f"⚠️ Alert queue full, dropping {channel} alert for {source}")
+                return False
+            self._pending[key] = alert
+            self._last_sent[key] = now
+            self.stats["queued"] += 1
+
+        self._ensure_workers()
+        return True
+
+    def _worker(self):
+        while True:
+            alert = self._queue.get()
+            with self._lock:
+                # Later duplicates now start a new alert instead of merging into this one
+                self._pending.pop(alert["key"], None)
+            self._deliver(alert)
+
+    def _deliver(self, alert: dict):
+        handler = self.handlers[alert["channel"]]
+        source = alert["key"][1]
+        for attempt in range(self.max_retries + 1):
+            try:
+                handler(alert["payload"])
+                with self._lock:
+                    self.stats["sent"] += 1
+                return
+            except AlertFailed as e:
+                error, retry, delay = e, e.retry, e.retry_after
+            except requests.RequestException as e:
+                error, retry, delay = e, True, None
+            except Exception as e:
+                error, retry, delay = e, False, None
+
+            if not retry or attempt == self.max_retries:
+                break
+            delay = delay if delay is not None else self.backoff * (2 ** attempt)
+            with self._lock:
+                self.stats["retries"] += 1
+            print(f"⚠️ {alert['channel']} alert for {source} failed ({error}), retrying in {delay:.1f}s")
+            time.sleep(delay)
+
+        with self._lock:
+            self.stats["failed"] += 1
+            # A failed alert must not suppress the next one for this source
+            if self._last_sent.get(alert["key"]) == alert["accepted"]:
+                del self._last_sent[alert["key"]]
+        print(f"❌ {alert['channel']} alert for {source} failed: {error}")
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                **self.stats,
+                "pending": self._queue.qsize(),
+                "coalesce_window": self.coalesce_window,
+                "telegram_rate_limit": telegram_limiter.get_stats()
+            }
+
+
+# Telegram allows about one message per second per chat (bursts are throttled)
+telegram_limiter = TokenBucket(
+    rate=float(os.getenv("TELEGRAM_RATE_PER_SEC", "1")),
+    capacity=float(os.getenv("TELEGRAM_BURST", "3"))
+)
+
+_telegram_session = requests.Session()
+_telegram_session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+
+
+def send_telegram(payload: dict):
+    """
+    Deliver a Telegram alert through the pooled session.
+
+    Payload: {"text": ...} for a message, or {"caption": ..., "photo": bytes}
+    for a photo; optional "parse_mode".
+    """
+    if not BOT_TOKEN or not CHAT_ID:
+        raise AlertFailed("Telegram credentials not set", retry=False)
+
+    telegram_limiter.acquire()
+    base_url = f"https://api.telegram.org/bot{BOT_TOKEN}"
+    data = {"chat_id": CHAT_ID}
+    if payload.get("parse_mode"):
+        data["parse_mode"] = payload["parse_mode"]
+
+    if payload.get("photo"):
+        data["caption"] = payload.get("caption", "")
+        files = {"photo": ("alert_image.png", payload["photo"], "image/png")}
+        response = _telegram_session.post(f"{base_url}/sendPhoto", data=data, files=files, timeout=15)
+    else:
+        data["text"] = payload["text"]
+        response = _telegram_session.post(f"{base_url}/sendMessage", json=data, timeout=10)
+
+    if response.status_code == 200:
+        print("✅ Telegram alert sent")
+        return
+    if response.status_code == 429:
+        try:
+            retry_after = response.json().get("parameters", {}).get("retry_after")
+        except ValueError:
+            retry_after = None
+        raise AlertFailed("Telegram rate limit", retry_after=retry_after)
+    # Other 4xx errors (bad token, chat not found, malformed request) will not go away
+    raise AlertFailed(f"Telegram HTTP {response.status_code}: {response.text[:200]}",
+                      retry=response.status_code >= 500)
+
+
+# Singleton instance
+alert_dispatcher = AlertDispatcher(
+    max_queue=int(os.getenv("ALERT_QUEUE_SIZE", "100")),
+    workers=int(os.getenv("ALERT_WORKERS", "2")),
+    coalesce_window=float(os.getenv("ALERT_COALESCE_SECONDS", "30")),
+    max_retries=int(os.getenv("ALERT_MAX_RETRIES", "3"))
+)
+alert_dispatcher.register("telegram", send_telegram)
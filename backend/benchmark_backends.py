@@ -0,0 +1,73 @@
+"""
+Milliseconds-per-frame benchmark for the YOLO inference backends.
+Exports best.pt on first use (see YOLO_BACKEND) and runs the same
+preprocessed frames through each runtime with the service's thresholds.
+
+Usage:
+    python benchmark_backends.py [--backends pytorch,onnx,openvino] [--frames 50] [--batch 1]
+                                 [--video path/to/video.mp4]
+"""
+
+import time
+import argparse
+
+import cv2
+import numpy as np
+
+from yolo_service import yolo_service
+
+
+def load_frames(video_path, count):
+    """Frames from a video, or synthetic 1280x720 frames when no video is given."""
+    if not video_path:
+        rng = np.random.default_rng(0)
+        return [rng.integers(0, 256, (yolo_service.WEBCAM_HEIGHT, yolo_service.WEBCAM_WIDTH, 3), dtype=np.uint8)
+                for _ in range(count)]
+
+    frames = []
+    cap = cv2.VideoCapture(video_path)
+    while len(frames) < count:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+
+def benchmark(backends, frames, batch_size):
+    inputs = [yolo_service.preprocess_frame(frame)[0] for frame in frames]
+    batches = [inputs[i:i + batch_size] for i in range(0, len(inputs), batch_size)]
+    params = dict(conf=yolo_service.CONF_THRESHOLD, iou=yolo_service.IOU_THRESHOLD,
+                  imgsz=yolo_service.IMG_SIZE, verbose=False)
+
+    print(f"🎬 {len(inputs)} frames, batch={batch_size}, input {inputs[0].shape[1]}x{inputs[0].shape[0]}")
+    baseline = None
+    for backend in backends:
+        model = yolo_service._load_backend(backend)
+        if model is None:
+            print(f"   {backend:<10} unavailable")
+            continue
+
+        model(batches[0], **params)  # warm-up
+        boxes = 0
+        start = time.perf_counter()
+        for batch in batches:
+            boxes += sum(len(result.boxes) for result in model(batch, **params))
+        elapsed = time.perf_counter() - start
+
+        ms = elapsed / len(inputs) * 1000
+        baseline = baseline or ms
+        print(f"   {backend:<10} {ms:8.2f} ms/frame  {1000 / ms:7.1f} fps  "
+              f"({baseline / ms:.2f}x)  {boxes} boxes")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", default="pytorch,onnx,openvino")
+    parser.add_argument("--frames", type=int, default=50)
+    parser.add_argument("--batch", type=int, default=1)
+    parser.add_argument("--video")
+    args = parser.parse_args()
+    benchmark([b.strip() for b in args.backends.split(",") if b.strip()],
+              load_frames(args.video, args.frames), args.batch)
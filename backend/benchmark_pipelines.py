@@ -0,0 +1,83 @@
+"""
+Repeatable timing of the FIRMS ingest and satellite scan pipelines.
+Record the live API responses once, then replay them offline with a fixed
+latency/bandwidth so runs on different machines are comparable.
+
+Usage:
+    python benchmark_pipelines.py --mode record
+    python benchmark_pipelines.py --mode replay [--latency 120 | --latency recorded]
+                                  [--bandwidth 20] [--runs 3] [--cold] [--classify]
+
+--cold empties the imagery cache before every run so each Sentinel Hub
+request is replayed; --classify runs the full monitoring scan (CAM model)
+instead of fetch only. Alert delivery (Telegram, email) is disabled while
+benchmarking.
+"""
+
+import os
+import time
+import argparse
+import tempfile
+
+
+def timed(label, fn, runs, setup=None):
+    times = []
+    for _ in range(runs):
+        if setup:
+            setup()  # not timed
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    print(f"   {label:<16} best {min(times):7.3f}s  mean {sum(times) / len(times):7.3f}s  ({len(result)} items)")
+
+
+def disable_alerts():
+    """Keep benchmark scans from sending real alerts (SMTP is not covered by http_replay)."""
+    from alert_dispatcher import alert_dispatcher
+    from email_service import email_service
+    email_service.initialized = False
+    for channel in list(alert_dispatcher.handlers):
+        alert_dispatcher.register(channel, lambda payload: None)
+    print("🔕 Alert delivery disabled for the benchmark")
+
+
+def main(args):
+    if args.cold:
+        # Scratch cache (emptied before every run) so the real cache is never
+        # cleared; must be set before sentinel_service imports the singleton
+        os.environ["SENTINEL_CACHE_DIR"] = tempfile.mkdtemp(prefix="sentinel_cache_")
+
+    from http_replay import http_replay
+    http_replay.mode = args.mode
+    if args.latency is not None:
+        http_replay.latency_ms = args.latency if args.latency == "recorded" else float(args.latency)
+    if args.bandwidth is not None:
+        http_replay.bandwidth_mbps = args.bandwidth
+    http_replay.install()
+
+    from firms_service import firms_service
+    from sentinel_service import sentinel_service
+    from imagery_cache import imagery_cache
+    reset_cache = imagery_cache.clear if args.cold else None
+
+    print(f"🎬 mode={args.mode} latency={http_replay.latency_ms}ms bandwidth={http_replay.bandwidth_mbps or '∞'}Mbps")
+    timed("FIRMS ingest", lambda: firms_service.get_realtime_data("morocco"), args.runs)
+    if args.classify:
+        from monitoring_service import monitoring_service
+        disable_alerts()
+        timed("satellite scan", monitoring_service.run_full_scan, args.runs, reset_cache)
+    else:
+        timed("satellite fetch", lambda: sentinel_service.scan_all_zones(use_fire_script=False), args.runs,
+              reset_cache)
+    print(f"📊 {http_replay.get_stats()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=("off", "record", "replay"), default="replay")
+    parser.add_argument("--latency", help="ms added per replayed response, or 'recorded'")
+    parser.add_argument("--bandwidth", type=float, help="simulated download speed in Mbit/s")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--cold", action="store_true")
+    parser.add_argument("--classify", action="store_true")
+    main(parser.parse_args())
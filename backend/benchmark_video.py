@@ -0,0 +1,51 @@
+"""
+Frames-per-second benchmark for offline video processing.
+Compares the sequential path against batched and chunk-parallel processing.
+
+Usage:
+    python benchmark_video.py path/to/video.mp4 [--workers 4] [--batch 8]
+"""
+
+import os
+import time
+import argparse
+import tempfile
+
+from video_processor import process_batched, process_parallel, count_frames
+from yolo_service import yolo_service
+
+
+def benchmark(video_path, workers, batch_size):
+    if not yolo_service.model:
+        print("❌ YOLO model not loaded")
+        return
+
+    total = count_frames(video_path)
+    print(f"🎬 {video_path}: {total} frames")
+
+    runs = {
+        "sequential": lambda out: yolo_service._process_video_sequential(video_path, out),
+        f"batched (batch={batch_size})": lambda out: process_batched(yolo_service, video_path, out, batch_size=batch_size),
+        f"parallel (workers={workers})": lambda out: process_parallel(video_path, out, workers=workers, batch_size=batch_size)
+    }
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        baseline = None
+        for name, run in runs.items():
+            output_path = os.path.join(tmp_dir, "out.mp4")
+            start = time.perf_counter()
+            stats = run(output_path)
+            elapsed = time.perf_counter() - start
+            fps = stats["frames"] / elapsed if elapsed else 0
+            baseline = baseline or fps
+            print(f"   {name:<24} {stats['frames']:>6} frames  {elapsed:7.2f}s  "
+                  f"{fps:7.1f} fps  ({fps / baseline:.2f}x)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("video")
+    parser.add_argument("--workers", type=int, default=max(2, (os.cpu_count() or 2) // 2))
+    parser.add_argument("--batch", type=int, default=8)
+    args = parser.parse_args()
+    benchmark(args.video, args.workers, args.batch)
@@ -0,0 +1,141 @@
+"""
+Result Cache Service for image inference endpoints.
+Content-addressed LRU cache so re-uploaded frames skip the model entirely.
+Only model outputs are cached; side effects such as fire alerts must be
+triggered by the caller on hits as well (see /detect/image).
+"""
+
+import os
+import hashlib
+import json
+from collections import OrderedDict
+from threading import Lock
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def model_fingerprint(model_path: str) -> str:
+    """
+    Build a version string for a model file.
+
+    Uses path, size and modification time so a retrained model
+    invalidates every cached result produced by the old weights.
+    """
+    try:
+        stat = os.stat(model_path)
+        return f"{model_path}:{stat.st_size}:{int(stat.st_mtime)}"
+    except OSError:
+        return f"{model_path}:missing"
+
+
+class ResultCache:
+    """Thread-safe LRU cache bounded by entry count and total payload bytes."""
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 64 * 1024 * 1024):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of cached results
+            max_bytes: Maximum total size of cached payloads in bytes
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (value, size)
+        self._total_bytes = 0
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(namespace: str, content: bytes, model_version: str, **params) -> str:
+        """
+        Build a cache key from the image content, model version and parameters.
+
+        Args:
+            namespace: Endpoint name (e.g. "predict", "detect_image")
+            content: Raw uploaded bytes
+            model_version: Model fingerprint (see model_fingerprint)
+            **params: Thresholds and other inference settings
+
+        Returns:
+            "<namespace>:<model_version>:<params as sorted JSON>:<SHA-256 of content>";
+            only the content is hashed, the other fields are kept readable
+        """
+        digest = hashlib.sha256(content).hexdigest()
+        settings = json.dumps(params, sort_keys=True, default=str)
+        return f"{namespace}:{model_version}:{settings}:{digest}"
+
+    @staticmethod
+    def _estimate_size(value) -> int:
+        """Approximate payload size of a cached value."""
+        if isinstance(value, (bytes, bytearray)):
+            return len(value)
+        if isinstance(value, str):
+            return len(value)
+        if isinstance(value, (list, tuple)):
+            return sum(ResultCache._estimate_size(v) for v in value)
+        if isinstance(value, dict):
+            return sum(ResultCache._estimate_size(v) for v in value.values())
+        return 64
+
+    def get(self, key: str):
+        """Return the cached value for key, or None on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: str, value):
+        """Store value under key, evicting least recently used entries as needed."""
+        size = self._estimate_size(value)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._total_bytes -= self._entries.pop(key)[1]
+
+            self._entries[key] = (value, size)
+            self._total_bytes += size
+
+            while self._entries and (
+                len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes
+            ):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._total_bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        """Drop all cached entries (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def get_stats(self) -> dict:
+        """Get cache hit/miss metrics."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+# Singleton instance shared by the image inference endpoints
+result_cache = ResultCache(
+    max_entries=int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "256")),
+    max_bytes=int(os.getenv("RESULT_CACHE_MAX_MB", "64")) * 1024 * 1024
+)
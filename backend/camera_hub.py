@@ -0,0 +1,82 @@
+"""
+Camera Hub for live video detection.
+Runs one capture-and-inference pipeline per camera source and fans the
+encoded frames out to every connected /video_feed client.
+"""
+
+from threading import Lock
+from yolo_service import yolo_service
+
+
+class CameraHub:
+    """Shares one detection pipeline per source between all subscribers."""
+
+    def __init__(self, pipeline_factory):
+        """
+        Args:
+            pipeline_factory: Callable(source) returning an unstarted StreamPipeline
+        """
+        self.pipeline_factory = pipeline_factory
+        self._pipelines = {}    # source -> StreamPipeline
+        self._subscribers = {}  # source -> number of connected viewers
+        self._lock = Lock()
+
+    def _acquire(self, source):
+        """Register a viewer, starting the pipeline if it is the first one."""
+        with self._lock:
+            pipeline = self._pipelines.get(source)
+            if pipeline is None or not pipeline.running:
+                pipeline = self.pipeline_factory(source)
+                if not pipeline.start():
+                    return None
+                self._pipelines[source] = pipeline
+                self._subscribers[source] = 0
+                print(f"📡 Camera {source} pipeline started")
+
+            self._subscribers[source] += 1
+            return pipeline
+
+    def _release(self, source, pipeline):
+        """Unregister a viewer, stopping the pipeline when the last one leaves."""
+        with self._lock:
+            if self._pipelines.get(source) is not pipeline:
+                return
+            self._subscribers[source] -= 1
+            if self._subscribers[source] <= 0:
+                pipeline.stop()
+                del self._pipelines[source]
+                del self._subscribers[source]
+                print(f"📴 Camera {source} pipeline stopped (no viewers)")
+
+    def subscribe(self, source=0):
+        """
+        Yield MJPEG chunks from the shared pipeline for a source.
+
+        Args:
+            source: Camera index or stream URL accepted by cv2.VideoCapture
+        """
+        pipeline = self._acquire(source)
+        if pipeline is None:
+            return
+
+        try:
+            yield from pipeline.stream()
+        finally:
+            self._release(source, pipeline)
+
+    def get_stats(self) -> dict:
+        """Get viewer counts and per-stage timings for each active source."""
+        with self._lock:
+            return {
+                "sources": {
+                    str(source): {
+                        "subscribers": self._subscribers[source],
+                        **pipeline.get_stats()
+                    }
+                    for source, pipeline in self._pipelines.items()
+                }
+            }
+
+
+# Singleton instance
+camera_hub = CameraHub(yolo_service.create_stream_pipeline)
@@ -0,0 +1,175 @@
+"""
+Change-detection gate for satellite scans.
+Keeps a small signature of each zone's last classified image and skips CAM
+inference when new imagery is practically unchanged, reusing the last
+result instead.
+
+Signatures are the per-block mean and per-block maximum of every RGB
+channel over a 32x32 block grid. The maximum keeps fire evidence: a handful
+of bright fire pixels raise their block's maximum even though they barely
+move its mean (or a global perceptual hash). Raw-band scans (fire_index)
+are never gated; measuring them costs about as much as the gate itself.
+
+Baselines are kept on disk (SHARED_STATE_DIR/change_gate) so every worker
+process gates against the same last results.
+
+Disabled by default (CHANGE_GATE=1 to enable).
+"""
+
+import io
+import os
+import json
+import time
+import hashlib
+from threading import Lock
+
+import numpy as np
+from dotenv import load_dotenv
+
+from shared_state import SHARED_STATE_DIR, write_bytes
+
+load_dotenv()
+
+SIGNATURE_SIZE = 32
+
+
+def block_reduce(array, size: int = SIGNATURE_SIZE):
+    """
+    Per-block mean and max of an (H, W, C) array over a size x size block grid.
+
+    Returns:
+        (size, size, 2C) float32 array: block means followed by block maxima
+    """
+    array = np.asarray(array, dtype=np.float32)
+    if array.ndim == 2:
+        array = array[..., None]
+    height, width = array.shape[:2]
+    rows = np.linspace(0, height, min(size, height) + 1).astype(int)[:-1]
+    cols = np.linspace(0, width, min(size, width) + 1).astype(int)[:-1]
+    sums = np.add.reduceat(np.add.reduceat(array, rows, axis=0), cols, axis=1)
+    counts = (np.diff(np.append(rows, height))[:, None] * np.diff(np.append(cols, width))[None, :])[..., None]
+    maxima = np.maximum.reduceat(np.maximum.reduceat(array, rows, axis=0), cols, axis=1)
+    return np.concatenate([sums / counts, maxima], axis=-1)
+
+
+class ChangeGate:
+    """Per-zone baseline store deciding whether a zone needs re-classification."""
+
+    def __init__(self, enabled: bool = False, threshold: float = 0.08, max_age_hours: float = 24,
+                 store_dir: str = None):
+        """
+        Args:
+            enabled: When False every zone is classified
+            threshold: Largest block change (|mean or max diff| / 255) treated as unchanged
+            max_age_hours: Re-classify a zone at least this often even if unchanged
+            store_dir: Directory shared by all processes for the baselines (None = in memory)
+        """
+        self.enabled = enabled
+        self.threshold = threshold
+        self.max_age_seconds = max_age_hours * 3600
+        self.store_dir = store_dir
+        self._lock = Lock()
+        self._baselines = {}  # key -> {"signature", "result", "updated"} (without store_dir)
+        self.stats = {"checked": 0, "skipped": 0}
+        if enabled and store_dir:
+            os.makedirs(store_dir, exist_ok=True)
+
+    @staticmethod
+    def key(name: str, bbox) -> str:
+        """Baseline key; includes the footprint so grid tiles of different sizes never collide."""
+        return f"{name}|{','.join(f'{float(v):.6f}' for v in bbox)}"
+
+    @staticmethod
+    def signature(image_array):
+        """Cheap summary of a zone image (uint8 RGB array)."""
+        return block_reduce(image_array) / 255
+
+    @staticmethod
+    def score(previous, current) -> float:
+        """Largest change of any block mean or block maximum."""
+        return float(np.abs(current - previous).max())
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.store_dir, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".npz")
+
+    def _load(self, key: str):
+        if self.store_dir is None:
+            return self._baselines.get(key)
+        try:
+            with np.load(self._path(key)) as data:
+                return {
+                    "signature": data["signature"],
+                    "result": json.loads(str(data["result"])),
+                    "updated": float(data["updated"])
+                }
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def _save(self, key: str, baseline: dict):
+        if self.store_dir is None:
+            self._baselines[key] = baseline
+            return
+        buffer = io.BytesIO()
+        np.savez(buffer, signature=baseline["signature"], result=np.array(json.dumps(baseline["result"])),
+                 updated=np.array(baseline["updated"]))
+        write_bytes(self._path(key), buffer.getvalue())
+
+    def check(self, key: str, signature):
+        """
+        Compare a new image against the zone's baseline.
+
+        Returns:
+            (previous_result, score): previous_result is the result to reuse,
+            or None when the zone must be classified; score is None without baseline
+        """
+        if not self.enabled:
+            return None, None
+        with self._lock:
+            self.stats["checked"] += 1
+            baseline = self._load(key)
+            if baseline is None or baseline["signature"].shape != signature.shape:
+                return None, None
+            change = self.score(baseline["signature"], signature)
+            if change >= self.threshold or time.time() - baseline["updated"] > self.max_age_seconds:
+                return None, round(change, 4)
+            self.stats["skipped"] += 1
+            return baseline["result"], round(change, 4)
+
+    def update(self, key: str, signature, result: dict):
+        """Store the signature and result of a freshly classified zone."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._save(key, {"signature": signature, "result": result, "updated": time.time()})
+
+    def _stored(self) -> list:
+        if self.store_dir is None or not os.path.isdir(self.store_dir):
+            return []
+        return [name for name in os.listdir(self.store_dir) if name.endswith(".npz")]
+
+    def clear(self):
+        with self._lock:
+            self._baselines.clear()
+            for name in self._stored():
+                try:
+                    os.remove(os.path.join(self.store_dir, name))
+                except FileNotFoundError:
+                    pass
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                **self.stats,
+                "enabled": self.enabled,
+                "baselines": len(self._stored()) if self.store_dir else len(self._baselines),
+                "threshold": self.threshold
+            }
+
+
+# Singleton instance
+change_gate = ChangeGate(
+    enabled=os.getenv("CHANGE_GATE", "0") == "1",
+    threshold=float(os.getenv("CHANGE_GATE_THRESHOLD", "0.08")),
+    max_age_hours=float(os.getenv("CHANGE_GATE_MAX_AGE_HOURS", "24")),
+    store_dir=os.path.join(SHARED_STATE_DIR, "change_gate")
+)
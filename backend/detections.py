@@ -0,0 +1,123 @@
+"""
+Compact YOLO detection results.
+Each frame's boxes are pulled out of the model output in one transfer
+(`boxes.data`) and kept as parallel NumPy arrays; size filtering and class
+mapping run as whole-array operations. Drawing, alerting and the JSON
+responses all read from the same Detections object.
+"""
+
+import numpy as np
+
+# The model metadata has the two labels swapped: class 1 is fire, class 0 smoke
+CLASS_NAME_OVERRIDES = {0: 'Smoke', 1: 'Fire'}
+
+
+class ClassTable:
+    """Class id -> display name and fire flag, built once per model."""
+
+    def __init__(self, model_names: dict, overrides: dict = CLASS_NAME_OVERRIDES):
+        """
+        Args:
+            model_names: The model's {class_id: name} mapping
+            overrides: Names replacing the model's ones
+        """
+        count = max(list(model_names) + list(overrides)) + 1
+        self.names = tuple(overrides.get(i, model_names.get(i, str(i))) for i in range(count))
+        self.is_fire = np.array(['Fire' in name or 'fire' in name for name in self.names], dtype=bool)
+
+
+class Detections:
+    """Boxes of one frame as NumPy arrays: xyxy (N, 4) int32, conf (N,) float32, cls (N,) int32."""
+
+    __slots__ = ("xyxy", "conf", "cls", "classes")
+
+    def __init__(self, xyxy, conf, cls, classes: ClassTable):
+        self.xyxy = xyxy
+        self.conf = conf
+        self.cls = cls
+        self.classes = classes
+
+    @classmethod
+    def empty(cls, classes: ClassTable):
+        return cls(np.empty((0, 4), np.int32), np.empty(0, np.float32), np.empty(0, np.int32), classes)
+
+    def __len__(self):
+        return len(self.conf)
+
+    @property
+    def fire_mask(self):
+        return self.classes.is_fire[self.cls]
+
+    @property
+    def fire_detected(self) -> bool:
+        return bool(self.fire_mask.any())
+
+    @property
+    def smoke_detected(self) -> bool:
+        return bool((~self.fire_mask).any())
+
+    def with_boxes(self, xyxy):
+        """Same detections at new positions (used by the tracker)."""
+        return Detections(xyxy, self.conf, self.cls, self.classes)
+
+    def rows(self) -> list:
+        """Boxes as (x1, y1, x2, y2, class_name, conf, is_fire) tuples for drawing."""
+        names = self.classes.names
+        return [
+            (x1, y1, x2, y2, names[c], conf, fire)
+            for (x1, y1, x2, y2), conf, c, fire in zip(
+                self.xyxy.tolist(), self.conf.tolist(), self.cls.tolist(), self.fire_mask.tolist()
+            )
+        ]
+
+    def to_list(self, precision: int = None) -> list:
+        """Boxes as JSON-ready dicts: {"class", "confidence", "box"}."""
+        return [
+            {"class": name, "confidence": round(conf, precision) if precision else conf, "box": [x1, y1, x2, y2]}
+            for x1, y1, x2, y2, name, conf, _ in self.rows()
+        ]
+
+
+def from_result(result, classes: ClassTable, min_area: float = 0,
+                scale: float = 1.0, offset=(0, 0), shape=None) -> Detections:
+    """
+    Convert one ultralytics Result into Detections.
+
+    Args:
+        result: ultralytics Result for a single image
+        classes: ClassTable of the model
+        min_area: Drop boxes smaller than this (pixels², original image)
+        scale: Resize factor applied to the image before inference
+        offset: (x, y) padding added after resizing
+        shape: (height, width) of the original image, to clip mapped boxes
+    """
+    data = result.boxes.data
+    data = data.cpu().numpy() if hasattr(data, "cpu") else np.asarray(data)
+    if not len(data):
+        return Detections.empty(classes)
+
+    # Columns: x1, y1, x2, y2, [track id,] conf, cls
+    xyxy = data[:, :4]
+    if scale != 1.0 or any(offset):
+        xyxy = (xyxy - np.array(offset * 2, dtype=np.float32)) / scale
+    if shape is not None:
+        xyxy = np.clip(xyxy, 0, [shape[1], shape[0], shape[1], shape[0]])
+    xyxy = xyxy.astype(np.int32)
+    conf = data[:, -2].astype(np.float32)
+    cls = data[:, -1].astype(np.int32)
+
+    if min_area:
+        area = (xyxy[:, 2] - xyxy[:, 0]) * (xyxy[:, 3] - xyxy[:, 1])
+        keep = area >= min_area
+        xyxy, conf, cls = xyxy[keep], conf[keep], cls[keep]
+
+    return Detections(xyxy, conf, cls, classes)
+
+
+def summarize(detections: Detections) -> dict:
+    """Detection dict passed between detect, track, gate and render stages."""
+    return {
+        "boxes": detections,
+        "fire_detected": detections.fire_detected,
+        "smoke_detected": detections.smoke_detected
+    }
@@ -1,11 +1,14 @@
 """
 Email Notification Service for wildfire alerts.
 Uses SMTP (Gmail) to send email notifications when fires are detected.
+One SMTP connection is kept open between sends and re-established when the
+server drops it.
 """
 
 import os
+import time
 import smtplib
-import base64
+from threading import Lock
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.image import MIMEImage
@@ -25,6 +28,14 @@ class EmailService:
         self.smtp_server = os.getenv("SMTP_SERVER", "smtp.gmail.com")
         self.smtp_port = int(os.getenv("SMTP_PORT", "587"))
         self.alert_recipients = os.getenv("ALERT_RECIPIENTS", "").split(",")
+        self.use_tls = os.getenv("SMTP_STARTTLS", "1") != "0"
+        # Idle connections are checked with NOOP before reuse
+        self.noop_after = float(os.getenv("SMTP_NOOP_AFTER", "30"))
+
+        self._connection = None
+        self._last_used = 0.0
+        self._lock = Lock()
+        self.stats = {"sent": 0, "connections": 0, "reconnects": 0}
         
         self.initialized = bool(self.smtp_email and self.smtp_password)
         
@@ -36,6 +47,54 @@ class EmailService:
     def is_available(self) -> bool:
         """Check if email service is configured."""
         return self.initialized
+
+    def _connect(self):
+        server = smtplib.SMTP(self.smtp_server, self.smtp_port, timeout=30)
+        if self.use_tls:
+            server.starttls()
+        if server.has_extn("auth"):
+            server.login(self.smtp_email, self.smtp_password)
+        self.stats["connections"] += 1
+        return server
+
+    def _get_connection(self):
+        """Reuse the open connection, checking it with NOOP when it has been idle."""
+        if self._connection is not None and time.monotonic() - self._last_used > self.noop_after:
+            try:
+                if self._connection.noop()[0] != 250:
+                    raise smtplib.SMTPServerDisconnected("NOOP failed")
+            except (smtplib.SMTPException, OSError):
+                self._close()
+        if self._connection is None:
+            self._connection = self._connect()
+        return self._connection
+
+    def _send(self, msg):
+        """Send a message on the pooled connection, reconnecting once if it was dropped."""
+        with self._lock:
+            try:
+                self._get_connection().send_message(msg)
+            except (smtplib.SMTPServerDisconnected, OSError):
+                self._close()
+                self.stats["reconnects"] += 1
+                self._get_connection().send_message(msg)
+            self._last_used = time.monotonic()
+            self.stats["sent"] += 1
+
+    def close(self):
+        """Close the pooled SMTP connection (a new one is opened on the next send)."""
+        with self._lock:
+            self._close()
+
+    def _close(self):
+        """Close the connection; the caller must hold _lock."""
+        if self._connection is None:
+            return
+        try:
+            self._connection.quit()
+        except (smtplib.SMTPException, OSError):
+            self._connection.close()
+        self._connection = None
     
     def create_alert_html(
         self,
@@ -44,7 +103,7 @@ class EmailService:
         confidence: float,
         prediction: str,
         detection_time: str,
-        image_base64: str = None
+        image_bytes: bytes = None
     ) -> str:
         """
         Create HTML content for wildfire alert email.
@@ -55,7 +114,7 @@ class EmailService:
             confidence: Model confidence (0-1)
             prediction: Prediction class (Fire, Smoke, No Fire)
             detection_time: ISO timestamp of detection
-            image_base64: Optional base64 encoded image
+            image_bytes: Optional PNG image (shown inline when present)
             
         Returns:
             HTML string for email body
@@ -124,7 +183,7 @@ class EmailService:
                     
                     <p><strong>Detection Time:</strong> {detection_time}</p>
                     
-                    {"<div class='image-container'><p><strong>Satellite Image:</strong></p><img src='cid:satellite_image' alt='Satellite view'/></div>" if image_base64 else ""}
+                    {"<div class='image-container'><p><strong>Satellite Image:</strong></p><img src='cid:satellite_image' alt='Satellite view'/></div>" if image_bytes else ""}
                     
                     <div style="text-align: center; margin-top: 20px;">
                         <a href="{google_maps_link}" class="button">📍 View on Google Maps</a>
@@ -147,7 +206,7 @@ class EmailService:
         coordinates: tuple,
         confidence: float,
         prediction: str,
-        image_base64: str = None,
+        image_bytes: bytes = None,
         recipients: list = None
     ) -> dict:
         """
@@ -158,7 +217,7 @@ class EmailService:
             coordinates: (lat, lon) of detection
             confidence: Model confidence (0-1)
             prediction: Prediction class
-            image_base64: Optional base64 encoded satellite image
+            image_bytes: Optional PNG satellite image
             recipients: Optional list of email recipients
             
         Returns:
@@ -189,28 +248,23 @@ class EmailService:
                 confidence=confidence,
                 prediction=prediction,
                 detection_time=detection_time,
-                image_base64=image_base64
+                image_bytes=image_bytes
             )
             
             html_part = MIMEText(html_content, 'html')
             msg.attach(html_part)
             
             # Attach image if provided
-            if image_base64:
+            if image_bytes:
                 try:
-                    image_data = base64.b64decode(image_base64)
-                    img = MIMEImage(image_data)
+                    img = MIMEImage(image_bytes)
                     img.add_header('Content-ID', '<satellite_image>')
                     img.add_header('Content-Disposition', 'inline', filename='satellite.png')
                     msg.attach(img)
                 except Exception as img_error:
                     print(f"Could not attach image: {img_error}")
             
-            # Send email
-            with smtplib.SMTP(self.smtp_server, self.smtp_port) as server:
-                server.starttls()
-                server.login(self.smtp_email, self.smtp_password)
-                server.send_message(msg)
+            self._send(msg)
             
             return {
                 "success": True,
@@ -223,6 +277,123 @@ class EmailService:
         except Exception as e:
             return {"success": False, "error": str(e)}
     
+    def create_digest_html(self, detections: list, detection_time: str) -> str:
+        """
+        Create HTML content for a multi-zone scan digest.
+
+        Args:
+            detections: List of dicts with zone_name, coordinates, confidence,
+                prediction and optional image_bytes (PNG)
+            detection_time: Time of the scan
+
+        Returns:
+            HTML string for email body (images referenced as cid:zone_<i>)
+        """
+        sections = []
+        for i, d in enumerate(detections):
+            lat, lon = d["coordinates"]
+            image = (f"<div class='image-container'><img src='cid:zone_{i}' alt='{d['zone_name']}'/></div>"
+                     if d.get("image_bytes") else "")
+            sections.append(f"""
+                    <div class="zone">
+                        <h2>🔥 {d['zone_name']}</h2>
+                        <p><strong>{d['prediction']}</strong> &middot; {round(d['confidence'] * 100, 1)}% confidence
+                           &middot; {lat:.4f}, {lon:.4f}
+                           &middot; <a href="https://www.google.com/maps?q={lat},{lon}">📍 Map</a></p>
+                        {image}
+                    </div>""")
+
+        return f"""
+        <!DOCTYPE html>
+        <html>
+        <head>
+            <meta charset="UTF-8">
+            <style>
+                body {{ font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif; background: #1a1a2e; color: #ffffff; margin: 0; padding: 20px; }}
+                .container {{ max-width: 600px; margin: 0 auto; background: #16213e; border-radius: 16px; overflow: hidden; box-shadow: 0 10px 40px rgba(0,0,0,0.5); }}
+                .header {{ background: linear-gradient(135deg, #dc2626, #1a1a2e); padding: 30px; text-align: center; }}
+                .header h1 {{ margin: 0; font-size: 28px; }}
+                .content {{ padding: 30px; }}
+                .zone {{ background: #0f3460; padding: 15px; border-radius: 10px; border-left: 4px solid #dc2626; margin-bottom: 20px; }}
+                .zone h2 {{ margin: 0 0 10px 0; font-size: 20px; color: #dc2626; }}
+                .zone a {{ color: #ffffff; }}
+                .image-container img {{ max-width: 100%; border-radius: 10px; border: 2px solid #16213e; }}
+                .footer {{ background: #0f3460; padding: 20px; text-align: center; font-size: 12px; color: #888; }}
+            </style>
+        </head>
+        <body>
+            <div class="container">
+                <div class="header">
+                    <h1>🔥 WILDFIRE SCAN DIGEST 🔥</h1>
+                    <p style="margin: 10px 0 0 0; opacity: 0.9;">{len(detections)} ZONE(S) WITH FIRE - {detection_time}</p>
+                </div>
+                <div class="content">{"".join(sections)}
+                </div>
+                <div class="footer">
+                    <p>WildfireGuard AI - Satellite Monitoring System</p>
+                    <p>This is an automated alert. Please verify before taking action.</p>
+                </div>
+            </div>
+        </body>
+        </html>
+        """
+
+    def send_digest(self, detections: list, recipients: list = None) -> dict:
+        """
+        Send one email covering every fire detected in a scan.
+
+        Args:
+            detections: List of dicts with zone_name, coordinates, confidence,
+                prediction and optional image_bytes (PNG)
+            recipients: Optional list of email recipients
+
+        Returns:
+            dict with success status and message
+        """
+        if not self.is_available():
+            return {"success": False, "error": "Email service not configured"}
+
+        to_emails = [e.strip() for e in (recipients or self.alert_recipients) if e.strip()]
+        if not to_emails:
+            return {"success": False, "error": "No recipients configured"}
+        if not detections:
+            return {"success": False, "error": "No detections to report"}
+
+        try:
+            detection_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S UTC")
+            zones = ", ".join(d["zone_name"] for d in detections)
+
+            msg = MIMEMultipart('related')
+            msg['Subject'] = f"🔥 WILDFIRE ALERT: fire detected in {len(detections)} zone(s) - {zones}"
+            msg['From'] = self.smtp_email
+            msg['To'] = ", ".join(to_emails)
+            msg.attach(MIMEText(self.create_digest_html(detections, detection_time), 'html'))
+
+            for i, d in enumerate(detections):
+                if not d.get("image_bytes"):
+                    continue
+                img = MIMEImage(d["image_bytes"])
+                img.add_header('Content-ID', f'<zone_{i}>')
+                img.add_header('Content-Disposition', 'inline', filename=f'zone_{i}.png')
+                msg.attach(img)
+
+            self._send(msg)
+
+            return {
+                "success": True,
+                "message": f"Digest for {len(detections)} zone(s) sent to {len(to_emails)} recipient(s)",
+                "recipients": to_emails
+            }
+
+        except smtplib.SMTPAuthenticationError:
+            return {"success": False, "error": "SMTP authentication failed. Check credentials."}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    def get_stats(self) -> dict:
+        """Get sent-message and connection counters."""
+        return {**self.stats, "connected": self._connection is not None}
+    
     def send_test_email(self, recipient: str = None) -> dict:
         """
         Send a test email to verify configuration.
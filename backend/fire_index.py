@@ -0,0 +1,131 @@
+"""
+Numeric fire indices from raw Sentinel-2 reflectances.
+Works on float32 band stacks (B04, B08, B8A, B11, B12, dataMask) requested
+with EVALSCRIPT_RAW_BANDS, so fire is measured per pixel instead of being
+inferred from a rendered PNG:
+
+- NBR  = (B08 - B12) / (B08 + B12)   vegetation vs. burn/heat
+- NBR2 = (B11 - B12) / (B11 + B12)   drops sharply over active fire
+- SWIR fire test (unambiguous active fire, Murphy et al. 2016):
+  B12/B11 >= FIRE_SWIR_RATIO and B12/B8A >= FIRE_NIR_RATIO and B12 >= FIRE_MIN_SWIR
+
+Everything is computed with whole-array NumPy operations.
+"""
+
+import os
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+BANDS = ("B04", "B08", "B8A", "B11", "B12", "dataMask")
+B04, B08, B8A, B11, B12, DATA_MASK = range(len(BANDS))
+
+FIRE_SWIR_RATIO = float(os.getenv("FIRE_SWIR_RATIO", "1.4"))
+FIRE_NIR_RATIO = float(os.getenv("FIRE_NIR_RATIO", "1.4"))
+FIRE_MIN_SWIR = float(os.getenv("FIRE_MIN_SWIR", "0.15"))
+# Fire pixels needed before a zone counts as burning
+FIRE_MIN_PIXELS = int(os.getenv("FIRE_MIN_PIXELS", "3"))
+# Hotspots returned per zone (strongest B12 first)
+HOTSPOT_LIMIT = int(os.getenv("HOTSPOT_LIMIT", "500"))
+
+
+def normalized_difference(a, b):
+    """(a - b) / (a + b), 0 where both are 0."""
+    total = a + b
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(total != 0, (a - b) / total, 0.0).astype(np.float32)
+
+
+def compute_indices(bands) -> dict:
+    """
+    Per-pixel indices for an (H, W, 6) float32 band stack.
+
+    Returns:
+        dict of (H, W) arrays: nbr, nbr2, fire (bool), valid (bool)
+    """
+    bands = np.asarray(bands, dtype=np.float32)
+    b8a, b11, b12 = bands[..., B8A], bands[..., B11], bands[..., B12]
+    valid = bands[..., DATA_MASK] > 0
+    fire = (
+        valid
+        & (b12 >= FIRE_MIN_SWIR)
+        & (b12 >= FIRE_SWIR_RATIO * b11)
+        & (b12 >= FIRE_NIR_RATIO * b8a)
+    )
+    return {
+        "nbr": normalized_difference(bands[..., B08], b12),
+        "nbr2": normalized_difference(b11, b12),
+        "fire": fire,
+        "valid": valid
+    }
+
+
+def pixel_centers(rows, cols, shape, bbox):
+    """(lat, lon) of pixel centers; row 0 is the northern edge of the bbox."""
+    height, width = shape
+    min_lon, min_lat, max_lon, max_lat = bbox
+    lat = max_lat - (rows + 0.5) * (max_lat - min_lat) / height
+    lon = min_lon + (cols + 0.5) * (max_lon - min_lon) / width
+    return lat, lon
+
+
+def extract_hotspots(bands, indices: dict, bbox, limit: int = HOTSPOT_LIMIT) -> list:
+    """Fire pixels with coordinates, strongest SWIR response first."""
+    rows, cols = np.nonzero(indices["fire"])
+    if not len(rows):
+        return []
+    b12 = np.asarray(bands[..., B12])[rows, cols]
+    order = np.argsort(-b12, kind="stable")[:limit]
+    rows, cols, b12 = rows[order], cols[order], b12[order]
+    lat, lon = pixel_centers(rows, cols, indices["fire"].shape, bbox)
+    nbr = indices["nbr"][rows, cols]
+    nbr2 = indices["nbr2"][rows, cols]
+    return [
+        {"lat": round(float(la), 5), "lon": round(float(lo), 5), "row": int(r), "col": int(c),
+         "b12": round(float(s), 4), "nbr": round(float(n), 4), "nbr2": round(float(n2), 4)}
+        for la, lo, r, c, s, n, n2 in zip(lat, lon, rows, cols, b12, nbr, nbr2)
+    ]
+
+
+def zone_statistics(bands, indices: dict) -> dict:
+    """Summary statistics over the valid pixels of a zone."""
+    valid = indices["valid"]
+    count = int(valid.sum())
+    if not count:
+        return {"valid_pixels": 0, "fire_pixels": 0}
+    nbr = indices["nbr"][valid]
+    nbr2 = indices["nbr2"][valid]
+    fire_pixels = int(indices["fire"].sum())
+    return {
+        "valid_pixels": count,
+        "fire_pixels": fire_pixels,
+        "fire_fraction": round(fire_pixels / count, 6),
+        "nbr_mean": round(float(nbr.mean()), 4),
+        "nbr_p05": round(float(np.percentile(nbr, 5)), 4),
+        "nbr2_mean": round(float(nbr2.mean()), 4),
+        "nbr2_min": round(float(nbr2.min()), 4),
+        "b12_max": round(float(np.asarray(bands[..., B12])[valid].max()), 4)
+    }
+
+
+def analyze(bands, bbox, limit: int = HOTSPOT_LIMIT) -> dict:
+    """
+    Indices, hotspots and statistics for one zone.
+
+    Returns:
+        dict with is_fire, stats and hotspots (at most `limit`)
+    """
+    indices = compute_indices(bands)
+    stats = zone_statistics(bands, indices)
+    return {
+        "is_fire": stats["fire_pixels"] >= FIRE_MIN_PIXELS,
+        "stats": stats,
+        "hotspots": extract_hotspots(bands, indices, bbox, limit)
+    }
+
+
+def false_color(bands) -> np.ndarray:
+    """SWIR false-color composite (B12, B8A, B04) as uint8 RGB; fire shows bright red."""
+    rgb = np.asarray(bands, dtype=np.float32)[..., [B12, B8A, B04]]
+    return np.clip(rgb * 2.5 * 255, 0, 255).astype(np.uint8)
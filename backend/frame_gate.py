@@ -0,0 +1,235 @@
+"""
+Pre-inference frame gating for live video detection.
+Cheap checks (motion against a running background, Laplacian blur score,
+exposure) decide whether a frame needs full YOLO inference; skipped frames
+keep the previous detections.
+
+Enable with FRAME_GATE, a comma-separated list of checks to run in order:
+    FRAME_GATE=exposure,blur,motion
+"""
+
+import os
+import time
+from abc import ABC, abstractmethod
+import numpy as np
+import cv2
+from dotenv import load_dotenv
+
+load_dotenv()
+
+GATE_WIDTH = 160  # checks run on a small grayscale copy of the frame
+
+
+class GateCheck(ABC):
+    """Base class for a gating check. Subclasses return (needs_inference, score)."""
+
+    name = "check"
+
+    @abstractmethod
+    def evaluate(self, gray):
+        """Score a small grayscale frame; returns (needs_inference, score)."""
+
+    def observe(self, gray):
+        """Called instead of evaluate when an earlier check already skipped the frame."""
+
+    def reset(self):
+        pass
+
+
+class ExposureCheck(GateCheck):
+    """
+    Skip frames that are too dark or too bright to contain usable detail.
+
+    Dark frames with a bright spot are kept: a fire at night is a small
+    saturated region in an otherwise black frame.
+    """
+
+    name = "exposure"
+
+    def __init__(self, min_brightness: float = 20.0, max_brightness: float = 235.0,
+                 hot_level: int = 200, min_hot_pixels: int = 2):
+        """
+        Args:
+            min_brightness: Mean gray level below which a frame is too dark
+            max_brightness: Mean gray level above which a frame is overexposed
+            hot_level: Gray level of a bright (possibly burning) pixel
+            min_hot_pixels: Bright pixels that keep a dark frame
+        """
+        self.min_brightness = min_brightness
+        self.max_brightness = max_brightness
+        self.hot_level = hot_level
+        self.min_hot_pixels = min_hot_pixels
+
+    def evaluate(self, gray):
+        brightness = float(gray.mean())
+        if brightness < self.min_brightness:
+            return bool(np.count_nonzero(gray >= self.hot_level) >= self.min_hot_pixels), round(brightness, 2)
+        return brightness <= self.max_brightness, round(brightness, 2)
+
+
+class BlurCheck(GateCheck):
+    """Skip motion-blurred or out-of-focus frames (low variance of the Laplacian)."""
+
+    name = "blur"
+
+    def __init__(self, min_sharpness: float = 30.0):
+        self.min_sharpness = min_sharpness
+
+    def evaluate(self, gray):
+        sharpness = float(cv2.Laplacian(gray, cv2.CV_32F).var())
+        return sharpness >= self.min_sharpness, round(sharpness, 2)
+
+
+class MotionCheck(GateCheck):
+    """Skip frames that do not differ from a running background model."""
+
+    name = "motion"
+
+    def __init__(self, min_changed: float = 0.002, pixel_threshold: int = 25, learning_rate: float = 0.05):
+        """
+        Args:
+            min_changed: Fraction of changed pixels needed to run inference
+            pixel_threshold: Gray-level difference for a pixel to count as changed
+            learning_rate: Weight of each new frame in the running background
+        """
+        self.min_changed = min_changed
+        self.pixel_threshold = pixel_threshold
+        self.learning_rate = learning_rate
+        self.background = None
+
+    def evaluate(self, gray):
+        blurred = cv2.GaussianBlur(gray, (5, 5), 0)
+        if self.background is None:
+            self.background = blurred.astype(np.float32)
+            return True, 1.0
+
+        diff = cv2.absdiff(blurred, cv2.convertScaleAbs(self.background))
+        changed = float(np.count_nonzero(diff > self.pixel_threshold)) / diff.size
+        cv2.accumulateWeighted(blurred, self.background, self.learning_rate)
+        return changed >= self.min_changed, round(changed, 5)
+
+    def observe(self, gray):
+        # Keep learning the background on frames skipped by earlier checks,
+        # otherwise the next evaluated frame is compared against a stale scene
+        blurred = cv2.GaussianBlur(gray, (5, 5), 0)
+        if self.background is None:
+            self.background = blurred.astype(np.float32)
+        else:
+            cv2.accumulateWeighted(blurred, self.background, self.learning_rate)
+
+    def reset(self):
+        self.background = None
+
+
+class FrameGate:
+    """Runs gating checks in order; the first failing check skips the frame."""
+
+    def __init__(self, checks, max_skipped: int = 50):
+        """
+        Args:
+            checks: List of GateCheck instances
+            max_skipped: Force inference after this many consecutive skipped frames
+        """
+        self.checks = checks
+        self.max_skipped = max_skipped
+        self.consecutive_skipped = 0
+
+    def should_infer(self, frame):
+        """
+        Decide whether a frame needs full inference.
+
+        Returns:
+            (needs_inference, reason) where reason names the check that skipped it
+        """
+        height, width = frame.shape[:2]
+        small = cv2.resize(frame, (GATE_WIDTH, max(1, int(height * GATE_WIDTH / width))),
+                           interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+
+        for index, check in enumerate(self.checks):
+            passed, _ = check.evaluate(gray)
+            if not passed:
+                # Later checks still see the frame (e.g. motion background updates)
+                for later in self.checks[index + 1:]:
+                    later.observe(gray)
+                if self.consecutive_skipped >= self.max_skipped:
+                    break
+                self.consecutive_skipped += 1
+                return False, check.name
+
+        self.consecutive_skipped = 0
+        return True, None
+
+
+class GatedDetector:
+    """Wraps a per-frame detect function with a FrameGate."""
+
+    def __init__(self, detect, gate: FrameGate):
+        self.detect = detect
+        self.gate = gate
+        self.last_detection = None
+        self.frames = 0
+        self.inferred = 0
+        self.skipped = {check.name: 0 for check in gate.checks}
+        self.gate_time = 0.0
+
+    def __call__(self, frame):
+        self.frames += 1
+        start = time.perf_counter()
+        needs_inference, reason = self.gate.should_infer(frame)
+        self.gate_time += time.perf_counter() - start
+
+        if not needs_inference and self.last_detection is not None:
+            self.skipped[reason] += 1
+            return {**self.last_detection, "gated": True}
+
+        self.inferred += 1
+        self.last_detection = self.detect(frame)
+        return self.last_detection
+
+    def get_stats(self) -> dict:
+        """Get skipped-frame counts per check (plus the wrapped detector's stats)."""
+        stats = {
+            "frames": self.frames,
+            "inferred": self.inferred,
+            "skipped": sum(self.skipped.values()),
+            "skipped_by": dict(self.skipped),
+            "avg_gate_ms": round(self.gate_time / self.frames * 1000, 3) if self.frames else 0.0
+        }
+        if hasattr(self.detect, "get_stats"):
+            stats["detector"] = self.detect.get_stats()
+        return stats
+
+
+def create_frame_gate(checks: str = None):
+    """
+    Build a FrameGate from a comma-separated list of check names.
+
+    Thresholds come from GATE_MIN_BRIGHTNESS, GATE_MAX_BRIGHTNESS,
+    GATE_MIN_SHARPNESS, GATE_MIN_CHANGED and GATE_MAX_SKIPPED.
+
+    Returns:
+        FrameGate, or None when gating is disabled
+    """
+    checks = checks if checks is not None else os.getenv("FRAME_GATE", "")
+    factories = {
+        "exposure": lambda: ExposureCheck(
+            float(os.getenv("GATE_MIN_BRIGHTNESS", "20")),
+            float(os.getenv("GATE_MAX_BRIGHTNESS", "235"))
+        ),
+        "blur": lambda: BlurCheck(float(os.getenv("GATE_MIN_SHARPNESS", "30"))),
+        "motion": lambda: MotionCheck(float(os.getenv("GATE_MIN_CHANGED", "0.002")))
+    }
+
+    selected = []
+    for name in (c.strip().lower() for c in checks.split(",")):
+        if not name:
+            continue
+        if name not in factories:
+            print(f"⚠️ Unknown frame gate check '{name}' (available: {list(factories)})")
+            continue
+        selected.append(factories[name]())
+
+    if not selected:
+        return None
+    return FrameGate(selected, max_skipped=int(os.getenv("GATE_MAX_SKIPPED", "50")))
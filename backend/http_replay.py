@@ -0,0 +1,238 @@
+"""
+Record/replay transport for outbound HTTP (FIRMS, Open-Meteo, Sentinel Hub,
+Telegram).
+In record mode every response is written to a fixture directory; in replay
+mode the same requests are answered from those fixtures without touching the
+network, with optional injected latency and bandwidth limits, so scans and
+FIRMS ingestion can be benchmarked repeatably on an isolated machine.
+
+The transport patches requests' HTTPAdapter.send, so it covers every session
+(including the one used internally by sentinelhub) without changes to the
+services. Enable with HTTP_REPLAY_MODE=record|replay.
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+from threading import Lock
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Credentials that must not end up in fixture files or keys
+_BOT_TOKEN = re.compile(r"/bot[^/]+/")
+_SECRET_PARAMS = {"api_key", "key", "token", "access_token", "client_secret", "map_key"}
+# The stored body is already decoded, so transfer headers no longer apply
+_DROPPED_HEADERS = {"content-encoding", "transfer-encoding", "content-length", "connection"}
+
+
+def _redact_url(url: str) -> str:
+    parts = urlsplit(url)
+    path = _BOT_TOKEN.sub("/bot<token>/", parts.path)
+    query = sorted((k, "<redacted>" if k.lower() in _SECRET_PARAMS else v)
+                   for k, v in parse_qsl(parts.query, keep_blank_values=True))
+    return urlunsplit((parts.scheme, parts.netloc, path, urlencode(query), ""))
+
+
+def _body_bytes(request) -> bytes:
+    body = request.body or b""
+    return body.encode("utf-8") if isinstance(body, str) else body
+
+
+class HttpReplay:
+    """Fixture-backed HTTP transport (record or replay) with latency injection."""
+
+    MODES = ("off", "record", "replay")
+
+    def __init__(self, mode: str = "off", fixture_dir: str = "http_fixtures",
+                 latency_ms=0.0, bandwidth_mbps: float = 0.0):
+        """
+        Args:
+            mode: "off", "record" (call the network, save responses) or
+                "replay" (answer from fixtures, never call the network)
+            fixture_dir: Directory holding one <key>.json + <key>.body pair per response
+            latency_ms: Delay added to each replayed response, or "recorded"
+                to reproduce the latency measured while recording
+            bandwidth_mbps: Simulated download speed for replayed bodies (0 = unlimited)
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"HTTP_REPLAY_MODE must be one of {self.MODES}, got '{mode}'")
+        self.mode = mode
+        self.fixture_dir = fixture_dir
+        self.latency_ms = latency_ms
+        self.bandwidth_mbps = bandwidth_mbps
+
+        self._lock = Lock()
+        self._exact = {}  # key -> fixture metadata
+        self._loose = {}  # (method, host, path) -> [fixture metadata] in recording order
+        self._cursor = {}  # (method, host, path) -> next loose fixture to replay
+        self._original_send = None
+        self.stats = {"recorded": 0, "replayed": 0, "loose_matches": 0, "misses": 0, "injected_delay_s": 0.0}
+
+    @staticmethod
+    def make_key(method: str, url: str, body: bytes) -> str:
+        """Fingerprint of a request: method, redacted URL and body hash."""
+        payload = f"{method.upper()} {_redact_url(url)} {hashlib.sha256(body).hexdigest()}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _loose_key(method: str, url: str) -> tuple:
+        parts = urlsplit(url)
+        return method.upper(), parts.netloc, _BOT_TOKEN.sub("/bot<token>/", parts.path)
+
+    def _load_fixtures(self):
+        self._exact.clear()
+        self._loose.clear()
+        self._cursor.clear()
+        if not os.path.isdir(self.fixture_dir):
+            return
+        fixtures = []
+        for name in os.listdir(self.fixture_dir):
+            if not name.endswith(".json"):
+                continue
+            with open(os.path.join(self.fixture_dir, name), encoding="utf-8") as f:
+                fixtures.append(json.load(f))
+        for meta in sorted(fixtures, key=lambda m: m["recorded_at"]):
+            self._exact[meta["key"]] = meta
+            self._loose.setdefault(self._loose_key(meta["method"], meta["url"]), []).append(meta)
+
+    def install(self):
+        """Patch the requests transport (no-op when mode is "off" or already installed)."""
+        if self.mode == "off" or self._original_send is not None:
+            return
+        os.makedirs(self.fixture_dir, exist_ok=True)
+        with self._lock:
+            self._load_fixtures()
+        self._original_send = HTTPAdapter.send
+        replay = self
+
+        def send(adapter, request, **kwargs):
+            if replay.mode == "replay":
+                return replay._replay(adapter, request)
+            return replay._record(adapter, request, **kwargs)
+
+        HTTPAdapter.send = send
+        print(f"✅ HTTP {self.mode} enabled ({len(self._exact)} fixtures in {self.fixture_dir})")
+
+    def uninstall(self):
+        """Restore the real transport."""
+        if self._original_send is not None:
+            HTTPAdapter.send = self._original_send
+            self._original_send = None
+
+    def _record(self, adapter, request, **kwargs):
+        start = time.perf_counter()
+        response = self._original_send(adapter, request, **kwargs)
+        content = response.content  # reads streamed bodies once; later reads use the cached bytes
+        elapsed = time.perf_counter() - start
+
+        key = self.make_key(request.method, request.url, _body_bytes(request))
+        meta = {
+            "key": key,
+            "method": request.method.upper(),
+            "url": _redact_url(request.url),
+            "status": response.status_code,
+            "reason": response.reason,
+            "headers": {k: v for k, v in response.headers.items() if k.lower() not in _DROPPED_HEADERS},
+            "elapsed_s": round(elapsed, 4),
+            "recorded_at": time.time()
+        }
+        base = os.path.join(self.fixture_dir, key)
+        for path, data, mode in ((base + ".body", content, "wb"),
+                                 (base + ".json", json.dumps(meta, indent=2), "w")):
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with open(tmp_path, mode) as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+
+        with self._lock:
+            loose = self._loose.setdefault(self._loose_key(meta["method"], meta["url"]), [])
+            if key not in self._exact:
+                loose.append(meta)
+            self._exact[key] = meta
+            self.stats["recorded"] += 1
+        return response
+
+    def _find(self, request):
+        """
+        Exact match first; otherwise the fixtures recorded for the same method
+        and path are replayed in turn (covers requests whose body or query
+        changes between runs, e.g. dated Sentinel Hub requests or multipart
+        Telegram uploads).
+        """
+        key = self.make_key(request.method, request.url, _body_bytes(request))
+        with self._lock:
+            meta = self._exact.get(key)
+            if meta is not None:
+                return meta
+            loose_key = self._loose_key(request.method, request.url)
+            candidates = self._loose.get(loose_key)
+            if not candidates:
+                self.stats["misses"] += 1
+                return None
+            index = self._cursor.get(loose_key, 0)
+            self._cursor[loose_key] = index + 1
+            self.stats["loose_matches"] += 1
+            return candidates[index % len(candidates)]
+
+    def _replay(self, adapter, request):
+        meta = self._find(request)
+        if meta is None:
+            raise requests.ConnectionError(
+                f"No HTTP fixture for {request.method} {_redact_url(request.url)} (replay mode)",
+                request=request
+            )
+        with open(os.path.join(self.fixture_dir, meta["key"] + ".body"), "rb") as f:
+            content = f.read()
+
+        delay = meta.get("elapsed_s", 0.0) if self.latency_ms == "recorded" else float(self.latency_ms) / 1000
+        if self.bandwidth_mbps > 0:
+            delay += len(content) * 8 / (self.bandwidth_mbps * 1_000_000)
+        if delay > 0:
+            time.sleep(delay)
+
+        response = requests.Response()
+        response.status_code = meta["status"]
+        response.reason = meta["reason"]
+        response.headers = CaseInsensitiveDict(meta["headers"])
+        response.headers["Content-Length"] = str(len(content))
+        response.encoding = get_encoding_from_headers(response.headers)
+        response._content = content
+        response.url = request.url
+        response.request = request
+        response.connection = adapter
+
+        with self._lock:
+            self.stats["replayed"] += 1
+            self.stats["injected_delay_s"] += delay
+        return response
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                **self.stats,
+                "injected_delay_s": round(self.stats["injected_delay_s"], 3),
+                "mode": self.mode,
+                "fixtures": len(self._exact)
+            }
+
+
+def _latency_setting(value: str):
+    return value if value == "recorded" else float(value)
+
+
+# Singleton instance
+http_replay = HttpReplay(
+    mode=os.getenv("HTTP_REPLAY_MODE", "off").lower(),
+    fixture_dir=os.getenv("HTTP_FIXTURE_DIR", "http_fixtures"),
+    latency_ms=_latency_setting(os.getenv("HTTP_REPLAY_LATENCY_MS", "0")),
+    bandwidth_mbps=float(os.getenv("HTTP_REPLAY_BANDWIDTH_MBPS", "0"))
+)
@@ -0,0 +1,178 @@
+"""
+On-disk cache for Sentinel Hub imagery.
+Responses are keyed by the request fingerprint (bbox, evalscript, time
+interval, resolution, size) and stored as .npy files. Hits are read into
+memory rather than memory-mapped: a mapped file cannot be replaced or deleted
+on Windows and would keep evicted entries on disk while a scan image still
+references the array.
+Entries expire after a TTL; the least recently used ones are evicted when
+the cache grows beyond its size limit.
+"""
+
+import os
+import time
+import json
+import hashlib
+from threading import Lock
+
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class ImageryCache:
+    """Persistent imagery cache with TTL and LRU size limits (thread-safe)."""
+
+    def __init__(self, cache_dir: str, ttl_hours: float = 12, max_bytes: int = 512 * 1024 * 1024):
+        """
+        Args:
+            cache_dir: Directory holding one <key>.npy file per response
+            ttl_hours: Age after which an entry is fetched again
+            max_bytes: Maximum total size of cached arrays
+        """
+        self.cache_dir = cache_dir
+        self.ttl_seconds = ttl_hours * 3600
+        self.max_bytes = max_bytes
+        self._lock = Lock()
+        self._entries = {}  # key -> {"path", "size", "created", "accessed"}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._load_index()
+
+    def _load_index(self):
+        """Rebuild the index from disk: mtime = creation, atime = last access."""
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name.endswith(".tmp.npy"):
+                try:
+                    os.remove(path)  # interrupted write
+                except OSError:
+                    pass
+                continue
+            if not name.endswith(".npy"):
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                # Removed by another process meanwhile, or unreadable
+                continue
+            self._entries[name[:-4]] = {
+                "path": path,
+                "size": stat.st_size,
+                "created": stat.st_mtime,
+                "accessed": max(stat.st_atime, stat.st_mtime)
+            }
+
+    @staticmethod
+    def make_key(bbox, evalscript: str, time_interval, resolution, size) -> str:
+        """Fingerprint of a Sentinel Hub request."""
+        payload = json.dumps({
+            "bbox": [round(float(v), 6) for v in bbox],
+            "evalscript": hashlib.sha256(evalscript.encode("utf-8")).hexdigest(),
+            "time_interval": list(time_interval),
+            "resolution": resolution,
+            "size": list(size)
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            try:
+                os.remove(entry["path"])
+            except OSError:
+                pass
+
+    def get(self, key: str):
+        """
+        Look up a cached array.
+
+        Returns:
+            In-memory array, or None on miss/expiry
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry["created"] > self.ttl_seconds:
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            entry["accessed"] = now
+            self.hits += 1
+            path, created = entry["path"], entry["created"]
+
+        try:
+            array = np.load(path)
+            # Record the access in atime so LRU order survives restarts
+            os.utime(path, (now, created))
+            return array
+        except (OSError, ValueError):
+            with self._lock:
+                self._remove(key)
+            return None
+
+    def put(self, key: str, array):
+        """Store an array (atomically) and evict old entries beyond the size limit."""
+        path = os.path.join(self.cache_dir, f"{key}.npy")
+        tmp_path = os.path.join(self.cache_dir, f"{key}.{os.getpid()}.tmp.npy")
+        try:
+            np.save(tmp_path, np.ascontiguousarray(array))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            # Disk full, or the target is open elsewhere (Windows): skip caching
+            print(f"⚠️ Could not cache imagery {key[:12]}: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+
+        now = time.time()
+        with self._lock:
+            self._entries[key] = {"path": path, "size": os.path.getsize(path), "created": now, "accessed": now}
+            self._evict()
+
+    def _evict(self):
+        total = sum(e["size"] for e in self._entries.values())
+        if total <= self.max_bytes:
+            return
+        for key, entry in sorted(self._entries.items(), key=lambda item: item[1]["accessed"]):
+            if total <= self.max_bytes:
+                break
+            total -= entry["size"]
+            self._remove(key)
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._entries):
+                self._remove(key)
+
+    def get_stats(self) -> dict:
+        """Get hit/miss counters and disk usage."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": sum(e["size"] for e in self._entries.values()),
+                "max_bytes": self.max_bytes,
+                "ttl_hours": self.ttl_seconds / 3600,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
+
+
+# Singleton instance
+imagery_cache = ImageryCache(
+    cache_dir=os.getenv("SENTINEL_CACHE_DIR", "sentinel_cache"),
+    ttl_hours=float(os.getenv("SENTINEL_CACHE_TTL_HOURS", "12")),
+    max_bytes=int(float(os.getenv("SENTINEL_CACHE_MAX_MB", "512")) * 1024 * 1024)
+)
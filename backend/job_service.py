@@ -0,0 +1,336 @@
+"""
+Video Job Service for asynchronous video analysis.
+Uploaded videos are processed by a bounded worker pool; clients poll or
+stream progress and download the result once the job is done.
+
+Each job directory holds the job state as job.json, so any worker process
+can report the status of (and serve the result of) a job run by another.
+"""
+
+import os
+import re
+import time
+import uuid
+import shutil
+import json
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from threading import Condition, Lock, Thread
+from dotenv import load_dotenv
+
+from yolo_service import yolo_service
+from video_processor import count_frames
+from shared_state import process_alive, read_json, write_json
+
+load_dotenv()
+
+_JOB_ID_PATTERN = re.compile(r"^[0-9a-f]{32}$")
+
+
+class JobService:
+    """Runs video detection jobs in the background and keeps their outputs for a while."""
+
+    STATUS_QUEUED = "queued"
+    STATUS_RUNNING = "running"
+    STATUS_DONE = "done"
+    STATUS_FAILED = "failed"
+
+    STATE_FILE = "job.json"
+    # Progress is written to the state file at most this often (status changes always)
+    SAVE_INTERVAL = 0.5
+    # How often events() re-reads the state file of a job run by another worker
+    POLL_INTERVAL = 1.0
+
+    def __init__(self, jobs_dir: str, max_workers: int = 2, max_queued: int = 20, retention_hours: float = 24):
+        """
+        Args:
+            jobs_dir: Directory holding one sub-directory per job
+            max_workers: Videos processed concurrently
+            max_queued: Maximum unfinished jobs before new uploads are rejected
+            retention_hours: How long finished jobs and their outputs are kept
+        """
+        self.jobs_dir = jobs_dir
+        self.max_queued = max_queued
+        self.retention_seconds = retention_hours * 3600
+        self.jobs = {}
+        self._saved_at = {}  # job id -> time its state file was last written
+        self._reserved = 0  # uploads accepted but not yet registered in self.jobs
+        self._lock = Lock()
+        self._changed = Condition(self._lock)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="video-job")
+        self._cleanup_thread = None
+
+        os.makedirs(self.jobs_dir, exist_ok=True)
+        self._remove_orphans()
+
+    def _remove_orphans(self):
+        """
+        Delete job directories left by processes that are no longer running.
+
+        Directories are named <pid>-<job_id>. Those of live sibling workers
+        are kept, and so are finished jobs of stopped processes until they
+        expire, since their state file and result can still be served.
+        Unfinished jobs of a stopped process can never complete.
+        """
+        removed = 0
+        for name in os.listdir(self.jobs_dir):
+            path = os.path.join(self.jobs_dir, name)
+            owner = name.split("-", 1)[0]
+            if not os.path.isdir(path) or (owner.isdigit() and process_alive(int(owner))):
+                continue
+            job = self._read_state(path)
+            if job and job["finished_ts"] and time.time() - job["finished_ts"] <= self.retention_seconds:
+                continue
+            shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+        if removed:
+            print(f"🧹 Removed {removed} video job director{'y' if removed == 1 else 'ies'} from previous runs")
+
+    def _read_state(self, job_dir: str):
+        """Job record from a job directory's state file, or None."""
+        try:
+            return read_json(os.path.join(job_dir, self.STATE_FILE))
+        except (OSError, ValueError):
+            return None
+
+    def _save(self, job: dict, force: bool = True):
+        """Write the job record to its state file (throttled unless forced)."""
+        now = time.monotonic()
+        if not force and now - self._saved_at.get(job["id"], 0) < self.SAVE_INTERVAL:
+            return
+        self._saved_at[job["id"]] = now
+        try:
+            write_json(os.path.join(job["dir"], self.STATE_FILE), job)
+        except OSError as e:
+            print(f"⚠️ Could not save video job {job['id']}: {e}")
+
+    def _load(self, job_id: str):
+        """Job record of another worker's job from disk, or None if unknown/expired."""
+        if not _JOB_ID_PATTERN.match(job_id):
+            return None
+        try:
+            names = os.listdir(self.jobs_dir)
+        except OSError:
+            return None
+        name = next((n for n in names if n.endswith(f"-{job_id}")), None)
+        if name is None:
+            return None
+        job = self._read_state(os.path.join(self.jobs_dir, name))
+        owner = name.split("-", 1)[0]
+        if job and job["status"] in (self.STATUS_QUEUED, self.STATUS_RUNNING) and not (
+                owner.isdigit() and process_alive(int(owner))):
+            job.update(status=self.STATUS_FAILED, error="The worker running this job has stopped")
+        return job
+
+    def _public(self, job: dict) -> dict:
+        """Job fields returned by the API (no filesystem paths)."""
+        progress = job["frames_total"] and round(job["frames_done"] / job["frames_total"], 4)
+        return {
+            "job_id": job["id"],
+            "filename": job["filename"],
+            "status": job["status"],
+            "frames_done": job["frames_done"],
+            "frames_total": job["frames_total"],
+            "fire_frames": job["fire_frames"],
+            "progress": min(progress, 1.0) if progress else 0.0,
+            "created_at": job["created_at"],
+            "finished_at": job["finished_at"],
+            "error": job["error"],
+            "result_url": f"/api/jobs/{job['id']}/result" if job["status"] == self.STATUS_DONE else None
+        }
+
+    def submit_video(self, file_obj, filename: str) -> dict:
+        """
+        Store an uploaded video and queue it for processing.
+
+        Args:
+            file_obj: Readable binary file object (e.g. UploadFile.file)
+            filename: Original filename (only used for display)
+
+        Returns:
+            dict with the job status, or an error when the queue is full
+        """
+        # Check and reserve a slot atomically; the upload is copied outside the lock
+        with self._lock:
+            unfinished = self._reserved + sum(
+                1 for j in self.jobs.values() if j["status"] in (self.STATUS_QUEUED, self.STATUS_RUNNING)
+            )
+            if unfinished >= self.max_queued:
+                return {"error": f"Too many pending jobs ({unfinished}). Try again later."}
+            self._reserved += 1
+
+        try:
+            job = self._create_job(file_obj, filename)
+        except Exception:
+            with self._lock:
+                self._reserved -= 1
+            raise
+        with self._lock:
+            self._reserved -= 1
+            self.jobs[job["id"]] = job
+            self._save(job)
+        self._executor.submit(self._run, job["id"])
+        self._ensure_cleanup()
+        return self._public(job)
+
+    def _create_job(self, file_obj, filename: str) -> dict:
+        """Copy the upload into a new job directory and build the job record."""
+        job_id = uuid.uuid4().hex
+        job_dir = os.path.join(self.jobs_dir, f"{os.getpid()}-{job_id}")
+        os.makedirs(job_dir)
+        extension = os.path.splitext(filename or "")[1] or ".mp4"
+        input_path = os.path.join(job_dir, f"input{extension}")
+        try:
+            with open(input_path, "wb") as buffer:
+                shutil.copyfileobj(file_obj, buffer)
+        except Exception:
+            shutil.rmtree(job_dir, ignore_errors=True)
+            raise
+
+        return {
+            "id": job_id,
+            "filename": os.path.basename(filename or "video"),
+            "dir": job_dir,
+            "input_path": input_path,
+            "output_path": os.path.join(job_dir, "processed.mp4"),
+            "status": self.STATUS_QUEUED,
+            "frames_done": 0,
+            "frames_total": count_frames(input_path),
+            "fire_frames": 0,
+            "created_at": datetime.now().isoformat(),
+            "finished_at": None,
+            "finished_ts": None,
+            "error": None
+        }
+
+    def _update(self, job: dict, **fields):
+        with self._changed:
+            job.update(fields)
+            self._save(job, force="status" in fields)
+            self._changed.notify_all()
+
+    def _run(self, job_id: str):
+        job = self.jobs[job_id]
+        self._update(job, status=self.STATUS_RUNNING)
+
+        def on_progress(frames_done, fire_frames):
+            self._update(job, frames_done=frames_done, fire_frames=fire_frames)
+
+        try:
+            success, message = yolo_service.process_video(job["input_path"], job["output_path"], progress=on_progress)
+        except Exception as e:
+            success, message = False, str(e)
+        finally:
+            if os.path.exists(job["input_path"]):
+                os.remove(job["input_path"])
+
+        self._update(
+            job,
+            status=self.STATUS_DONE if success else self.STATUS_FAILED,
+            error=None if success else message,
+            finished_at=datetime.now().isoformat(),
+            finished_ts=time.time()
+        )
+
+    def get_job(self, job_id: str) -> dict:
+        """Get a job's public status (of any worker), or None if unknown/expired."""
+        job = self.jobs.get(job_id) or self._load(job_id)
+        return self._public(job) if job else None
+
+    def get_result_path(self, job_id: str):
+        """Path of a finished job's processed video (of any worker), or None."""
+        job = self.jobs.get(job_id) or self._load(job_id)
+        if job and job["status"] == self.STATUS_DONE and os.path.exists(job["output_path"]):
+            return job["output_path"]
+        return None
+
+    def list_jobs(self) -> list:
+        """Public status of the jobs of all workers."""
+        with self._lock:
+            jobs = [self._public(job) for job in self.jobs.values()]
+            own = set(self.jobs)
+        for name in os.listdir(self.jobs_dir):
+            job_id = name.split("-", 1)[-1]
+            if job_id not in own:
+                job = self._load(job_id)
+                if job:
+                    jobs.append(self._public(job))
+        return sorted(jobs, key=lambda job: job["created_at"])
+
+    def _wait_for_change(self, job_id: str, last: dict, timeout: float):
+        """Public status once it differs from `last` (or after `timeout`); None if the job is unknown."""
+        with self._changed:
+            job = self.jobs.get(job_id)
+            if job is not None:
+                if self._public(job) == last:
+                    self._changed.wait(timeout)
+                return self._public(job)
+
+        # Job of another worker: poll its state file
+        deadline = time.monotonic() + timeout
+        while True:
+            current = self.get_job(job_id)
+            if current is None or current != last or time.monotonic() >= deadline:
+                return current
+            time.sleep(self.POLL_INTERVAL)
+
+    def events(self, job_id: str, timeout: float = 15.0):
+        """
+        Yield Server-Sent Events with the job status whenever it changes.
+
+        A comment line is sent every `timeout` seconds without changes to keep
+        the connection alive; the stream ends once the job is finished.
+        """
+        last = None
+        while True:
+            current = self._wait_for_change(job_id, last, timeout)
+            if current is None:
+                return
+            if current == last:
+                yield ": keep-alive\n\n"
+                continue
+            last = current
+            yield f"data: {json.dumps(current)}\n\n"
+            if current["status"] in (self.STATUS_DONE, self.STATUS_FAILED):
+                return
+
+    def cleanup_expired(self) -> int:
+        """Delete finished jobs (and their files) older than the retention period."""
+        now = time.time()
+        with self._lock:
+            expired = [
+                job for job in self.jobs.values()
+                if job["finished_ts"] and now - job["finished_ts"] > self.retention_seconds
+            ]
+            for job in expired:
+                del self.jobs[job["id"]]
+                self._saved_at.pop(job["id"], None)
+
+        for job in expired:
+            shutil.rmtree(job["dir"], ignore_errors=True)
+        if expired:
+            print(f"🧹 Removed {len(expired)} expired video job(s)")
+        return len(expired)
+
+    def _ensure_cleanup(self):
+        if self._cleanup_thread and self._cleanup_thread.is_alive():
+            return
+
+        def _loop():
+            while True:
+                time.sleep(min(3600, max(60, self.retention_seconds / 4)))
+                self.cleanup_expired()
+                # Finished jobs of stopped workers are nobody's to clean up otherwise
+                self._remove_orphans()
+
+        self._cleanup_thread = Thread(target=_loop, name="video-job-cleanup", daemon=True)
+        self._cleanup_thread.start()
+
+
+# Singleton instance
+job_service = JobService(
+    jobs_dir=os.getenv("VIDEO_JOBS_DIR", "video_jobs"),
+    max_workers=int(os.getenv("VIDEO_JOB_WORKERS", "2")),
+    max_queued=int(os.getenv("VIDEO_JOB_MAX_QUEUED", "20")),
+    retention_hours=float(os.getenv("VIDEO_JOB_RETENTION_HOURS", "24"))
+)
@@ -1,12 +1,15 @@
-from fastapi import FastAPI, File, UploadFile
+from fastapi import FastAPI, File, UploadFile, Request
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 import numpy as np
 from PIL import Image
 import io
-import tensorflow as tf
-from tensorflow.keras.models import load_model
-from tensorflow.keras.applications.mobilenet_v2 import preprocess_input
+from cache_service import result_cache, model_fingerprint
+from model_manager import model_manager, WARMUP_ON_STARTUP
+from http_replay import http_replay
+
+# Record or replay outbound API calls (HTTP_REPLAY_MODE); no-op by default
+http_replay.install()
 
 app = FastAPI(title="WildfireGuard AI API", version="1.0.0")
 
@@ -17,36 +20,61 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Detections", "X-Detection-Count", "X-Detections-Truncated"],
 )
 
-# Load Model
+# Model (loaded lazily by the model manager; TensorFlow is only imported then)
 MODEL_PATH = "mobilenetv2_fire_detector.h5"
-try:
-    model = load_model(MODEL_PATH)
-    print(f"✅ Model loaded from {MODEL_PATH}")
-except Exception as e:
-    print(f"⚠️ Error loading model: {e}")
-    model = None
+
+def _load_classifier():
+    from tensorflow.keras.models import load_model
+    return load_model(MODEL_PATH)
+
+def _warmup_classifier(model):
+    model.predict(np.zeros((1, 224, 224, 3), dtype=np.float32), verbose=0)
+
+model_manager.register("classifier", _load_classifier, _warmup_classifier, fork_safe=False)
 
 # Class labels from the notebook
 CLASS_NAMES = {0: 'Smoke', 1: 'Fire', 2: 'Non Fire'}
 
+@app.on_event("startup")
+def start_model_warmup():
+    """Load and warm up models in the background so the API accepts traffic immediately."""
+    if WARMUP_ON_STARTUP:
+        model_manager.start_warmup()
+
 @app.get("/")
 def read_root():
     return {"message": "WildfireGuard AI System Online", "status": "active"}
 
 @app.get("/health")
 def health_check():
-    return {"status": "healthy", "model_loaded": model is not None}
+    return {
+        "status": "healthy",
+        "model_loaded": model_manager.is_ready("classifier"),
+        "models": model_manager.get_status()
+    }
 
 @app.post("/predict")
-async def predict(file: UploadFile = File(...)):
+def predict(file: UploadFile = File(...)):
+    # Plain def: FastAPI runs it in the threadpool, so a model still loading
+    # (model_manager.get blocks) or a slow predict never stalls the event loop
+    model = model_manager.get("classifier")
     if model is None:
         return {"error": "Model not loaded"}
+    from tensorflow.keras.applications.mobilenet_v2 import preprocess_input
     
     try:
         # Read and preprocess image
-        contents = await file.read()
+        contents = file.file.read()
+
+        # Identical uploads return the stored prediction without running the model
+        cache_key = result_cache.make_key("predict", contents, model_fingerprint(MODEL_PATH))
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
         image = Image.open(io.BytesIO(contents)).convert("RGB")
         image = image.resize((224, 224))
         img_array = np.array(image)
@@ -55,77 +83,248 @@ async def predict(file: UploadFile = File(...)):
 
         # Predict
         predictions = model.predict(img_array)
-        score = tf.nn.softmax(predictions[0]) # Depending on model output, this might be redundant if last layer is already softmax
         # With loaded .h5 having softmax, predictions[0] are probs. 
-        # But let's check notebook: "predictions = Dense(3, activation='softmax')(x)"
+        # Notebook: "predictions = Dense(3, activation='softmax')(x)"
         # So raw output IS probabilities.
         
         class_idx = np.argmax(predictions[0])
         confidence = float(np.max(predictions[0]))
         predicted_class = CLASS_NAMES.get(class_idx, "Unknown")
 
-        return {
+        response = {
             "prediction": predicted_class,
             "confidence": confidence,
             "raw_scores": {CLASS_NAMES[i]: float(predictions[0][i]) for i in range(3)}
         }
+        result_cache.put(cache_key, response)
+        return response
     except Exception as e:
         return {"error": str(e)}
 
 
 from fastapi.responses import StreamingResponse
+from fastapi import Depends, HTTPException
+import os
 from yolo_service import yolo_service
+import tiling
+from camera_hub import camera_hub
 
 # ... (existing code: imports, app setup, model loading)
 
-@app.get("/video_feed")
+# Worker processes started by serve.py; live video pipelines (webcam, streams)
+# are per process, so with several workers each would open every camera
+SERVE_WORKERS = int(os.getenv("SERVE_WORKERS", "1"))
+
+def require_single_worker():
+    """Dependency rejecting live video endpoints when running several workers."""
+    if SERVE_WORKERS > 1:
+        raise HTTPException(status_code=503,
+                            detail="Live video needs a single worker process: run with WEB_CONCURRENCY=1")
+
+@app.get("/video_feed", dependencies=[Depends(require_single_worker)])
 def video_feed():
-    return StreamingResponse(yolo_service.generate_frames(), media_type="multipart/x-mixed-replace; boundary=frame")
+    # All viewers share one capture-and-inference loop for the webcam
+    return StreamingResponse(camera_hub.subscribe(0), media_type="multipart/x-mixed-replace; boundary=frame")
+
+@app.get("/video_feed/stats", dependencies=[Depends(require_single_worker)])
+def video_feed_stats():
+    """Get viewer counts and per-stage timings (capture, inference, encode) of active cameras."""
+    return camera_hub.get_stats()
 
 
 import shutil
 import os
-from fastapi.responses import FileResponse
+import json
+import base64
+import tempfile
+from typing import Optional
+from fastapi import HTTPException
+from fastapi.responses import FileResponse, Response, JSONResponse
+from starlette.background import BackgroundTask
+
+# Byte budget of the X-Detections header: proxies commonly reject responses whose
+# headers exceed 4-8 KB. The complete list is returned with render=false.
+DETECTION_HEADER_BYTES = int(os.getenv("DETECTION_HEADER_BYTES", "4096"))
+
+def _detections_header(detections: list) -> tuple:
+    """
+    JSON for the X-Detections header, limited to DETECTION_HEADER_BYTES.
+
+    Returns:
+        (json string, truncated); when truncated only the most confident
+        detections that fit are included
+    """
+    value = json.dumps(detections)
+    if len(value) <= DETECTION_HEADER_BYTES:
+        return value, False
+    kept, size = [], 2  # "[]"
+    for detection in sorted(detections, key=lambda d: d["confidence"], reverse=True):
+        item = json.dumps(detection)
+        if size + len(item) + 2 > DETECTION_HEADER_BYTES:  # ", " separator
+            break
+        kept.append(item)
+        size += len(item) + 2
+    return "[" + ", ".join(kept) + "]", True
 
 @app.post("/detect/image")
-async def detect_image(file: UploadFile = File(...)):
+def detect_image(file: UploadFile = File(...), render: bool = True, format: str = "jpeg",
+                 tiled: Optional[bool] = None):
+    """
+    Detect fire/smoke in an image.
+
+    render=false skips drawing and encoding and returns only the detections.
+    Otherwise the annotated image is returned as binary JPEG with the
+    detections in the X-Detections header, capped at DETECTION_HEADER_BYTES
+    (X-Detections-Truncated: true when cut; format=base64 returns the legacy
+    JSON body with a base64 image instead). tiled=true runs sliced inference
+    on large images (default: TILED_INFERENCE).
+    """
     if not file.content_type.startswith("image/"):
         return {"error": "File must be an image"}
     
-    contents = await file.read()
-    encoded_image, detections = yolo_service.process_image(contents)
-    
-    if encoded_image is None:
-        return {"error": detections.get("error", "Unknown error")}
-        
-    return {
-        "image": encoded_image,
-        "detections": detections,
-        "count": len(detections)
+    # Plain def (threadpool): the lazy YOLO load and inference must not block the event loop
+    contents = file.file.read()
+
+    cache_key = result_cache.make_key(
+        "detect_image",
+        contents,
+        model_fingerprint(yolo_service.model_path),
+        conf=yolo_service.CONF_THRESHOLD,
+        iou=yolo_service.IOU_THRESHOLD,
+        imgsz=yolo_service.IMG_SIZE,
+        backend=yolo_service.backend,
+        render=render,
+        tiled=tiling.TILED_INFERENCE if tiled is None else tiled
+    )
+    cached = result_cache.get(cache_key)
+    if cached is not None:
+        image_bytes, detections = cached
+        # A cache hit skips process_image, so raise its fire alert here
+        if any("fire" in d["class"].lower() for d in detections):
+            yolo_service.alert_uploaded_image()
+    else:
+        image_bytes, detections = yolo_service.process_image(contents, render=render, tiled=tiled)
+
+        if isinstance(detections, dict):
+            return {"error": detections.get("error", "Unknown error")}
+
+        result_cache.put(cache_key, (image_bytes, detections))
+
+    if not render:
+        return {"detections": detections, "count": len(detections)}
+
+    if format == "base64":
+        return {
+            "image": base64.b64encode(image_bytes).decode("utf-8"),
+            "detections": detections,
+            "count": len(detections)
+        }
+
+    header, truncated = _detections_header(detections)
+    headers = {
+        "X-Detections": header,
+        "X-Detection-Count": str(len(detections))
     }
+    if truncated:
+        headers["X-Detections-Truncated"] = "true"
+    return Response(content=image_bytes, media_type="image/jpeg", headers=headers)
+
+@app.get("/api/cache/stats")
+def get_cache_stats():
+    """Get hit/miss metrics for the image inference result cache."""
+    return result_cache.get_stats()
+
+@app.get("/api/alerts/stats")
+def get_alert_stats():
+    """Get alert dispatcher counters (queued, sent, coalesced, dropped, retries, failed)."""
+    from alert_dispatcher import alert_dispatcher
+    return alert_dispatcher.get_stats()
 
 @app.post("/detect/video")
-async def detect_video(file: UploadFile = File(...)):
+def detect_video(file: UploadFile = File(...), render: bool = True):
+    """
+    Detect fire in a video.
+
+    Returns the annotated MP4, or with render=false a JSON timeline of the
+    frames with detections and the time ranges containing fire.
+    """
     if not file.content_type.startswith("video/"):
         return {"error": "File must be a video"}
         
+    # Unique working directory so concurrent uploads with the same name never collide
+    work_dir = tempfile.mkdtemp(prefix="detect_video_")
+    cleanup = BackgroundTask(shutil.rmtree, work_dir, ignore_errors=True)
+
     # Save temp input file
-    temp_input = f"temp_{file.filename}"
+    temp_input = os.path.join(work_dir, "input" + (os.path.splitext(file.filename or "")[1] or ".mp4"))
     with open(temp_input, "wb") as buffer:
         shutil.copyfileobj(file.file, buffer)
         
+    if not render:
+        try:
+            return yolo_service.analyze_video(temp_input)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
     # Output path
-    output_filename = f"processed_{file.filename}"
-    
-    success, message = yolo_service.process_video(temp_input, output_filename)
+    output_filename = f"processed_{os.path.basename(file.filename or 'video.mp4')}"
+    output_path = os.path.join(work_dir, "processed.mp4")
     
-    # Clean up input
-    os.remove(temp_input)
+    success, message = yolo_service.process_video(temp_input, output_path)
     
     if not success:
+        shutil.rmtree(work_dir, ignore_errors=True)
         return {"error": message}
         
-    return FileResponse(output_filename, media_type="video/mp4", filename=output_filename)
+    # Working directory is removed once the response has been sent
+    return FileResponse(output_path, media_type="video/mp4", filename=output_filename, background=cleanup)
+
+
+# ============================================================
+# VIDEO JOB ENDPOINTS
+# ============================================================
+
+from job_service import job_service
+
+@app.post("/api/jobs/video", status_code=202)
+def create_video_job(file: UploadFile = File(...)):
+    """Queue a video for fire detection. Returns a job id to poll."""
+    if not file.content_type.startswith("video/"):
+        raise HTTPException(status_code=400, detail="File must be a video")
+
+    job = job_service.submit_video(file.file, file.filename)
+    if "job_id" not in job:
+        raise HTTPException(status_code=429, detail=job["error"])
+    return job
+
+@app.get("/api/jobs")
+def list_video_jobs():
+    """List known video jobs."""
+    return {"jobs": job_service.list_jobs()}
+
+@app.get("/api/jobs/{job_id}")
+def get_video_job(job_id: str):
+    """Get a job's status and progress (frames done, fire frames so far)."""
+    job = job_service.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@app.get("/api/jobs/{job_id}/events")
+def stream_video_job(job_id: str):
+    """Stream job progress as Server-Sent Events until the job finishes."""
+    if job_service.get_job(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return StreamingResponse(job_service.events(job_id), media_type="text/event-stream")
+
+@app.get("/api/jobs/{job_id}/result")
+def get_video_job_result(job_id: str):
+    """Download the processed MP4 (supports HTTP Range requests for seeking)."""
+    path = job_service.get_result_path(job_id)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Result not available")
+    job = job_service.get_job(job_id)
+    return FileResponse(path, media_type="video/mp4", filename=f"processed_{job['filename']}")
 
 
 from prediction_service import prediction_service
@@ -154,18 +353,79 @@ def get_realtime_wildfire(region: str = "global"):
     return firms_service.get_realtime_data(region)
 
 
+# ============================================================
+# MULTI-CAMERA STREAM ENDPOINTS
+# ============================================================
+
+from stream_manager import stream_manager, check_source_url
+
+class StreamRegisterRequest(BaseModel):
+    id: str
+    url: str
+    loop: bool = False
+
+@app.on_event("startup")
+def load_stream_sources():
+    """Register cameras listed in STREAM_SOURCES (serve.py runs one worker when it is set)."""
+    if SERVE_WORKERS == 1:
+        stream_manager.load_config()
+
+@app.get("/api/streams", dependencies=[Depends(require_single_worker)])
+def list_streams():
+    """Get registered cameras with per-stream stats and batch metrics."""
+    return stream_manager.get_status()
+
+@app.post("/api/streams", dependencies=[Depends(require_single_worker)])
+def register_stream(request: StreamRegisterRequest):
+    """
+    Register a camera for batched detection.
+    Accepts webcam indices and RTSP/HTTP(S) URLs on STREAM_ALLOWED_HOSTS;
+    video files can only be configured through STREAM_SOURCES.
+    """
+    error = check_source_url(request.url)
+    if error:
+        raise HTTPException(status_code=400, detail=error)
+    return stream_manager.add_source(request.id, request.url, loop=request.loop)
+
+@app.delete("/api/streams/{stream_id}", dependencies=[Depends(require_single_worker)])
+def remove_stream(stream_id: str):
+    """Stop and unregister a camera."""
+    return stream_manager.remove_source(stream_id)
+
+@app.get("/api/streams/{stream_id}/video", dependencies=[Depends(require_single_worker)])
+def stream_video(stream_id: str):
+    """Annotated MJPEG output of one camera."""
+    source = stream_manager.get_source(stream_id)
+    if source is None:
+        raise HTTPException(status_code=404, detail=f"Stream '{stream_id}' not found")
+    return StreamingResponse(source.stream(), media_type="multipart/x-mixed-replace; boundary=frame")
+
+@app.get("/api/streams/{stream_id}/detections", dependencies=[Depends(require_single_worker)])
+def stream_detections(stream_id: str, limit: int = 20):
+    """Latest detection summary and recent fire/smoke events of one camera."""
+    source = stream_manager.get_source(stream_id)
+    if source is None:
+        raise HTTPException(status_code=404, detail=f"Stream '{stream_id}' not found")
+    return {
+        "stream": stream_id,
+        "latest": source.latest,
+        "events": list(source.detections)[-limit:]
+    }
+
+
 # ============================================================
 # SATELLITE MONITORING ENDPOINTS
 # ============================================================
 
 from sentinel_service import sentinel_service
 from email_service import email_service
-from monitoring_service import monitoring_service
+from monitoring_service import monitoring_service, LIVE_SCAN_ID
 from typing import Optional, List
 
 class SatelliteScanRequest(BaseModel):
     zone_name: Optional[str] = None
     use_fire_script: bool = True
+    grid: bool = False
 
 class MonitoringStartRequest(BaseModel):
     interval_hours: float = 6.0
@@ -190,12 +450,23 @@ def get_satellite_zones():
 def scan_satellite(request: SatelliteScanRequest = None):
     """
     Manually trigger a satellite scan.
-    If zone_name provided, scans single zone. Otherwise scans all zones.
+    If zone_name provided, scans single zone; with grid=true, starts a
+    background scan of the whole country as a tile grid (202 with a job id;
+    only one grid scan runs at a time). Otherwise scans all zones.
     """
     if not sentinel_service.is_available():
         return {"error": "Sentinel Hub not configured. Check credentials in .env"}
     
-    if request and request.zone_name:
+    if request and request.grid:
+        # ~1250 rate-limited tile fetches: run in the background, poll the job
+        job = monitoring_service.start_grid_scan()
+        return JSONResponse(status_code=202, content={
+            "scan_type": "grid",
+            **job,
+            "status_url": f"/api/satellite/grid/{job['job_id']}" if job["job_id"] else None,
+            "map_url": "/api/satellite/map"
+        })
+    elif request and request.zone_name:
         result = monitoring_service.scan_zone_for_fire(request.zone_name)
         return {"scan_type": "single", "result": result}
     else:
@@ -205,9 +476,18 @@ def scan_satellite(request: SatelliteScanRequest = None):
             "scan_type": "full",
             "zones_scanned": len(results),
             "fires_detected": len(fires_detected),
+            "zones_skipped": sum(1 for r in results if r.get("skipped")),
             "results": results
         }
 
+@app.get("/api/satellite/grid/{job_id}")
+def get_grid_scan_job(job_id: str):
+    """Get the status of a background grid scan."""
+    job = monitoring_service.get_grid_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Grid scan job not found")
+    return job
+
 @app.post("/api/satellite/start")
 def start_satellite_monitoring(request: MonitoringStartRequest = None):
     """Start automated satellite monitoring."""
@@ -227,6 +507,37 @@ def get_satellite_history(limit: int = 10):
         "total_scans": len(monitoring_service.detection_history)
     }
 
+@app.get("/api/satellite/indices/{zone_name}")
+def get_zone_indices(zone_name: str):
+    """
+    Measure fire on a zone's raw Sentinel-2 bands: NBR/NBR2 statistics and
+    SWIR-test hotspot pixels with coordinates.
+    """
+    if not sentinel_service.is_available():
+        return {"error": "Sentinel Hub not configured"}
+
+    result = sentinel_service.scan_zone(zone_name, raw_bands=True)
+    if "error" in result:
+        return result
+
+    import fire_index
+    measurement = monitoring_service.measure_fire(result["bands"], result["metadata"]["bbox"],
+                                                  fire_index.HOTSPOT_LIMIT)
+    return {
+        "zone": result["zone_name"],
+        **measurement,
+        "hotspot_count": len(measurement["hotspots"]),
+        "image_url": monitoring_service.store_image(LIVE_SCAN_ID, result["zone_name"], result["image"]),
+        "metadata": result["metadata"]
+    }
+
+@app.get("/api/satellite/map")
+def get_satellite_map():
+    """Get the national detection map from the latest grid scan."""
+    if monitoring_service.last_grid_map is None:
+        return {"error": "No grid scan yet. Run POST /api/satellite/scan with grid=true"}
+    return monitoring_service.last_grid_map
+
 @app.post("/api/satellite/test-email")
 def test_email_notification(request: EmailTestRequest):
     """Send a test email to verify notification settings."""
@@ -234,9 +545,15 @@ def test_email_notification(request: EmailTestRequest):
         return {"error": "Email service not configured. Check SMTP settings in .env"}
     return email_service.send_test_email(request.recipient)
 
+@app.get("/api/satellite/cache/stats")
+def get_imagery_cache_stats():
+    """Get hit/miss metrics and disk usage of the Sentinel imagery cache."""
+    from imagery_cache import imagery_cache
+    return imagery_cache.get_stats()
+
 @app.get("/api/satellite/image/{zone_name}")
 def get_zone_image(zone_name: str, fire_script: bool = False):
-    """Get satellite image for a specific zone."""
+    """Fetch the current satellite image for a zone; the image itself is served from image_url."""
     if not sentinel_service.is_available():
         return {"error": "Sentinel Hub not configured"}
     
@@ -245,12 +562,42 @@ def get_zone_image(zone_name: str, fire_script: bool = False):
     if "error" in result:
         return result
     
+    # Ad-hoc views share the fixed "live" scan id so they never evict stored scans
     return {
-        "zone": zone_name,
-        "image_base64": result.get("image_base64"),
+        "zone": result.get("zone_name", zone_name),
+        "scan_id": LIVE_SCAN_ID,
+        "image_url": monitoring_service.store_image(LIVE_SCAN_ID, result.get("zone_name", zone_name), result["image"]),
         "metadata": result.get("metadata")
     }
 
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check: comma-separated tags or "*", weak comparison (W/ ignored)."""
+    if not if_none_match:
+        return False
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+@app.get("/api/satellite/image/{scan_id}/{zone_name}")
+def get_scan_image(scan_id: str, zone_name: str, request: Request):
+    """
+    Serve a zone image from a scan as PNG.
+    Images never change for a scan, so clients revalidating with
+    If-None-Match get a 304 without the body. The "live" scan holds the
+    latest ad-hoc view of each zone and is revalidated on every request.
+    """
+    image = monitoring_service.get_scan_image(scan_id, zone_name)
+    if image is None:
+        raise HTTPException(status_code=404, detail="Image not found (unknown or expired scan)")
+
+    cache_control = "no-cache" if scan_id == LIVE_SCAN_ID else "public, max-age=86400, immutable"
+    headers = {"ETag": image.etag, "Cache-Control": cache_control}
+    if _etag_matches(request.headers.get("if-none-match"), image.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=image.png, media_type="image/png", headers=headers)
+
 # ============================================================
 # TEST NOTIFICATION ENDPOINTS
 # ============================================================
@@ -271,8 +618,7 @@ def test_telegram_notification():
         "coordinates": (35.1234, -4.5678),
         "timestamp": datetime.now().isoformat(),
         "brightness": 356.7,
-        "spread_radius": 5.2,
-        "image_base64": None  # No image for quick test
+        "spread_radius": 5.2
     }
     
     # Use the monitoring service's telegram method
@@ -297,16 +643,14 @@ def test_email_mock_alert():
         "zone": "Middle Atlas (TEST)",
         "prediction": "Fire",
         "confidence": 0.876,
-        "coordinates": (33.5000, -5.0000),
-        "image_base64": None
+        "coordinates": (33.5000, -5.0000)
     }
     
     result = email_service.send_alert(
         zone_name=mock_result["zone"],
         coordinates=mock_result["coordinates"],
         confidence=mock_result["confidence"],
-        prediction=mock_result["prediction"],
-        image_base64=mock_result.get("image_base64")
+        prediction=mock_result["prediction"]
     )
     
     return {
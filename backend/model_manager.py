@@ -0,0 +1,157 @@
+"""
+Model Lifecycle Manager.
+Loads models lazily on first use or in a background warm-up task,
+and reports per-model readiness for the /health endpoint.
+"""
+
+import os
+import time
+from threading import Lock, Thread
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+class ModelManager:
+    """Registry of lazily loaded models with optional warm-up inference."""
+
+    STATE_NOT_LOADED = "not_loaded"
+    STATE_LOADING = "loading"
+    STATE_READY = "ready"
+    STATE_FAILED = "failed"
+
+    def __init__(self):
+        """Initialize an empty registry."""
+        self._models = {}
+        self._registry_lock = Lock()
+        self.warmup_thread = None
+
+    def register(self, name: str, loader, warmup=None, fork_safe: bool = True):
+        """
+        Register a model without loading it.
+
+        Args:
+            name: Model identifier (e.g. "yolo", "cam")
+            loader: Callable returning the loaded model
+            warmup: Optional callable(model) running a dummy inference
+            fork_safe: Whether the loaded model can be used after os.fork()
+                (TensorFlow runtimes cannot, so they are loaded per worker)
+        """
+        with self._registry_lock:
+            if name in self._models:
+                return
+            self._models[name] = {
+                "loader": loader,
+                "warmup": warmup,
+                "fork_safe": fork_safe,
+                "lock": Lock(),
+                "model": None,
+                "state": self.STATE_NOT_LOADED,
+                "load_time_s": None,
+                "warmup_time_s": None,
+                "error": None
+            }
+
+    def get(self, name: str):
+        """
+        Get a model, loading it on first use.
+
+        Blocks while another thread (e.g. the warm-up task) is loading it.
+
+        Returns:
+            The loaded model, or None if loading failed
+        """
+        entry = self._models.get(name)
+        if entry is None:
+            raise KeyError(f"Unknown model: {name}")
+
+        if entry["state"] == self.STATE_READY:
+            return entry["model"]
+
+        with entry["lock"]:
+            if entry["state"] in (self.STATE_READY, self.STATE_FAILED):
+                return entry["model"]
+
+            entry["state"] = self.STATE_LOADING
+            start = time.perf_counter()
+            try:
+                entry["model"] = entry["loader"]()
+                entry["load_time_s"] = round(time.perf_counter() - start, 3)
+                entry["state"] = self.STATE_READY
+                print(f"✅ Model '{name}' loaded in {entry['load_time_s']}s")
+            except Exception as e:
+                entry["model"] = None
+                entry["error"] = str(e)
+                entry["state"] = self.STATE_FAILED
+                print(f"⚠️ Error loading model '{name}': {e}")
+            return entry["model"]
+
+    def warm_up(self, name: str):
+        """Load a model and run its dummy inference to trigger graph tracing."""
+        model = self.get(name)
+        entry = self._models[name]
+        if model is None or entry["warmup"] is None or entry["warmup_time_s"] is not None:
+            return
+
+        start = time.perf_counter()
+        try:
+            entry["warmup"](model)
+            entry["warmup_time_s"] = round(time.perf_counter() - start, 3)
+            print(f"🔥 Model '{name}' warmed up in {entry['warmup_time_s']}s")
+        except Exception as e:
+            print(f"⚠️ Warm-up failed for model '{name}': {e}")
+
+    def load_all(self, warmup: bool = True, fork_safe_only: bool = False):
+        """
+        Synchronously load (and optionally warm up) every registered model.
+
+        Args:
+            warmup: Also run each model's dummy inference
+            fork_safe_only: Skip models that cannot be shared with forked workers
+        """
+        for name, entry in list(self._models.items()):
+            if fork_safe_only and not entry["fork_safe"]:
+                continue
+            if warmup:
+                self.warm_up(name)
+            else:
+                self.get(name)
+
+    def start_warmup(self) -> Thread:
+        """Load and warm up all models in a background thread."""
+        if self.warmup_thread and self.warmup_thread.is_alive():
+            return self.warmup_thread
+
+        self.warmup_thread = Thread(target=self.load_all, name="model-warmup", daemon=True)
+        self.warmup_thread.start()
+        return self.warmup_thread
+
+    def is_ready(self, name: str) -> bool:
+        """Check if a model is loaded, without triggering a load."""
+        entry = self._models.get(name)
+        return entry is not None and entry["state"] == self.STATE_READY
+
+    def is_usable(self, name: str) -> bool:
+        """Check if a model is loaded or can still be loaded on demand."""
+        entry = self._models.get(name)
+        return entry is not None and entry["state"] != self.STATE_FAILED
+
+    def get_status(self) -> dict:
+        """Get per-model readiness and timing."""
+        return {
+            name: {
+                "state": entry["state"],
+                "ready": entry["state"] == self.STATE_READY,
+                "load_time_s": entry["load_time_s"],
+                "warmup_time_s": entry["warmup_time_s"],
+                "error": entry["error"]
+            }
+            for name, entry in self._models.items()
+        }
+
+
+# Singleton instance
+model_manager = ModelManager()
+
+# Warm up models in the background at startup unless disabled
+WARMUP_ON_STARTUP = os.getenv("MODEL_WARMUP", "1") != "0"
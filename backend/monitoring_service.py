@@ -1,13 +1,25 @@
 """
 Monitoring Service for automated wildfire detection.
 Runs scheduled scans using Sentinel Hub imagery and CAM (Class Activation Map) model.
+
+Scan images, history, the grid job and map, and the schedule are kept in
+SHARED_STATE_DIR/monitoring, so any worker process (serve.py) can answer
+follow-up requests; only the worker holding the scheduler lock runs the
+scheduled scans.
 """
 
 import os
 import io
+import re
+import math
+import time
+import uuid
+import shutil
+import cv2
 import numpy as np
-from datetime import datetime
-from threading import Lock
+from datetime import datetime, timedelta
+from threading import Lock, Thread
+from urllib.parse import quote
 from PIL import Image
 
 # Try to import APScheduler
@@ -19,26 +31,85 @@ except ImportError:
     SCHEDULER_AVAILABLE = False
     print("⚠️ APScheduler not installed. Run: pip install apscheduler")
 
-# Import TensorFlow and CAM model
-try:
-    import tensorflow as tf
+# CAM model for satellite fire detection (TensorFlow is imported on first use)
+CAM_MODEL_PATH = "Trained-Models/additional-model/cam_model.h5"
+
+
+def _load_cam_model():
     from tensorflow.keras.models import load_model
-    # Use CAM model for satellite fire detection
-    CAM_MODEL_PATH = "Trained-Models/additional-model/cam_model.h5"
-    detection_model = load_model(CAM_MODEL_PATH, compile=False)
-    detection_model.compile(optimizer='adam', loss='sparse_categorical_crossentropy', metrics=['accuracy'])
+    model = load_model(CAM_MODEL_PATH, compile=False)
+    model.compile(optimizer='adam', loss='sparse_categorical_crossentropy', metrics=['accuracy'])
     print(f"✅ CAM Detection model loaded for satellite monitoring")
-except Exception as e:
-    detection_model = None
-    print(f"⚠️ Could not load CAM detection model: {e}")
+    return model
+
 
-from sentinel_service import sentinel_service
+def _warmup_cam_model(model):
+    model.predict(np.zeros((1, 224, 224, 3), dtype=np.float32), verbose=0)
+
+
+from model_manager import model_manager
+model_manager.register("cam", _load_cam_model, _warmup_cam_model, fork_safe=False)
+
+from sentinel_service import sentinel_service, SatelliteImage
 from email_service import email_service
+from alert_dispatcher import alert_dispatcher, AlertFailed
 from prediction_service import prediction_service
-import base64
+import fire_index
+from change_gate import change_gate
+from shared_state import SHARED_STATE_DIR, ProcessLock, read_bytes, read_json, write_bytes, write_json
 import random
 
 
+def _with_image_bytes(fields: dict) -> dict:
+    """Swap the SatelliteImage in email fields for its PNG bytes (encoded in the worker)."""
+    fields = dict(fields)
+    image = fields.pop("image", None)
+    fields["image_bytes"] = image.png if image is not None else None
+    return fields
+
+
+def _send_email_alert(payload: dict):
+    """Alert dispatcher handler for the "email" channel."""
+    result = email_service.send_alert(**_with_image_bytes(payload))
+    if not result["success"]:
+        raise AlertFailed(result["error"])
+    print(f"📧 Alert email sent to {result['recipients']}")
+
+
+def _send_email_digest(detections: list):
+    """Alert dispatcher handler for the "email_digest" channel."""
+    result = email_service.send_digest([_with_image_bytes(d) for d in detections])
+    if not result["success"]:
+        raise AlertFailed(result["error"])
+    print(f"📧 Scan digest sent to {result['recipients']}")
+
+
+alert_dispatcher.register("email", _send_email_alert)
+alert_dispatcher.register("email_digest", _send_email_digest)
+
+# One email per full scan listing every zone with fire (0 = one email per zone)
+EMAIL_DIGEST = os.getenv("EMAIL_DIGEST", "1") != "0"
+# "zones" scans the SCAN_ZONES boxes, "grid" tiles the whole country (make_tile_grid)
+SCAN_MODE = os.getenv("SCAN_MODE", "zones").lower()
+# "cam" classifies rendered images, "index" measures fire on raw bands (fire_index)
+DETECTION_METHOD = os.getenv("DETECTION_METHOD", "cam").lower()
+# Hotspots kept per zone in scan results and history
+SCAN_HOTSPOTS = 20
+# Tiles per CAM model call in grid scans
+CAM_BATCH_SIZE = max(1, int(os.getenv("CAM_BATCH_SIZE", "32")))
+# Scans whose images stay available at /api/satellite/image/{scan_id}/{zone}
+SCAN_IMAGE_RETENTION = int(os.getenv("SCAN_IMAGE_RETENTION", "10"))
+# scan_id of ad-hoc zone views (zone image, indices, single-zone scan): one image
+# per zone, replaced on every view, outside the scan LRU so viewing zones never
+# evicts real scans
+LIVE_SCAN_ID = "live"
+_SCAN_ID_PATTERN = re.compile(r"^(?:[0-9a-f]{12}|live)$")
+# Scans kept in the history
+HISTORY_LIMIT = 100
+# How often the scheduling worker checks for a stop requested on another worker
+SCHEDULE_POLL_SECONDS = 5
+
+
 class MonitoringService:
     """Service for automated satellite monitoring and fire detection using CAM model."""
     
@@ -48,11 +119,24 @@ class MonitoringService:
     def __init__(self):
         """Initialize monitoring service."""
         self.scheduler = None
-        self.is_running = False
         self.scan_interval_hours = 6  # Default: scan every 6 hours
         self.detection_threshold = 0.70  # Minimum confidence to trigger alert
-        self.detection_history = []
         self.lock = Lock()
+
+        # Shared by all worker processes (payloads only carry image URLs)
+        self.state_dir = os.path.join(SHARED_STATE_DIR, "monitoring")
+        self.images_dir = os.path.join(self.state_dir, "images")    # <scan_id>/<zone>.png
+        self.history_dir = os.path.join(self.state_dir, "history")  # one JSON file per scan
+        self.grid_job_path = os.path.join(self.state_dir, "grid_job.json")
+        self.grid_map_path = os.path.join(self.state_dir, "grid_map.json")
+        self.schedule_path = os.path.join(self.state_dir, "schedule.json")
+        os.makedirs(self.images_dir, exist_ok=True)
+        os.makedirs(self.history_dir, exist_ok=True)
+        # One grid scan at a time across all workers (~1250 rate-limited fetches)
+        self.grid_lock = ProcessLock(os.path.join(self.state_dir, "grid.lock"))
+        # Held by the worker whose scheduler runs the monitoring scans
+        self.scheduler_lock = ProcessLock(os.path.join(self.state_dir, "scheduler.lock"))
+        self._owns_scheduler = False
         
         if SCHEDULER_AVAILABLE:
             self.scheduler = BackgroundScheduler()
@@ -64,7 +148,7 @@ class MonitoringService:
         """Check if monitoring is available."""
         return (
             SCHEDULER_AVAILABLE and 
-            detection_model is not None and
+            model_manager.is_usable("cam") and
             sentinel_service.is_available()
         )
     
@@ -78,42 +162,54 @@ class MonitoringService:
         Returns:
             dict with prediction results
         """
+        return self.predict_fire_batch([image])[0]
+
+    def predict_fire_batch(self, images: list) -> list:
+        """
+        Run fire detection on several images in one CAM model call.
+
+        Args:
+            images: PIL Images (each resized to 224x224)
+
+        Returns:
+            List of prediction dicts, one per image
+        """
+        detection_model = model_manager.get("cam")
         if detection_model is None:
-            return {"error": "Detection model not loaded"}
+            return [{"error": "Detection model not loaded"}] * len(images)
         
         try:
-            # Ensure image is RGB and correct size
-            if image.mode != 'RGB':
-                image = image.convert('RGB')
-            image = image.resize((224, 224))
-            
-            # Preprocess for CAM model (normalize to 0-1)
-            img_array = np.array(image, dtype=np.float32) / 255.0
-            img_array = np.expand_dims(img_array, axis=0)
+            # Ensure images are RGB and correct size, normalized to 0-1
+            batch = np.stack([
+                np.asarray(image.convert('RGB').resize((224, 224)), dtype=np.float32)
+                for image in images
+            ]) / 255.0
             
             # Predict - CAM model returns [cam_features, classification]
-            outputs = detection_model.predict(img_array, verbose=0)
+            outputs = detection_model.predict(batch, batch_size=len(images), verbose=0)
             
             # Handle dual output: outputs is a list [cam_output, classification_output]
             if isinstance(outputs, list) and len(outputs) == 2:
                 classification = outputs[1]  # Second output is classification
             else:
                 classification = outputs  # Single output model
+            classification = np.asarray(classification)
             
-            # Get prediction from classification output
-            class_idx = np.argmax(classification[0])
-            confidence = float(np.max(classification[0]))
-            predicted_class = self.CLASS_NAMES.get(class_idx, "Unknown")
-            
-            return {
-                "prediction": predicted_class,
-                "confidence": confidence,
-                "raw_scores": {self.CLASS_NAMES[i]: float(classification[0][i]) for i in range(len(self.CLASS_NAMES))},
-                "is_fire": predicted_class == 'Fire',
-                "timestamp": datetime.now().isoformat()
-            }
+            timestamp = datetime.now().isoformat()
+            predictions = []
+            for scores in classification:
+                class_idx = int(np.argmax(scores))
+                predicted_class = self.CLASS_NAMES.get(class_idx, "Unknown")
+                predictions.append({
+                    "prediction": predicted_class,
+                    "confidence": float(np.max(scores)),
+                    "raw_scores": {self.CLASS_NAMES[i]: float(scores[i]) for i in range(len(self.CLASS_NAMES))},
+                    "is_fire": predicted_class == 'Fire',
+                    "timestamp": timestamp
+                })
+            return predictions
         except Exception as e:
-            return {"error": str(e)}
+            return [{"error": str(e)}] * len(images)
     
     def scan_zone_for_fire(self, zone_name: str) -> dict:
         """
@@ -125,21 +221,110 @@ class MonitoringService:
         Returns:
             dict with scan results
         """
-        # Get satellite image
-        sat_result = sentinel_service.scan_zone(zone_name, use_fire_script=False)
-        
+        # Get satellite image (or raw bands for the index method)
+        sat_result = sentinel_service.scan_zone(zone_name, use_fire_script=False,
+                                                raw_bands=DETECTION_METHOD == "index")
+        # Single-zone scans are ad-hoc views: keep their image under the live id
+        return self._classify_zone(zone_name, sat_result, LIVE_SCAN_ID)
+
+    def measure_fire(self, bands, bbox: tuple, hotspot_limit: int = SCAN_HOTSPOTS) -> dict:
+        """
+        Detect fire by direct measurement on raw Sentinel-2 bands (no CNN).
+
+        The SWIR test is deterministic, so confidence is 1.0 for both outcomes.
+
+        Args:
+            bands: H x W x 6 float32 stack (fire_index.BANDS)
+            bbox: (min_lon, min_lat, max_lon, max_lat) of the stack
+            hotspot_limit: Hotspots returned (strongest first)
+
+        Returns:
+            dict with prediction results, index statistics and hotspots
+        """
+        analysis = fire_index.analyze(bands, bbox, hotspot_limit)
+        return {
+            "prediction": "Fire" if analysis["is_fire"] else "No Fire",
+            "confidence": 1.0,
+            "is_fire": analysis["is_fire"],
+            "timestamp": datetime.now().isoformat(),
+            "indices": analysis["stats"],
+            "hotspots": analysis["hotspots"]
+        }
+
+    def new_scan_id(self) -> str:
+        return uuid.uuid4().hex[:12]
+
+    def _image_path(self, scan_id: str, zone_name: str) -> str:
+        return os.path.join(self.images_dir, scan_id, quote(zone_name, safe="") + ".png")
+
+    def store_image(self, scan_id: str, zone_name: str, image) -> str:
+        """
+        Keep a zone image (as PNG) for the image endpoint.
+
+        Only the images of the SCAN_IMAGE_RETENTION most recent scans are kept.
+
+        Returns:
+            URL path the image is served from
+        """
+        os.makedirs(os.path.join(self.images_dir, scan_id), exist_ok=True)
+        write_bytes(self._image_path(scan_id, zone_name), image.png)
+        if scan_id != LIVE_SCAN_ID:
+            self._prune_scan_images()
+        return f"/api/satellite/image/{scan_id}/{quote(zone_name)}"
+
+    def _prune_scan_images(self):
+        """Delete the images of all but the most recently written scans."""
+        scans = []
+        for name in os.listdir(self.images_dir):
+            if name == LIVE_SCAN_ID:
+                continue
+            try:
+                # A scan directory's mtime changes whenever one of its images is written
+                scans.append((os.stat(os.path.join(self.images_dir, name)).st_mtime, name))
+            except OSError:
+                continue
+        scans.sort()
+        for _, name in scans[:max(0, len(scans) - SCAN_IMAGE_RETENTION)]:
+            shutil.rmtree(os.path.join(self.images_dir, name), ignore_errors=True)
+
+    def get_scan_image(self, scan_id: str, zone_name: str):
+        """Get a stored SatelliteImage, or None if unknown or expired."""
+        if not scan_id or not _SCAN_ID_PATTERN.match(scan_id):
+            return None
+        png = read_bytes(self._image_path(scan_id, zone_name))
+        return SatelliteImage(png=png) if png is not None else None
+
+    def _classify_zone(self, zone_name: str, sat_result: dict, scan_id: str) -> dict:
+        """Run fire detection on a fetched zone image."""
         if "error" in sat_result:
             return {"zone": zone_name, "error": sat_result["error"]}
         
-        # Convert to PIL Image
-        image_array = sat_result.get("image")
-        if image_array is None:
+        image = sat_result.get("image")
+        if image is None:
             return {"zone": zone_name, "error": "No image data received"}
         
-        img = Image.fromarray(image_array.astype('uint8'))
+        # Unchanged imagery: reuse the zone's last CAM result instead of running the
+        # model (raw-band measurements are as cheap as the gate and never skipped)
+        gated = change_gate.enabled and sat_result.get("bands") is None
+        previous = change_score = None
+        if gated:
+            gate_key = change_gate.key(zone_name, sat_result["metadata"]["bbox"])
+            signature = change_gate.signature(image.array)
+            previous, change_score = change_gate.check(gate_key, signature)
+        if previous is not None:
+            return {
+                **previous,
+                "scan_id": scan_id,
+                "image_url": self.store_image(scan_id, zone_name, image),
+                "skipped": True,
+                "change_score": change_score
+            }
         
         # Run prediction
-        prediction = self.predict_fire(img)
+        if sat_result.get("bands") is not None:
+            prediction = self.measure_fire(sat_result["bands"], sat_result["metadata"]["bbox"])
+        else:
+            prediction = self.predict_fire(Image.fromarray(image.array))
         
         if "error" in prediction:
             return {"zone": zone_name, "error": prediction["error"]}
@@ -162,9 +347,21 @@ class MonitoringService:
             "is_fire": prediction["is_fire"],
             "coordinates": (center_lat, center_lon),
             "timestamp": prediction["timestamp"],
-            "image_base64": sat_result.get("image_base64")
+            "scan_id": scan_id,
+            "image_url": self.store_image(scan_id, zone_name, image)
         }
-        
+        if "indices" in prediction:
+            result["indices"] = prediction["indices"]
+            result["hotspots"] = prediction["hotspots"]
+            if prediction["hotspots"]:
+                # Locate the alert at the strongest fire pixel instead of the zone center
+                result["coordinates"] = (prediction["hotspots"][0]["lat"], prediction["hotspots"][0]["lon"])
+        
+        if gated:
+            change_gate.update(gate_key, signature,
+                               {k: v for k, v in result.items() if k not in ("scan_id", "image_url")})
+        result["skipped"] = False
+        result["change_score"] = change_score
         return result
     
     def run_full_scan(self) -> list:
@@ -174,58 +371,283 @@ class MonitoringService:
         Returns:
             List of scan results for each zone
         """
-        results = []
         zones = sentinel_service.get_zones()
+        results = [None] * len(zones)
+        scan_id = self.new_scan_id()
         
         print(f"🔍 Starting full scan of {len(zones)} zones...")
         
-        for zone in zones:
+        # Downloads run concurrently; each zone is classified as soon as it
+        # arrives, while the remaining fetches are still in flight
+        for index, zone, sat_result in sentinel_service.iter_zone_scans(use_fire_script=False,
+                                                                        raw_bands=DETECTION_METHOD == "index"):
             try:
-                result = self.scan_zone_for_fire(zone["name"])
-                results.append(result)
+                result = self._classify_zone(zone["name"], sat_result, scan_id)
                 
                 # Check for fire detection
                 if result.get("is_fire") and result.get("confidence", 0) >= self.detection_threshold:
-                    self._handle_detection(result)
+                    self._handle_detection(result, send_email=not EMAIL_DIGEST)
                     
             except Exception as e:
-                results.append({
+                result = {
                     "zone": zone["name"],
                     "error": str(e)
-                })
+                }
+            results[index] = result
         
-        # Store in history
-        with self.lock:
-            self.detection_history.append({
-                "timestamp": datetime.now().isoformat(),
-                "results": results,
-                "fires_detected": sum(1 for r in results if r.get("is_fire"))
-            })
-            # Keep only last 100 scans
-            self.detection_history = self.detection_history[-100:]
+        detections = [
+            r for r in results
+            if r.get("is_fire") and r.get("confidence", 0) >= self.detection_threshold
+        ]
         
-        print(f"✅ Scan complete. Fires detected: {sum(1 for r in results if r.get('is_fire'))}")
+        # Store in history
+        self._add_history({
+            "scan_id": scan_id,
+            "timestamp": datetime.now().isoformat(),
+            "results": results,
+            "fires_detected": sum(1 for r in results if r.get("is_fire")),
+            "zones_skipped": sum(1 for r in results if r.get("skipped"))
+        })
+        
+        print(f"✅ Scan complete. Fires detected: {sum(1 for r in results if r.get('is_fire'))}, "
+              f"unchanged zones skipped: {sum(1 for r in results if r.get('skipped'))}")
+
+        if EMAIL_DIGEST and detections and email_service.is_available():
+            alert_dispatcher.dispatch("email_digest", "scan", [self._email_fields(r) for r in detections])
         
         return results
     
-    def _handle_detection(self, result: dict):
-        """Handle a positive fire detection."""
+    def run_grid_scan(self, bounds: dict = None, tile_px: int = None, resolution: int = None) -> dict:
+        """
+        Scan a whole area (default: Morocco) as a regular tile grid.
+
+        Tiles are fetched concurrently and classified in CAM batches of
+        CAM_BATCH_SIZE while the remaining downloads are in flight; only the
+        images of tiles with fire are kept. Adjacent fire tiles are merged
+        into clusters, each alerted once.
+
+        Args:
+            bounds: Area of interest (lat_min/lat_max/lon_min/lon_max)
+            tile_px: Tile side in pixels (default GRID_TILE_PIXELS)
+            resolution: Metres per pixel (default GRID_RESOLUTION)
+
+        Returns:
+            National detection map: grid geometry, per-tile fire probability
+            matrix (row 0 = north, None = failed tile) and fire clusters
+        """
+        start = time.perf_counter()
+        grid = sentinel_service.make_tile_grid(bounds, tile_px, resolution)
+        rows, cols = grid["rows"], grid["cols"]
+        tiles = grid["tiles"]
+        scan_id = self.new_scan_id()
+        probability = np.full((rows, cols), np.nan, dtype=np.float32)
+        images = {}  # tile name -> SatelliteImage, fire tiles only
+        batch = []
+
+        print(f"🔍 Starting grid scan: {len(tiles)} tiles ({rows}x{cols}, {grid['tile_px']}px @ {grid['resolution']}m)...")
+
+        skipped = 0
+
+        def record(tile, image, fire):
+            probability[tile["row"], tile["col"]] = fire
+            if fire >= self.detection_threshold:
+                images[tile["name"]] = image
+
+        def classify(batch):
+            predictions = self.predict_fire_batch([Image.fromarray(image.array) for _, image, _, _ in batch])
+            for (tile, image, gate_key, signature), prediction in zip(batch, predictions):
+                if "error" in prediction:
+                    continue
+                fire = prediction["raw_scores"]["Fire"]
+                change_gate.update(gate_key, signature, {"fire": fire})
+                record(tile, image, fire)
+
+        for _, tile, sat_result in sentinel_service.iter_zone_scans(use_fire_script=False, zones=tiles):
+            if "error" in sat_result or sat_result.get("image") is None:
+                continue
+            # Unchanged tiles keep their last fire probability without a model call
+            gate_key = signature = None
+            if change_gate.enabled:
+                gate_key = change_gate.key(tile["name"], tile["bbox"])
+                signature = change_gate.signature(sat_result["image"].array)
+            previous, _ = change_gate.check(gate_key, signature)
+            if previous is not None:
+                skipped += 1
+                record(tile, sat_result["image"], previous["fire"])
+                continue
+            batch.append((tile, sat_result["image"], gate_key, signature))
+            if len(batch) >= CAM_BATCH_SIZE:
+                classify(batch)
+                batch = []
+        if batch:
+            classify(batch)
+
+        # Merge adjacent (8-connected) fire tiles into clusters
+        fire_mask = np.nan_to_num(probability, nan=0.0) >= self.detection_threshold
+        count, labels = cv2.connectedComponents(fire_mask.astype(np.uint8), connectivity=8)
+        tile_at = {(t["row"], t["col"]): t for t in tiles}
+        timestamp = datetime.now().isoformat()
+        clusters = []
+        for label in range(1, count):
+            cells = np.argwhere(labels == label)
+            row, col = max(cells, key=lambda rc: probability[rc[0], rc[1]])
+            tile = tile_at[(int(row), int(col))]
+            boxes = np.array([tile_at[(int(r), int(c))]["bbox"] for r, c in cells])
+            bbox = tile["bbox"]
+            clusters.append({
+                "zone": tile["name"],
+                "prediction": "Fire",
+                "confidence": float(probability[row, col]),
+                "is_fire": True,
+                "coordinates": ((bbox[1] + bbox[3]) / 2, (bbox[0] + bbox[2]) / 2),
+                "timestamp": timestamp,
+                "scan_id": scan_id,
+                "image_url": self.store_image(scan_id, tile["name"], images[tile["name"]]),
+                "tiles": len(cells),
+                "bbox": (float(boxes[:, 0].min()), float(boxes[:, 1].min()),
+                         float(boxes[:, 2].max()), float(boxes[:, 3].max()))
+            })
+        clusters.sort(key=lambda c: c["confidence"], reverse=True)
+
+        for cluster in clusters:
+            self._handle_detection(cluster, send_email=not EMAIL_DIGEST)
+
+        duration = time.perf_counter() - start
+        scanned = int(np.count_nonzero(~np.isnan(probability)))
+        detection_map = {
+            "scan_id": scan_id,
+            "timestamp": timestamp,
+            "duration_s": round(duration, 2),
+            "grid": {k: v for k, v in grid.items() if k != "tiles"},
+            "tiles_scanned": scanned,
+            "tiles_failed": len(tiles) - scanned,
+            "tiles_skipped": skipped,
+            "fire_tiles": int(fire_mask.sum()),
+            "fires_detected": len(clusters),
+            "clusters": clusters,
+            "fire_probability": [
+                [None if np.isnan(p) else round(float(p), 3) for p in row]
+                for row in probability
+            ]
+        }
+
+        write_json(self.grid_map_path, detection_map)
+        self._add_history({
+            "scan_id": scan_id,
+            "scan_type": "grid",
+            "timestamp": timestamp,
+            "results": clusters,
+            "fires_detected": len(clusters),
+            "tiles_scanned": scanned,
+            "tiles_skipped": skipped
+        })
+
+        print(f"✅ Grid scan complete in {duration:.1f}s: {scanned}/{len(tiles)} tiles "
+              f"({skipped} unchanged), {len(clusters)} fire cluster(s)")
+        schedule = self._schedule()
+        if schedule and duration > schedule["interval_hours"] * 3600:
+            print(f"⚠️ Grid scan took longer than the {schedule['interval_hours']}h scan interval")
+
+        if EMAIL_DIGEST and clusters and email_service.is_available():
+            alert_dispatcher.dispatch("email_digest", "scan", [self._email_fields(c) for c in clusters])
+
+        return detection_map
+
+    @property
+    def last_grid_map(self):
+        """National detection map of the latest grid scan, or None."""
+        return read_json(self.grid_map_path)
+
+    def start_grid_scan(self) -> dict:
+        """
+        Run a grid scan in a background thread.
+
+        Single-flight across all workers: while a grid scan is running, the
+        running job is returned instead of starting another one.
+
+        Returns:
+            Job status dict (job_id, status, started_at, ...)
+        """
+        if not self.grid_lock.acquire():
+            # job_id is None only in the instant before the other worker records its job
+            return {**(self.get_grid_job() or {"job_id": None, "status": "running"}), "already_running": True}
+        job = self._new_grid_job()
+        Thread(target=self._run_grid_job, args=(job,), name="grid-scan", daemon=True).start()
+        return self._public_grid_job(job)
+
+    def get_grid_job(self, job_id: str = None):
+        """Status of the current/last grid job, or None if job_id does not match it."""
+        job = read_json(self.grid_job_path)
+        if job is None or (job_id and job["job_id"] != job_id):
+            return None
+        if job["status"] == "running" and not self.grid_lock.is_locked():
+            # The worker running the scan died before recording the outcome
+            job.update(status="failed", error="Worker exited during the scan")
+        return self._public_grid_job(job)
+
+    @staticmethod
+    def _public_grid_job(job: dict) -> dict:
+        return {k: v for k, v in job.items() if k != "pid"}
+
+    def _new_grid_job(self) -> dict:
+        """Create the job record; the caller must hold grid_lock."""
+        job = {
+            "job_id": uuid.uuid4().hex[:12],
+            "status": "running",
+            "started_at": datetime.now().isoformat(),
+            "finished_at": None,
+            "pid": os.getpid()
+        }
+        write_json(self.grid_job_path, job)
+        return job
+
+    def _run_grid_job(self, job: dict):
+        """Run the grid scan for a job and release grid_lock."""
+        update = {"status": "failed"}
+        try:
+            detection_map = self.run_grid_scan()
+            update = {
+                "status": "completed",
+                "scan_id": detection_map["scan_id"],
+                "tiles_scanned": detection_map["tiles_scanned"],
+                "tiles_failed": detection_map["tiles_failed"],
+                "fires_detected": detection_map["fires_detected"]
+            }
+        except Exception as e:
+            print(f"❌ Grid scan failed: {e}")
+            update["error"] = str(e)
+        finally:
+            job.update(update, finished_at=datetime.now().isoformat())
+            write_json(self.grid_job_path, job)
+            self.grid_lock.release()
+
+    def run_scheduled_scan(self):
+        """Scan job run by the scheduler (SCAN_MODE selects zones or the national grid)."""
+        if SCAN_MODE == "grid":
+            if not self.grid_lock.acquire():
+                print("⚠️ Grid scan still running - skipping scheduled scan")
+                return
+            self._run_grid_job(self._new_grid_job())
+        else:
+            self.run_full_scan()
+
+    def _email_fields(self, result: dict) -> dict:
+        """Email alert arguments for a scan result."""
+        return {
+            "zone_name": result["zone"],
+            "coordinates": result["coordinates"],
+            "confidence": result["confidence"],
+            "prediction": result["prediction"],
+            "image": self.get_scan_image(result.get("scan_id"), result["zone"])
+        }
+
+    def _handle_detection(self, result: dict, send_email: bool = True):
+        """Handle a positive fire detection (email may be left to the scan digest)."""
         print(f"🔥 FIRE DETECTED in {result['zone']} ({result['confidence']*100:.1f}% confidence)")
         
-        # Send email alert
-        if email_service.is_available():
-            email_result = email_service.send_alert(
-                zone_name=result["zone"],
-                coordinates=result["coordinates"],
-                confidence=result["confidence"],
-                prediction=result["prediction"],
-                image_base64=result.get("image_base64")
-            )
-            
-            if email_result["success"]:
-                print(f"📧 Alert email sent to {email_result['recipients']}")
-            else:
-                print(f"❌ Email failed: {email_result['error']}")
+        # Send email alert (delivered in the background)
+        if send_email and email_service.is_available():
+            alert_dispatcher.dispatch("email", result["zone"], self._email_fields(result))
         
         # Simulate brightness for demo (CAM model doesn't output temperature)
         # Random value between 320K and 400K for detected fires
@@ -244,17 +666,8 @@ class MonitoringService:
     
     def _send_telegram_alert(self, result: dict):
         """
-        Send fire alert to Telegram bot with image and detailed metrics.
+        Queue a fire alert for Telegram with image and detailed metrics.
         """
-        import requests
-        
-        bot_token = os.getenv("BOT_TOKEN")
-        chat_id = os.getenv("CHAT_ID")
-        
-        if not bot_token or not chat_id:
-            print("⚠️ Telegram credentials not configured")
-            return
-            
         # Format Google Maps link
         lat, lon = result['coordinates']
         maps_link = f"https://www.google.com/maps/search/?api=1&query={lat},{lon}"
@@ -280,43 +693,35 @@ class MonitoringService:
 🚨 *ACTION REQUISE: VÉRIFICATION IMMÉDIATE*
 _ID: {datetime.now().strftime('%Y%m%d-%H%M%S')}_"""
 
-        try:
-            # Prepare image if available
-            files = None
-            data = {
-                "chat_id": chat_id,
-                "caption": message,
-                "parse_mode": "Markdown"
-            }
-            
-            if result.get("image_base64"):
-                # Decode base64 image
-                image_data = base64.b64decode(result["image_base64"])
-                files = {"photo": ("alert_image.png", image_data, "image/png")}
-                url = f"https://api.telegram.org/bot{bot_token}/sendPhoto"
-            else:
-                # Fallback to text only if no image
-                url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
-                data["text"] = message
-                del data["caption"]
-
-            if files:
-                response = requests.post(url, data=data, files=files, timeout=15)
-            else:
-                response = requests.post(url, json=data, timeout=10)
-            
-            if response.status_code == 200:
-                print(f"📱 Detailed Telegram alert sent to chat {chat_id}")
-            else:
-                print(f"❌ Telegram failed: {response.text}")
-                
-        except Exception as e:
-            print(f"❌ Telegram error: {e}")
+        payload = {"parse_mode": "Markdown"}
+        image = self.get_scan_image(result.get("scan_id"), result["zone"])
+        if image is not None:
+            payload["caption"] = message
+            payload["photo"] = image.png
+        else:
+            # Fallback to text only if no image
+            payload["text"] = message
+        alert_dispatcher.dispatch("telegram", result["zone"], payload)
     
+    def _schedule(self):
+        """The shared schedule if some worker's scheduler is running, else None."""
+        schedule = read_json(self.schedule_path)
+        # The lock is released by the OS if the scheduling worker dies
+        if schedule and schedule["running"] and self.scheduler_lock.is_locked():
+            return schedule
+        return None
+
+    @property
+    def is_running(self) -> bool:
+        return self._schedule() is not None
+
     def start_monitoring(self, interval_hours: float = 6) -> dict:
         """
         Start automated monitoring.
         
+        The scheduler runs in the worker that handles this request; it holds
+        the scheduler lock so no other worker can start a second one.
+
         Args:
             interval_hours: Hours between scans (default 6)
             
@@ -326,78 +731,143 @@ _ID: {datetime.now().strftime('%Y%m%d-%H%M%S')}_"""
         if not SCHEDULER_AVAILABLE:
             return {"success": False, "error": "Scheduler not available"}
         
-        if self.is_running:
+        if not self.scheduler_lock.acquire():
             return {"success": False, "error": "Monitoring already running"}
         
-        self.scan_interval_hours = interval_hours
-        
-        # Add job
-        self.scheduler.add_job(
-            self.run_full_scan,
-            trigger=IntervalTrigger(hours=interval_hours),
-            id='satellite_scan',
-            replace_existing=True
-        )
-        
-        self.scheduler.start()
-        self.is_running = True
+        with self.lock:
+            self._owns_scheduler = True
+            self.scan_interval_hours = interval_hours
+            
+            # Add job
+            self.scheduler.add_job(
+                self.run_scheduled_scan,
+                trigger=IntervalTrigger(hours=interval_hours),
+                id='satellite_scan',
+                replace_existing=True
+            )
+            # Stop requests may arrive on another worker: they are read from the schedule file
+            self.scheduler.add_job(
+                self._check_stop_request,
+                trigger=IntervalTrigger(seconds=SCHEDULE_POLL_SECONDS),
+                id='stop_check',
+                replace_existing=True
+            )
+            
+            self.scheduler.start()
+            next_scan = self.scheduler.get_job('satellite_scan').next_run_time.isoformat()
+            write_json(self.schedule_path, {
+                "running": True,
+                "interval_hours": interval_hours,
+                "first_scan": next_scan
+            })
         
         # Run initial scan
-        self.run_full_scan()
+        self.run_scheduled_scan()
         
         return {
             "success": True,
             "message": f"Monitoring started. Scanning every {interval_hours} hours.",
-            "next_scan": self.scheduler.get_job('satellite_scan').next_run_time.isoformat()
+            "next_scan": next_scan
         }
     
     def stop_monitoring(self) -> dict:
         """
         Stop automated monitoring.
         
+        When another worker runs the scheduler, it stops within
+        SCHEDULE_POLL_SECONDS (before any further scan).
+
         Returns:
             dict with status
         """
-        if not self.is_running:
+        schedule = self._schedule()
+        if schedule is None:
             return {"success": False, "error": "Monitoring not running"}
         
-        self.scheduler.remove_job('satellite_scan')
-        self.scheduler.shutdown(wait=False)
-        self.scheduler = BackgroundScheduler()  # Reset scheduler
-        self.is_running = False
+        write_json(self.schedule_path, {**schedule, "running": False})
+        self._shutdown_scheduler()
         
         return {"success": True, "message": "Monitoring stopped"}
+
+    def _check_stop_request(self):
+        """Scheduler job: stop this worker's scheduler once a stop was requested."""
+        schedule = read_json(self.schedule_path)
+        if not schedule or not schedule["running"]:
+            self._shutdown_scheduler()
+
+    def _shutdown_scheduler(self):
+        """Stop the scheduler if this worker runs it and hand the scheduler lock back."""
+        with self.lock:
+            if not self._owns_scheduler:
+                return
+            self.scheduler.remove_all_jobs()
+            self.scheduler.shutdown(wait=False)
+            self.scheduler = BackgroundScheduler()  # Reset scheduler
+            self._owns_scheduler = False
+            self.scheduler_lock.release()
+            print("⏹️ Monitoring scheduler stopped")
     
     def get_status(self) -> dict:
         """Get current monitoring status."""
+        schedule = self._schedule()
+        history = self._history_files()
         status = {
-            "is_running": self.is_running,
-            "interval_hours": self.scan_interval_hours,
+            "is_running": schedule is not None,
+            "interval_hours": schedule["interval_hours"] if schedule else self.scan_interval_hours,
             "detection_threshold": self.detection_threshold,
             "services": {
                 "sentinel_hub": sentinel_service.is_available(),
                 "email": email_service.is_available(),
-                "model_loaded": detection_model is not None,
+                "model_loaded": model_manager.is_ready("cam"),
                 "scheduler": SCHEDULER_AVAILABLE
             },
+            "scan_mode": SCAN_MODE,
+            "detection_method": DETECTION_METHOD,
             "zones": len(sentinel_service.get_zones()),
-            "recent_scans": len(self.detection_history)
+            "recent_scans": len(history),
+            "change_gate": change_gate.get_stats()
         }
         
-        if self.is_running and self.scheduler:
-            job = self.scheduler.get_job('satellite_scan')
-            if job:
-                status["next_scan"] = job.next_run_time.isoformat()
+        if schedule:
+            # Scans run at first_scan + k * interval
+            first = datetime.fromisoformat(schedule["first_scan"])
+            interval = timedelta(hours=schedule["interval_hours"])
+            now = datetime.now(first.tzinfo)
+            periods = max(0, math.ceil((now - first) / interval))
+            status["next_scan"] = (first + periods * interval).isoformat()
         
-        if self.detection_history:
-            status["last_scan"] = self.detection_history[-1]
+        last_scan = self.get_history(1)
+        if last_scan:
+            status["last_scan"] = last_scan[-1]
         
         return status
+
+    def _history_files(self) -> list:
+        """History file names, oldest first (named <time_ns>-<scan_id>.json)."""
+        return sorted(name for name in os.listdir(self.history_dir) if name.endswith(".json"))
+
+    def _add_history(self, entry: dict):
+        """Record a scan, keeping only the last HISTORY_LIMIT."""
+        write_json(os.path.join(self.history_dir, f"{time.time_ns()}-{entry['scan_id']}.json"), entry)
+        names = self._history_files()
+        for name in names[:max(0, len(names) - HISTORY_LIMIT)]:
+            try:
+                os.remove(os.path.join(self.history_dir, name))
+            except FileNotFoundError:
+                pass
     
     def get_history(self, limit: int = 10) -> list:
         """Get recent detection history."""
-        with self.lock:
-            return self.detection_history[-limit:]
+        history = []
+        for name in self._history_files()[-limit:]:
+            entry = read_json(os.path.join(self.history_dir, name))
+            if entry is not None:
+                history.append(entry)
+        return history
+
+    @property
+    def detection_history(self) -> list:
+        return self.get_history(HISTORY_LIMIT)
 
 
 # Singleton instance
@@ -0,0 +1,66 @@
+"""
+Thread-safe token-bucket rate limiter for outbound API calls.
+"""
+
+import time
+from threading import Lock
+
+
+class TokenBucket:
+    """Allows `rate` calls per second on average with bursts of up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        """
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum tokens stored (burst size)
+        """
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.waited = 0.0
+        self._lock = Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """Take tokens if available without waiting."""
+        with self._lock:
+            self._refill(time.monotonic())
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens: float = 1.0, timeout: float = None) -> bool:
+        """
+        Wait until tokens are available and take them.
+
+        Returns:
+            False if the timeout expired first
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return True
+                delay = (tokens - self.tokens) / self.rate
+            if deadline is not None and now + delay > deadline:
+                return False
+            time.sleep(delay)
+            with self._lock:
+                self.waited += delay
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "rate": self.rate,
+                "capacity": self.capacity,
+                "waited_seconds": round(self.waited, 3)
+            }
@@ -5,11 +5,22 @@ Fetches Sentinel-2 imagery for Morocco region to detect wildfires.
 
 import os
 import io
+import math
+import base64
+import hashlib
+from threading import Lock
+
+import cv2
 import numpy as np
 from datetime import datetime, timedelta
 from PIL import Image
 from dotenv import load_dotenv
 
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from imagery_cache import imagery_cache
+from rate_limit import TokenBucket
+import fire_index
+
 load_dotenv()
 
 # Try to import sentinelhub - provide fallback if not installed
@@ -29,6 +40,58 @@ except ImportError:
     print("⚠️ sentinelhub not installed. Run: pip install sentinelhub")
 
 
+class SatelliteImage:
+    """
+    A satellite image kept once in memory and encoded only when asked for.
+
+    Holds the RGB array (for the model) and/or the PNG bytes (for the image
+    endpoint and alerts). Whichever is missing is derived on first access and
+    kept, so an image is never decoded or PNG-encoded more than once.
+    """
+
+    def __init__(self, array=None, png: bytes = None):
+        if array is None and png is None:
+            raise ValueError("SatelliteImage needs an array or PNG bytes")
+        self._array = array
+        self._png = png
+        self._etag = None
+        self._lock = Lock()
+
+    @property
+    def array(self) -> np.ndarray:
+        """RGB uint8 array (decoded from the PNG on first access)."""
+        if self._array is None:
+            with self._lock:
+                if self._array is None:
+                    self._array = np.asarray(Image.open(io.BytesIO(self._png)).convert("RGB"))
+        return self._array
+
+    @property
+    def png(self) -> bytes:
+        """PNG bytes (encoded from the array on first access)."""
+        if self._png is None:
+            with self._lock:
+                if self._png is None:
+                    array = np.asarray(self._array, dtype=np.uint8)
+                    if array.ndim == 3 and array.shape[2] == 3:
+                        array = cv2.cvtColor(array, cv2.COLOR_RGB2BGR)
+                    elif array.ndim == 3 and array.shape[2] == 4:
+                        array = cv2.cvtColor(array, cv2.COLOR_RGBA2BGRA)
+                    self._png = cv2.imencode(".png", array)[1].tobytes()
+        return self._png
+
+    @property
+    def etag(self) -> str:
+        """Strong ETag derived from the PNG content."""
+        if self._etag is None:
+            self._etag = '"' + hashlib.sha256(self.png).hexdigest()[:32] + '"'
+        return self._etag
+
+    def to_base64(self) -> str:
+        """Base64 of the PNG, for callers that still need it inline."""
+        return base64.b64encode(self.png).decode("utf-8")
+
+
 class SentinelService:
     """Service for fetching satellite imagery from Sentinel Hub."""
     
@@ -104,11 +167,44 @@ class SentinelService:
     }
     """
 
+    # Raw reflectances for fire_index (float32, no visualization)
+    EVALSCRIPT_RAW_BANDS = """
+    //VERSION=3
+    function setup() {
+        return {
+            input: [{
+                bands: ["B04", "B08", "B8A", "B11", "B12", "dataMask"]
+            }],
+            output: {
+                bands: 6,
+                sampleType: "FLOAT32"
+            }
+        };
+    }
+    
+    function evaluatePixel(sample) {
+        return [sample.B04, sample.B08, sample.B8A, sample.B11, sample.B12, sample.dataMask];
+    }
+    """
+
+    MAX_IMAGE_DIM = 1024  # Largest image side requested from Sentinel Hub
+    SCAN_WORKERS = max(1, int(os.getenv("SCAN_WORKERS", "4")))
+    MOCK_IMAGE_SIZE = int(os.getenv("MOCK_IMAGE_SIZE", "512"))
+    MOCK_FIRE_PROBABILITY = float(os.getenv("MOCK_FIRE_PROBABILITY", "0.1"))
+    # Nationwide grid: tile side in pixels and metres per pixel
+    GRID_TILE_PIXELS = int(os.getenv("GRID_TILE_PIXELS", "512"))
+    GRID_RESOLUTION = int(os.getenv("GRID_RESOLUTION", "60"))
+
     def __init__(self):
         """Initialize Sentinel Hub configuration."""
         self.config = None
         self.initialized = False
         self.demo_mode = False
+        # Shared by all scan threads so concurrent fetches stay within the account quota
+        self.rate_limiter = TokenBucket(
+            rate=float(os.getenv("SENTINEL_RATE_PER_SEC", "2")),
+            capacity=float(os.getenv("SENTINEL_BURST", "4"))
+        )
         
         if SENTINELHUB_AVAILABLE:
             client_id = os.getenv("SENTINEL_CLIENT_ID", "")
@@ -132,72 +228,185 @@ class SentinelService:
         """Check if Sentinel Hub service is available (including demo mode)."""
         return (self.initialized and SENTINELHUB_AVAILABLE) or self.demo_mode
     
-    def _generate_mock_image(self, zone_name: str) -> dict:
-        """Generate a mock satellite-like image for demo purposes."""
-        import random
-        import base64
-        
-        # Create a 512x512 mock satellite image
-        width, height = 512, 512
-        
-        # Generate terrain-like colors (greens, browns, some blue)
-        img_array = np.zeros((height, width, 3), dtype=np.uint8)
-        
-        # Base terrain (green/brown gradient)
-        for y in range(height):
-            for x in range(width):
-                # Perlin-like noise simulation with simple math
-                noise = (np.sin(x * 0.05) * np.cos(y * 0.05) + 
-                        np.sin(x * 0.1 + y * 0.1) * 0.5 + 
-                        random.random() * 0.3)
-                
-                # Green vegetation
-                green = int(50 + noise * 80 + random.randint(0, 30))
-                red = int(30 + noise * 40 + random.randint(0, 20))
-                blue = int(20 + noise * 20 + random.randint(0, 15))
-                
-                img_array[y, x] = [
-                    max(0, min(255, red)),
-                    max(0, min(255, green)),
-                    max(0, min(255, blue))
-                ]
-        
-        # Add some random "fire" pixels for demo (10% chance per zone)
-        has_fire = random.random() < 0.1
+    def _generate_mock_image(self, zone_name: str, size: int = None, date: str = None, fire: bool = None,
+                             bbox: tuple = None) -> dict:
+        """
+        Generate a mock satellite-like image for demo purposes.
+
+        The scene is synthesized with whole-array NumPy operations from a
+        generator seeded by zone and date, so the same zone shows the same
+        image for a given day.
+
+        Args:
+            zone_name: Zone the image is generated for
+            size: Width/height in pixels (default MOCK_IMAGE_SIZE, max 1024)
+            date: Date string (YYYY-MM-DD) used for the seed (default today)
+            fire: Force (True) or suppress (False) a fire spot; by default one
+                appears with probability MOCK_FIRE_PROBABILITY
+            bbox: Footprint for the metadata (default: the named scan zone's)
+        """
+        size = min(size or self.MOCK_IMAGE_SIZE, self.MAX_IMAGE_DIM)
+        width, height = size, size
+        date = date or datetime.now().strftime('%Y-%m-%d')
+        seed = int.from_bytes(hashlib.sha256(f"{zone_name.lower()}|{date}".encode()).digest()[:8], "little")
+        rng = np.random.default_rng(seed)
+
+        # Terrain pattern keeps the same scale as the original 512px scene
+        step = 512 / size
+        x = np.arange(width, dtype=np.float32)[None, :] * np.float32(step)
+        y = np.arange(height, dtype=np.float32)[:, None] * np.float32(step)
+        noise = (np.sin(x * 0.05) * np.cos(y * 0.05) +
+                 np.sin(x * 0.1 + y * 0.1) * 0.5 +
+                 rng.random((height, width), dtype=np.float32) * 0.3)
+
+        # Green vegetation with some brown/blue
+        red = 30 + noise * 40 + rng.integers(0, 21, (height, width), dtype=np.uint8)
+        green = 50 + noise * 80 + rng.integers(0, 31, (height, width), dtype=np.uint8)
+        blue = 20 + noise * 20 + rng.integers(0, 16, (height, width), dtype=np.uint8)
+        img_array = np.clip(np.stack([red, green, blue], axis=-1), 0, 255).astype(np.uint8)
+
+        # Add some random "fire" pixels for demo
+        has_fire = rng.random() < self.MOCK_FIRE_PROBABILITY if fire is None else fire
         if has_fire:
-            # Add a fire spot
-            fire_x, fire_y = random.randint(100, 400), random.randint(100, 400)
-            for dx in range(-20, 20):
-                for dy in range(-20, 20):
-                    if dx*dx + dy*dy < 400:  # Circle
-                        px, py = fire_x + dx, fire_y + dy
-                        if 0 <= px < width and 0 <= py < height:
-                            img_array[py, px] = [255, random.randint(50, 150), 0]  # Orange/red
+            # Add a fire spot (orange/red disc)
+            radius = 20 / step
+            fire_x, fire_y = rng.integers(int(100 / step), int(400 / step) + 1, size=2)
+            spot = (np.arange(width)[None, :] - fire_x) ** 2 + (np.arange(height)[:, None] - fire_y) ** 2 < radius ** 2
+            count = int(spot.sum())
+            img_array[spot] = np.stack([
+                np.full(count, 255), rng.integers(50, 151, count), np.zeros(count)
+            ], axis=-1).astype(np.uint8)
         
-        # Convert to PIL Image and base64
-        img = Image.fromarray(img_array)
-        buffer = io.BytesIO()
-        img.save(buffer, format='PNG')
-        image_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
-        
-        zone = next((z for z in self.SCAN_ZONES if z["name"].lower() == zone_name.lower()), self.SCAN_ZONES[0])
+        if bbox is None:
+            zone = next((z for z in self.SCAN_ZONES if z["name"].lower() == zone_name.lower()), self.SCAN_ZONES[0])
+            zone_name, bbox = zone["name"], zone["bbox"]
         
         return {
             "success": True,
-            "image": img_array,
-            "image_base64": image_base64,
+            "image": SatelliteImage(array=img_array),
             "demo_mode": True,
-            "zone_name": zone["name"],
+            "zone_name": zone_name,
             "metadata": {
-                "bbox": zone["bbox"],
+                "bbox": bbox,
                 "resolution": 60,
                 "size": (width, height),
-                "time_interval": (datetime.now().strftime('%Y-%m-%d'), datetime.now().strftime('%Y-%m-%d')),
+                "time_interval": (date, date),
                 "acquired_at": datetime.now().isoformat(),
+                "mock_fire": bool(has_fire),
                 "note": "DEMO MODE - Mock satellite image"
             }
         }
     
+    def _request_geometry(self, bbox_coords: tuple, resolution: int, days_back: int):
+        """BBox, pixel size (capped at MAX_IMAGE_DIM) and time interval of a request."""
+        bbox = BBox(bbox=bbox_coords, crs=CRS.WGS84)
+        size = bbox_to_dimensions(bbox, resolution=resolution)
+        
+        # Limit max size
+        max_dim = self.MAX_IMAGE_DIM
+        if size[0] > max_dim or size[1] > max_dim:
+            scale = max_dim / max(size)
+            size = (int(size[0] * scale), int(size[1] * scale))
+        
+        # Time range
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=days_back)
+        time_interval = (start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d'))
+        return bbox, size, time_interval
+
+    def get_raw_bands(self, bbox_coords: tuple, resolution: int = 60, days_back: int = 5) -> dict:
+        """
+        Fetch raw B04/B08/B8A/B11/B12 reflectances (+ dataMask) as float32.
+
+        Args:
+            bbox_coords: (min_lon, min_lat, max_lon, max_lat)
+            resolution: Metres per pixel (default 60m)
+            days_back: Number of days to look back for imagery
+
+        Returns:
+            dict with 'bands' (H x W x 6 float32, order fire_index.BANDS),
+            'image' (SWIR false-color SatelliteImage) and 'metadata'
+        """
+        if not self.is_available():
+            return {"error": "Sentinel Hub not configured"}
+
+        try:
+            bbox, size, time_interval = self._request_geometry(bbox_coords, resolution, days_back)
+            cache_key = imagery_cache.make_key(bbox_coords, self.EVALSCRIPT_RAW_BANDS, time_interval, resolution, size)
+            bands = imagery_cache.get(cache_key)
+            cached = bands is not None
+
+            if not cached:
+                request = SentinelHubRequest(
+                    evalscript=self.EVALSCRIPT_RAW_BANDS,
+                    input_data=[
+                        SentinelHubRequest.input_data(
+                            data_collection=DataCollection.SENTINEL2_L2A,
+                            time_interval=time_interval,
+                            mosaicking_order='leastCC'
+                        )
+                    ],
+                    responses=[
+                        SentinelHubRequest.output_response('default', MimeType.TIFF)
+                    ],
+                    bbox=bbox,
+                    size=size,
+                    config=self.config
+                )
+                self.rate_limiter.acquire()
+                data = request.get_data()
+                if not data:
+                    return {"error": "No imagery available for this region/time"}
+                bands = np.asarray(data[0], dtype=np.float32)
+                imagery_cache.put(cache_key, bands)
+
+            return {
+                "success": True,
+                "bands": bands,
+                "image": SatelliteImage(array=fire_index.false_color(bands)),
+                "metadata": {
+                    "bbox": bbox_coords,
+                    "resolution": resolution,
+                    "size": size,
+                    "time_interval": time_interval,
+                    "acquired_at": datetime.now().isoformat(),
+                    "bands": list(fire_index.BANDS),
+                    "cached": cached
+                }
+            }
+
+        except Exception as e:
+            return {"error": str(e)}
+
+    def _generate_mock_bands(self, zone_name: str, size: int = None, bbox: tuple = None) -> dict:
+        """
+        Demo-mode band stack derived from the mock image: vegetation-like
+        reflectances everywhere, hot SWIR values on the mock fire spot.
+        """
+        mock = self._generate_mock_image(zone_name, size=size, bbox=bbox)
+        rgb = mock["image"].array
+        red = rgb[..., 0].astype(np.float32) / 255
+        green = rgb[..., 1].astype(np.float32) / 255
+
+        bands = np.empty(rgb.shape[:2] + (len(fire_index.BANDS),), dtype=np.float32)
+        bands[..., fire_index.B04] = 0.02 + 0.1 * red
+        bands[..., fire_index.B08] = 0.15 + 0.3 * green
+        bands[..., fire_index.B8A] = bands[..., fire_index.B08] * 0.95
+        bands[..., fire_index.B11] = 0.12 + 0.1 * red
+        bands[..., fire_index.B12] = 0.06 + 0.06 * red
+        bands[..., fire_index.DATA_MASK] = 1.0
+
+        fire = (rgb[..., 0] == 255) & (rgb[..., 2] == 0)
+        bands[fire, fire_index.B08] = 0.22
+        bands[fire, fire_index.B8A] = 0.2
+        bands[fire, fire_index.B11] = 0.4
+        bands[fire, fire_index.B12] = 0.8
+
+        mock["bands"] = bands
+        mock["image"] = SatelliteImage(array=fire_index.false_color(bands))
+        mock["metadata"]["bands"] = list(fire_index.BANDS)
+        return mock
+
     def get_satellite_image(
         self, 
         bbox_coords: tuple,
@@ -215,83 +424,74 @@ class SentinelService:
             days_back: Number of days to look back for imagery
             
         Returns:
-            dict with 'image' (numpy array), 'image_base64' (string), 'metadata'
+            dict with 'image' (SatelliteImage) and 'metadata'
         """
         if not self.is_available():
             return {"error": "Sentinel Hub not configured"}
         
         try:
-            bbox = BBox(bbox=bbox_coords, crs=CRS.WGS84)
-            size = bbox_to_dimensions(bbox, resolution=resolution)
-            
-            # Limit max size
-            max_dim = 1024
-            if size[0] > max_dim or size[1] > max_dim:
-                scale = max_dim / max(size)
-                size = (int(size[0] * scale), int(size[1] * scale))
-            
-            # Time range
-            end_date = datetime.now()
-            start_date = end_date - timedelta(days=days_back)
-            time_interval = (start_date.strftime('%Y-%m-%d'), end_date.strftime('%Y-%m-%d'))
+            bbox, size, time_interval = self._request_geometry(bbox_coords, resolution, days_back)
             
             evalscript = self.EVALSCRIPT_FIRE if use_fire_script else self.EVALSCRIPT_TRUE_COLOR
             
-            request = SentinelHubRequest(
-                evalscript=evalscript,
-                input_data=[
-                    SentinelHubRequest.input_data(
-                        data_collection=DataCollection.SENTINEL2_L2A,
-                        time_interval=time_interval,
-                        mosaicking_order='leastCC'  # Least cloud cover
-                    )
-                ],
-                responses=[
-                    SentinelHubRequest.output_response('default', MimeType.PNG)
-                ],
-                bbox=bbox,
-                size=size,
-                config=self.config
-            )
-            
-            # Execute request
-            images = request.get_data()
+            # Same request fingerprint -> read the stored array from disk
+            cache_key = imagery_cache.make_key(bbox_coords, evalscript, time_interval, resolution, size)
+            image_array = imagery_cache.get(cache_key)
+            cached = image_array is not None
+            image = SatelliteImage(array=image_array) if cached else None
+
+            if not cached:
+                request = SentinelHubRequest(
+                    evalscript=evalscript,
+                    input_data=[
+                        SentinelHubRequest.input_data(
+                            data_collection=DataCollection.SENTINEL2_L2A,
+                            time_interval=time_interval,
+                            mosaicking_order='leastCC'  # Least cloud cover
+                        )
+                    ],
+                    responses=[
+                        SentinelHubRequest.output_response('default', MimeType.PNG)
+                    ],
+                    bbox=bbox,
+                    size=size,
+                    config=self.config
+                )
+
+                # Execute request; keep the PNG exactly as delivered so it is
+                # never re-encoded for the image endpoint or alerts
+                self.rate_limiter.acquire()
+                responses = request.get_data(decode_data=False)
+                if not responses:
+                    return {"error": "No imagery available for this region/time"}
+                png = getattr(responses[0], "content", responses[0])
+                image = SatelliteImage(png=png)
+                imagery_cache.put(cache_key, image.array)
             
-            if images and len(images) > 0:
-                image_array = images[0]
-                
-                # Convert to base64 for API response
-                img = Image.fromarray(image_array.astype('uint8'))
-                buffer = io.BytesIO()
-                img.save(buffer, format='PNG')
-                import base64
-                image_base64 = base64.b64encode(buffer.getvalue()).decode('utf-8')
-                
-                return {
-                    "success": True,
-                    "image": image_array,
-                    "image_base64": image_base64,
-                    "metadata": {
-                        "bbox": bbox_coords,
-                        "resolution": resolution,
-                        "size": size,
-                        "time_interval": time_interval,
-                        "acquired_at": datetime.now().isoformat()
-                    }
+            return {
+                "success": True,
+                "image": image,
+                "metadata": {
+                    "bbox": bbox_coords,
+                    "resolution": resolution,
+                    "size": size,
+                    "time_interval": time_interval,
+                    "acquired_at": datetime.now().isoformat(),
+                    "cached": cached
                 }
-            else:
-                return {"error": "No imagery available for this region/time"}
+            }
                 
         except Exception as e:
             return {"error": str(e)}
     
-    def scan_zone(self, zone_name: str, use_fire_script: bool = True) -> dict:
+    def scan_zone(self, zone_name: str, use_fire_script: bool = True, raw_bands: bool = False) -> dict:
         """
         Scan a predefined zone for satellite imagery.
         
         Args:
             zone_name: Name of the zone (e.g., "North", "Rif", etc.)
             use_fire_script: Use fire detection evalscript
+            raw_bands: Fetch float32 reflectances for fire_index instead of an image
             
         Returns:
             dict with image data and metadata
@@ -305,37 +505,152 @@ class SentinelService:
         # Use demo mode if not properly initialized
         if self.demo_mode or not self.initialized:
             print(f"📍 Using DEMO mode for zone: {zone_name}")
-            return self._generate_mock_image(zone_name)
         
-        # Try real API
-        result = self.get_satellite_image(
-            bbox_coords=zone["bbox"],
-            use_fire_script=use_fire_script
-        )
+        return self.scan_bbox(zone["name"], zone["bbox"], use_fire_script, raw_bands=raw_bands)
+
+    def scan_bbox(self, name: str, bbox: tuple, use_fire_script: bool = True,
+                  resolution: int = 60, size: int = None, raw_bands: bool = False) -> dict:
+        """
+        Fetch imagery for an arbitrary bounding box (e.g. a grid tile).
+
+        Args:
+            name: Label for the result and demo-mode seed
+            bbox: (min_lon, min_lat, max_lon, max_lat)
+            use_fire_script: Use fire detection evalscript
+            resolution: Metres per pixel
+            size: Demo-mode image side in pixels
+            raw_bands: Fetch float32 reflectances (get_raw_bands) instead of an image
+
+        Returns:
+            dict with image data (and 'bands' when raw_bands) and metadata
+        """
+        if self.demo_mode or not self.initialized:
+            mock = self._generate_mock_bands if raw_bands else self._generate_mock_image
+            return mock(name, size=size, bbox=bbox)
+
+        if raw_bands:
+            result = self.get_raw_bands(bbox_coords=bbox, resolution=resolution)
+        else:
+            result = self.get_satellite_image(
+                bbox_coords=bbox,
+                resolution=resolution,
+                use_fire_script=use_fire_script
+            )
         
-        # If API fails, fallback to demo mode
+        # Never substitute mock imagery for a failed live request: random mock
+        # fire pixels would raise real alerts. Callers count the zone/tile as failed.
         if "error" in result:
-            print(f"⚠️ API error for {zone_name}: {result['error']}. Falling back to demo mode.")
-            return self._generate_mock_image(zone_name)
+            print(f"⚠️ API error for {name}: {result['error']}")
+            result["zone_name"] = name
+            return result
         
-        result["zone_name"] = zone["name"]
+        result["zone_name"] = name
         return result
+
+    def make_tile_grid(self, bounds: dict = None, tile_px: int = None, resolution: int = None) -> dict:
+        """
+        Split an area of interest into a regular grid of equal-sized tiles.
+
+        Tiles are tile_px pixels at `resolution` metres per pixel; the degree
+        steps are computed at the area's mid-latitude so every tile is one
+        request of the same size. Row 0 is the northernmost row.
+
+        Args:
+            bounds: Dict with lat_min/lat_max/lon_min/lon_max (default MOROCCO_BOUNDS)
+            tile_px: Tile side in pixels (default GRID_TILE_PIXELS, max MAX_IMAGE_DIM)
+            resolution: Metres per pixel (default GRID_RESOLUTION)
+
+        Returns:
+            dict with grid geometry and the list of tile dicts (name, row, col, bbox)
+        """
+        bounds = bounds or self.MOROCCO_BOUNDS
+        tile_px = min(tile_px or self.GRID_TILE_PIXELS, self.MAX_IMAGE_DIM)
+        resolution = resolution or self.GRID_RESOLUTION
+
+        tile_m = tile_px * resolution
+        mid_lat = math.radians((bounds["lat_min"] + bounds["lat_max"]) / 2)
+        lat_step = tile_m / 111_320
+        lon_step = tile_m / (111_320 * math.cos(mid_lat))
+        rows = math.ceil((bounds["lat_max"] - bounds["lat_min"]) / lat_step)
+        cols = math.ceil((bounds["lon_max"] - bounds["lon_min"]) / lon_step)
+
+        tiles = []
+        for row in range(rows):
+            north = bounds["lat_max"] - row * lat_step
+            for col in range(cols):
+                west = bounds["lon_min"] + col * lon_step
+                tiles.append({
+                    "name": f"R{row:02d}C{col:02d}",
+                    "row": row,
+                    "col": col,
+                    "bbox": (round(west, 6), round(north - lat_step, 6),
+                             round(west + lon_step, 6), round(north, 6)),
+                    "resolution": resolution,
+                    "size": tile_px
+                })
+
+        return {
+            "bounds": bounds,
+            "rows": rows,
+            "cols": cols,
+            "tile_px": tile_px,
+            "resolution": resolution,
+            "lat_step": lat_step,
+            "lon_step": lon_step,
+            "tiles": tiles
+        }
     
+    def iter_zone_scans(self, use_fire_script: bool = True, zones: list = None, workers: int = None,
+                        raw_bands: bool = False):
+        """
+        Fetch zones concurrently and yield each one as soon as it is ready.
+
+        Requests go through a bounded thread pool (SCAN_WORKERS) and the
+        shared token-bucket rate limiter (SENTINEL_RATE_PER_SEC).
+
+        Args:
+            use_fire_script: Use fire detection evalscript
+            zones: Zone dicts to scan (default SCAN_ZONES), or grid tiles
+                from make_tile_grid
+            workers: Concurrent fetches (default SCAN_WORKERS)
+            raw_bands: Fetch float32 reflectances instead of images
+
+        Yields:
+            (index, zone, result) in completion order; index is the zone's
+            position so callers can restore a deterministic order
+        """
+        zones = zones if zones is not None else self.SCAN_ZONES
+        with ThreadPoolExecutor(max_workers=workers or self.SCAN_WORKERS, thread_name_prefix="zone-scan") as pool:
+            futures = {}
+            for index, zone in enumerate(zones):
+                if "resolution" in zone:  # grid tile
+                    future = pool.submit(self.scan_bbox, zone["name"], zone["bbox"], use_fire_script,
+                                         zone["resolution"], zone["size"], raw_bands)
+                else:
+                    future = pool.submit(self.scan_zone, zone["name"], use_fire_script, raw_bands)
+                futures[future] = (index, zone)
+            for future in as_completed(futures):
+                index, zone = futures[future]
+                try:
+                    result = future.result()
+                except Exception as e:
+                    result = {"error": str(e)}
+                yield index, zone, result
+
     def scan_all_zones(self, use_fire_script: bool = True) -> list:
         """
-        Scan all predefined zones.
+        Scan all predefined zones (concurrently).
         
         Returns:
-            List of results for each zone
+            List of results for each zone, in SCAN_ZONES order
         """
-        results = []
-        for zone in self.SCAN_ZONES:
-            result = self.scan_zone(zone["name"], use_fire_script)
-            results.append({
+        results = [None] * len(self.SCAN_ZONES)
+        for index, zone, result in self.iter_zone_scans(use_fire_script):
+            results[index] = {
                 "zone": zone["name"],
                 "bbox": zone["bbox"],
                 "result": result
-            })
+            }
         return results
     
     def get_image_for_prediction(self, bbox_coords: tuple) -> Image.Image | None:
@@ -353,8 +668,7 @@ class SentinelService:
         if "error" in result:
             return None
         
-        image_array = result["image"]
-        img = Image.fromarray(image_array.astype('uint8'))
+        img = Image.fromarray(result["image"].array)
         img = img.resize((224, 224))
         
         return img
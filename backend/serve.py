@@ -0,0 +1,189 @@
+"""
+Production server entry point.
+Preloads models in a parent process, then forks worker processes that
+share the loaded weights copy-on-write and serve requests on one socket.
+
+Usage:
+    python serve.py
+
+Configuration (.env):
+    HOST / PORT          Bind address (default 0.0.0.0:8000)
+    WEB_CONCURRENCY      Number of worker processes (default: CPU count)
+    WORKER_THREADS       Threads per worker for TF, torch and OpenCV
+                         (default: CPU count / workers, at least 1)
+    WORKER_RESTART_MAX_DELAY
+                         Longest wait before restarting a worker that keeps
+                         crashing on startup, in seconds (default 60)
+
+Workers share no memory. Satellite monitoring and video jobs keep their
+state in SHARED_STATE_DIR / VIDEO_JOBS_DIR so any worker can answer; live
+video (webcam feed, camera streams) runs per process and therefore needs a
+single worker: it is forced when STREAM_SOURCES is set, and otherwise the
+live video endpoints answer 503 while WEB_CONCURRENCY > 1.
+"""
+
+import os
+import sys
+import gc
+import time
+import signal
+import socket
+from dotenv import load_dotenv
+
+load_dotenv()
+
+HOST = os.getenv("HOST", "0.0.0.0")
+PORT = int(os.getenv("PORT", "8000"))
+CPU_COUNT = os.cpu_count() or 1
+WORKERS = max(1, int(os.getenv("WEB_CONCURRENCY", str(CPU_COUNT))))
+if WORKERS > 1 and os.getenv("STREAM_SOURCES"):
+    # Each worker would open every configured camera and run its own pipeline
+    print(f"⚠️ STREAM_SOURCES is set: serving with 1 worker instead of {WORKERS}")
+    WORKERS = 1
+# Read by main to disable the per-process live video endpoints under several workers
+os.environ["SERVE_WORKERS"] = str(WORKERS)
+WORKER_THREADS = max(1, int(os.getenv("WORKER_THREADS", str(max(1, CPU_COUNT // WORKERS)))))
+WORKER_RESTART_MAX_DELAY = float(os.getenv("WORKER_RESTART_MAX_DELAY", "60"))
+# A worker that dies sooner than this after starting counts as a crash loop
+WORKER_MIN_UPTIME = 10.0
+
+# Native thread pools read these when the libraries are first imported,
+# so they must be set before main (and therefore torch/OpenCV) is imported.
+for _var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS",
+             "TF_NUM_INTRAOP_THREADS"):
+    os.environ.setdefault(_var, str(WORKER_THREADS))
+os.environ.setdefault("TF_NUM_INTEROP_THREADS", "1")
+
+
+def configure_worker_threads(threads: int):
+    """Apply the per-worker thread budget to OpenCV, torch and TensorFlow."""
+    import cv2
+    cv2.setNumThreads(threads)
+
+    if "torch" in sys.modules:
+        import torch
+        torch.set_num_threads(threads)
+
+    if "tensorflow" in sys.modules:
+        import tensorflow as tf
+        try:
+            tf.config.threading.set_intra_op_parallelism_threads(threads)
+            tf.config.threading.set_inter_op_parallelism_threads(1)
+        except RuntimeError:
+            # TF runtime already initialized - env vars above still apply
+            pass
+
+
+def preload():
+    """Import the app and load fork-safe models once in the parent process."""
+    import main
+    from model_manager import model_manager
+
+    # Load only: a warm-up inference would start torch/OpenMP thread pools in
+    # the parent, which forked children inherit in a broken state. Each worker
+    # warms up its own copy (MODEL_WARMUP) after the fork.
+    start = time.perf_counter()
+    model_manager.load_all(warmup=False, fork_safe_only=True)
+    print(f"📦 Preloaded models in {time.perf_counter() - start:.1f}s: "
+          f"{[n for n, s in model_manager.get_status().items() if s['ready']]}")
+
+    # Import TensorFlow (library only, no runtime) so its code pages are shared too
+    try:
+        import tensorflow  # noqa: F401
+    except ImportError:
+        pass
+
+    # Move everything allocated so far out of the GC's reach: collections in the
+    # workers would otherwise touch (and copy) every page holding model objects.
+    gc.collect()
+    gc.freeze()
+    return main.app
+
+
+def run_worker(app, sock: socket.socket):
+    """Serve requests on the shared socket (runs in the forked child)."""
+    import uvicorn
+
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    configure_worker_threads(WORKER_THREADS)
+
+    config = uvicorn.Config(app, host=HOST, port=PORT, workers=1, log_level="info")
+    server = uvicorn.Server(config)
+    server.run(sockets=[sock])
+
+
+def spawn_worker(app, sock: socket.socket) -> int:
+    """Fork one worker process and return its pid."""
+    pid = os.fork()
+    if pid == 0:
+        try:
+            run_worker(app, sock)
+        finally:
+            os._exit(0)
+    print(f"👷 Worker {pid} started ({WORKER_THREADS} thread(s))")
+    return pid
+
+
+def serve():
+    """Preload, bind, fork workers and supervise them until stopped."""
+    if not hasattr(os, "fork"):
+        # No fork() (Windows): fall back to uvicorn's own process manager
+        import uvicorn
+        uvicorn.run("main:app", host=HOST, port=PORT, workers=WORKERS)
+        return
+
+    app = preload()
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((HOST, PORT))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    print(f"🚀 Serving on http://{HOST}:{PORT} with {WORKERS} worker(s)")
+
+    workers = {}  # pid -> start time
+    for _ in range(WORKERS):
+        workers[spawn_worker(app, sock)] = time.monotonic()
+    stopping = False
+    crashes = 0  # consecutive workers that died shortly after starting
+
+    def _stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, _stop)
+    signal.signal(signal.SIGTERM, _stop)
+
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        started = workers.pop(pid, None)
+        if stopping:
+            continue
+        # Back off exponentially while workers keep dying right after startup
+        # (e.g. a model that fails to load), instead of fork-looping at full speed
+        crashes = crashes + 1 if started and time.monotonic() - started < WORKER_MIN_UPTIME else 0
+        delay = min(WORKER_RESTART_MAX_DELAY, 2 ** (crashes - 1)) if crashes else 0
+        print(f"⚠️ Worker {pid} exited (status {status}), restarting" + (f" in {delay:.0f}s" if delay else ""))
+        deadline = time.monotonic() + delay
+        while not stopping and time.monotonic() < deadline:
+            time.sleep(0.2)
+        if not stopping:
+            workers[spawn_worker(app, sock)] = time.monotonic()
+
+    sock.close()
+    print("✅ All workers stopped")
+
+
+if __name__ == "__main__":
+    serve()
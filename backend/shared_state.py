@@ -0,0 +1,113 @@
+"""
+Process-shared state on disk.
+
+serve.py forks several workers, each with its own memory, and a follow-up
+request can land on any of them. State that must be visible to every
+worker (scan images, job status, ...) is kept under SHARED_STATE_DIR
+instead: files are replaced atomically so readers never see partial
+writes, and ProcessLock gives single-flight work across processes.
+"""
+
+import os
+import json
+from threading import Lock
+from dotenv import load_dotenv
+
+load_dotenv()
+
+SHARED_STATE_DIR = os.getenv("SHARED_STATE_DIR", "shared_state")
+
+
+def process_alive(pid: int) -> bool:
+    """Whether a process with this pid is running (used to spot state left by dead workers)."""
+    if pid == os.getpid():
+        return True
+    if os.name == "nt":
+        import ctypes
+        handle = ctypes.windll.kernel32.OpenProcess(0x1000, False, pid)  # PROCESS_QUERY_LIMITED_INFORMATION
+        if not handle:
+            return False
+        ctypes.windll.kernel32.CloseHandle(handle)
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def write_bytes(path: str, data: bytes):
+    """Replace a file atomically (write a temporary file, then rename it over the target)."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def read_bytes(path: str):
+    """File content, or None if it does not exist."""
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def write_json(path: str, data):
+    write_bytes(path, json.dumps(data).encode("utf-8"))
+
+
+def read_json(path: str):
+    """Parsed JSON file, or None if it does not exist."""
+    data = read_bytes(path)
+    return json.loads(data) if data is not None else None
+
+
+class ProcessLock:
+    """
+    Non-blocking lock shared by all worker processes.
+
+    Backed by an OS file lock, so it is released automatically when the
+    holding process dies. Also exclusive between threads of one process.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = Lock()
+        self._fd = None
+
+    def acquire(self) -> bool:
+        """Take the lock if it is free; returns False instead of waiting."""
+        if not self._lock.acquire(blocking=False):
+            return False
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT)
+        try:
+            if os.name == "nt":
+                import msvcrt
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            self._lock.release()
+            return False
+        self._fd = fd
+        return True
+
+    def release(self):
+        fd, self._fd = self._fd, None
+        if os.name == "nt":
+            import msvcrt
+            msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        os.close(fd)  # closing the file drops the flock
+        self._lock.release()
+
+    def is_locked(self) -> bool:
+        """Whether any process currently holds the lock."""
+        if not self.acquire():
+            return True
+        self.release()
+        return False
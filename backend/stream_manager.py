@@ -0,0 +1,438 @@
+"""
+Stream Manager for multi-camera fire detection.
+Decodes every registered camera (RTSP, HTTP or video file) on its own thread
+and runs YOLO on the latest frames of all cameras in one batched call per tick.
+
+Sources can be registered from the STREAM_SOURCES environment variable
+(JSON list or path to a JSON file) or through the /api/streams endpoints:
+
+    [{"id": "tower-1", "url": "rtsp://10.0.0.5/stream1"},
+     {"id": "demo", "url": "videos/demo.mp4", "loop": true}]
+
+The API only accepts webcam indices and rtsp/http(s) URLs whose host is
+listed in STREAM_ALLOWED_HOSTS (hostnames, IPs or CIDR ranges), so a client
+cannot make the server open local files or arbitrary network addresses.
+"""
+
+import os
+import json
+import time
+import ipaddress
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from threading import Event, Lock, Thread
+from urllib.parse import urlsplit
+
+import cv2
+from dotenv import load_dotenv
+
+from stream_pipeline import LatestFrameBuffer, StageStats
+from frame_gate import create_frame_gate
+from yolo_service import yolo_service
+
+load_dotenv()
+
+STREAM_URL_SCHEMES = ("rtsp", "rtsps", "http", "https")
+STREAM_ALLOWED_HOSTS = [h.strip().lower() for h in os.getenv("STREAM_ALLOWED_HOSTS", "").split(",") if h.strip()]
+
+
+def _host_allowed(host: str, allowed_hosts) -> bool:
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        address = None
+    for entry in allowed_hosts:
+        if address is not None and "/" in entry:
+            try:
+                if address in ipaddress.ip_network(entry, strict=False):
+                    return True
+            except ValueError:
+                continue
+        elif host == entry:
+            return True
+    return False
+
+
+def check_source_url(url: str, allowed_hosts=None):
+    """
+    Validate a camera source registered through the API.
+
+    Args:
+        url: Webcam index, or rtsp/rtsps/http/https URL
+        allowed_hosts: Hostnames, IPs or CIDR ranges (default STREAM_ALLOWED_HOSTS)
+
+    Returns:
+        None if the source is allowed, otherwise the reason it is rejected
+    """
+    allowed_hosts = STREAM_ALLOWED_HOSTS if allowed_hosts is None else allowed_hosts
+    if url.isdigit():
+        return None
+    parts = urlsplit(url)
+    if parts.scheme.lower() not in STREAM_URL_SCHEMES:
+        return f"Source must be a webcam index or a {'/'.join(STREAM_URL_SCHEMES)} URL"
+    host = (parts.hostname or "").lower()
+    if not host or not _host_allowed(host, allowed_hosts):
+        return f"Host '{host}' is not in STREAM_ALLOWED_HOSTS"
+    return None
+
+
+class StreamSource:
+    """One camera: decode thread, latest-frame slot, annotated output and detection feed."""
+
+    RECONNECT_DELAY = 2.0  # seconds before reopening a dropped network stream
+
+    def __init__(self, stream_id: str, url: str, loop: bool = False, on_frame=None):
+        """
+        Args:
+            stream_id: Unique camera identifier
+            url: RTSP/HTTP URL, local video file path, or webcam index
+            loop: Restart file sources at the end (fake cameras for testing)
+            on_frame: Callback invoked after each decoded frame
+        """
+        self.id = stream_id
+        self.url = int(url) if isinstance(url, str) and url.isdigit() else url
+        self.is_file = isinstance(self.url, str) and os.path.isfile(self.url)
+        self.loop = loop
+        self.on_frame = on_frame
+
+        self.captured = LatestFrameBuffer()
+        self.encoded = LatestFrameBuffer()
+        self.detections = deque(maxlen=100)  # recent frames with fire/smoke
+        self.latest = None                   # summary of the last inferred frame
+        self.last_detection = None
+
+        # Optional pre-inference gating (FRAME_GATE); skipped frames reuse last_detection
+        self.gate = create_frame_gate()
+        self.gate_skipped = 0
+
+        self.last_inferred_seq = 0
+        self.last_served = 0.0
+        self.encoding = False
+        self.stats = {
+            "decode": StageStats(),
+            "inference": StageStats(),
+            "encode": StageStats()
+        }
+        self.render_skipped = 0
+        self._stop = Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = Thread(target=self._decode_loop, name=f"stream-{self.id}", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _open(self):
+        cap = cv2.VideoCapture(self.url)
+        if cap.isOpened() and not self.is_file:
+            cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        return cap
+
+    def _decode_loop(self):
+        cap = self._open()
+        # Files are paced at their native frame rate so they behave like live cameras
+        fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+        frame_interval = 1.0 / fps if self.is_file else 0.0
+        next_frame_at = time.perf_counter()
+
+        try:
+            while not self._stop.is_set():
+                start = time.perf_counter()
+                success, frame = cap.read() if cap.isOpened() else (False, None)
+
+                if not success:
+                    if self.is_file and self.loop:
+                        cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                        continue
+                    if self.is_file:
+                        break
+                    # Network camera dropped: reconnect until stopped
+                    print(f"⚠️ Stream {self.id} lost, reconnecting...")
+                    cap.release()
+                    if self._stop.wait(self.RECONNECT_DELAY):
+                        break
+                    cap = self._open()
+                    continue
+
+                self.stats["decode"].record(time.perf_counter() - start)
+                self.captured.put(frame)
+                if self.on_frame:
+                    self.on_frame()
+
+                if frame_interval:
+                    next_frame_at += frame_interval
+                    delay = next_frame_at - time.perf_counter()
+                    if delay > 0:
+                        self._stop.wait(delay)
+                    else:
+                        next_frame_at = time.perf_counter()
+        finally:
+            cap.release()
+            self.captured.close()
+            self.encoded.close()
+
+    def stream(self):
+        """Yield the freshest annotated frames as multipart MJPEG chunks."""
+        seq = 0
+        while True:
+            seq, frame_bytes = self.encoded.get(seq, timeout=1.0)
+            if frame_bytes is None:
+                if self.encoded.closed:
+                    return
+                continue
+            yield (b'--frame\r\n'
+                   b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
+
+    def record_detection(self, seq: int, detection):
+        """Store the detection summary for the feed."""
+        self.last_detection = detection
+        if detection is None:
+            return
+        entry = {
+            "timestamp": datetime.now().isoformat(),
+            "frame": seq,
+            "fire_detected": detection["fire_detected"],
+            "smoke_detected": detection["smoke_detected"],
+            "detections": detection["boxes"].to_list(precision=4)
+        }
+        self.latest = entry
+        if entry["detections"]:
+            self.detections.append(entry)
+
+    def get_info(self) -> dict:
+        return {
+            "id": self.id,
+            "url": str(self.url),
+            "loop": self.loop,
+            "running": self.running,
+            "stages": {name: stats.to_dict() for name, stats in self.stats.items()},
+            "dropped": {
+                "before_inference": self.captured.dropped,
+                "before_encode": self.render_skipped,
+                "gated": self.gate_skipped
+            },
+            "latest": self.latest
+        }
+
+
+class StreamManager:
+    """Registers camera sources and runs cross-camera batched inference."""
+
+    ERROR_BACKOFF = 1.0  # seconds to wait after a failed batch
+
+    def __init__(self, detect_batch, render, on_fire=None, max_batch: int = 8, encode_workers: int = 4):
+        """
+        Args:
+            detect_batch: Callable(list of frames) -> list of detection dicts
+            render: Callable(frame, detection) -> JPEG bytes
+            on_fire: Optional callback(stream_id) when a frame contains fire
+            max_batch: Maximum frames per inference call
+            encode_workers: Threads used to draw and encode annotated frames
+        """
+        self.detect_batch = detect_batch
+        self.render = render
+        self.on_fire = on_fire
+        self.max_batch = max_batch
+
+        self.sources = {}
+        self._lock = Lock()
+        self._frame_ready = Event()
+        self._stop = Event()
+        self._thread = None
+        self._encode_pool = ThreadPoolExecutor(max_workers=encode_workers, thread_name_prefix="stream-encode")
+
+        self.batch_stats = StageStats()
+        self.batch_sizes = deque(maxlen=100)
+        self.errors = 0  # failed batches
+
+    def add_source(self, stream_id: str, url: str, loop: bool = False) -> dict:
+        """Register and start decoding a camera source."""
+        with self._lock:
+            if stream_id in self.sources:
+                return {"success": False, "error": f"Stream '{stream_id}' already registered"}
+            source = StreamSource(stream_id, url, loop=loop, on_frame=self._frame_ready.set)
+            self.sources[stream_id] = source
+        source.start()
+        self._ensure_running()
+        print(f"📹 Stream '{stream_id}' registered: {url}")
+        return {"success": True, "stream": source.get_info()}
+
+    def remove_source(self, stream_id: str) -> dict:
+        """Stop and unregister a camera source."""
+        with self._lock:
+            source = self.sources.pop(stream_id, None)
+        if source is None:
+            return {"success": False, "error": f"Stream '{stream_id}' not found"}
+        source.stop()
+        return {"success": True, "message": f"Stream '{stream_id}' removed"}
+
+    def get_source(self, stream_id: str):
+        return self.sources.get(stream_id)
+
+    def load_config(self, config: str = None) -> int:
+        """
+        Register sources from a JSON list or a path to a JSON file.
+
+        Returns:
+            Number of sources registered
+        """
+        config = config if config is not None else os.getenv("STREAM_SOURCES", "")
+        if not config:
+            return 0
+        try:
+            if os.path.isfile(config):
+                with open(config) as f:
+                    entries = json.load(f)
+            else:
+                entries = json.loads(config)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Invalid STREAM_SOURCES config: {e}")
+            return 0
+
+        count = 0
+        for entry in entries:
+            if self.add_source(str(entry["id"]), str(entry["url"]), loop=entry.get("loop", False))["success"]:
+                count += 1
+        return count
+
+    def _ensure_running(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = Thread(target=self._inference_loop, name="stream-inference", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop inference and all sources."""
+        self._stop.set()
+        self._frame_ready.set()
+        with self._lock:
+            sources = list(self.sources.values())
+            self.sources.clear()
+        for source in sources:
+            source.stop()
+
+    def _next_batch(self):
+        """
+        Pick the sources to serve this tick.
+
+        Only sources with an unseen frame are eligible; the ones served least
+        recently go first, so every camera gets a turn when the combined
+        frame rate exceeds what the model can process.
+        """
+        with self._lock:
+            sources = list(self.sources.values())
+
+        # Frames are only read from the sources that get served, so frames of the
+        # others stay unread (and count as dropped only if really overwritten)
+        eligible = [source for source in sources if source.captured.seq > source.last_inferred_seq]
+        eligible.sort(key=lambda source: source.last_served)
+
+        batch = []
+        for source in eligible:
+            if len(batch) >= self.max_batch:
+                break
+            seq, frame = source.captured.get(source.last_inferred_seq, timeout=0)
+            if frame is None:
+                continue
+            if source.gate is not None and source.last_detection is not None:
+                needs_inference, _ = source.gate.should_infer(frame)
+                if not needs_inference:
+                    # Nothing worth running YOLO on: show the frame with the previous boxes
+                    source.last_inferred_seq = seq
+                    source.gate_skipped += 1
+                    self._submit_render(source, frame, source.last_detection)
+                    continue
+            batch.append((source, seq, frame))
+        return batch
+
+    def _inference_loop(self):
+        while not self._stop.is_set():
+            batch = self._next_batch()
+            if not batch:
+                self._frame_ready.wait(timeout=0.1)
+                self._frame_ready.clear()
+                continue
+
+            # One failing batch (model, alert or render error) must not stop
+            # the only inference thread for every camera
+            try:
+                self._process_batch(batch)
+            except Exception as e:
+                self.errors += 1
+                print(f"❌ Stream inference failed for {[source.id for source, _, _ in batch]}: {e}")
+                self._stop.wait(self.ERROR_BACKOFF)
+
+    def _process_batch(self, batch):
+        start = time.perf_counter()
+        detections = self.detect_batch([frame for _, _, frame in batch])
+        elapsed = time.perf_counter() - start
+        self.batch_stats.record(elapsed)
+        self.batch_sizes.append(len(batch))
+
+        now = time.time()
+        for (source, seq, frame), detection in zip(batch, detections):
+            source.last_inferred_seq = seq
+            source.last_served = now
+            # Each camera in the batch shares the batch latency
+            source.stats["inference"].record(elapsed)
+            source.record_detection(seq, detection)
+
+            if detection and detection["fire_detected"] and self.on_fire:
+                self.on_fire(source.id)
+
+            self._submit_render(source, frame, detection)
+
+    def _submit_render(self, source: StreamSource, frame, detection):
+        """Draw and encode on the pool, dropping the frame if the source is still busy."""
+        if source.encoding:
+            source.render_skipped += 1
+            return
+        source.encoding = True
+        self._encode_pool.submit(self._encode, source, frame, detection)
+
+    def _encode(self, source: StreamSource, frame, detection):
+        try:
+            start = time.perf_counter()
+            frame_bytes = self.render(frame, detection)
+            source.stats["encode"].record(time.perf_counter() - start)
+            if frame_bytes is not None:
+                source.encoded.put(frame_bytes)
+        finally:
+            source.encoding = False
+
+    def get_status(self) -> dict:
+        """Get per-stream stats and batch scheduling metrics."""
+        with self._lock:
+            sources = list(self.sources.values())
+        return {
+            "running": self._thread is not None and self._thread.is_alive(),
+            "max_batch": self.max_batch,
+            "errors": self.errors,
+            "batch": {
+                **self.batch_stats.to_dict(),
+                "avg_size": round(sum(self.batch_sizes) / len(self.batch_sizes), 2) if self.batch_sizes else 0
+            },
+            "streams": [source.get_info() for source in sources]
+        }
+
+
+def _alert_fire(stream_id: str):
+    yolo_service.send_telegram_alert(f"🔥 FIRE DETECTED on camera {stream_id}! Immediate action required.",
+                                     source=f"camera:{stream_id}")
+
+
+# Singleton instance
+stream_manager = StreamManager(
+    yolo_service.detect_batch,
+    yolo_service.render_stream_frame,
+    on_fire=_alert_fire,
+    max_batch=int(os.getenv("STREAM_MAX_BATCH", "8"))
+)
@@ -0,0 +1,230 @@
+"""
+Threaded streaming pipeline for live video detection.
+Capture, inference and encode run as separate stages connected by
+size-1 "latest frame wins" buffers, so stale frames are dropped instead
+of queued and the stream always shows the freshest frame.
+"""
+
+import time
+from threading import Condition, Event, Thread, Lock
+
+
+class LatestFrameBuffer:
+    """
+    Single-slot buffer between two pipeline stages.
+
+    Writers overwrite the slot; readers wait for an item newer than the last
+    one they saw. Several readers can follow the same buffer.
+    """
+
+    def __init__(self):
+        self._cond = Condition()
+        self._item = None
+        self._seq = 0
+        self._read = True
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, item):
+        """Publish an item, replacing any item nobody has read yet."""
+        with self._cond:
+            if not self._read:
+                self.dropped += 1
+            self._item = item
+            self._seq += 1
+            self._read = False
+            self._cond.notify_all()
+
+    def get(self, last_seq: int = 0, timeout: float = None):
+        """
+        Wait for an item newer than last_seq.
+
+        Returns:
+            (seq, item), or (last_seq, None) on timeout or once the buffer is closed
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._seq > last_seq or self._closed, timeout):
+                return last_seq, None
+            if self._seq <= last_seq:
+                return last_seq, None
+            self._read = True
+            return self._seq, self._item
+
+    @property
+    def seq(self) -> int:
+        """Sequence number of the newest item (checking it does not count as a read)."""
+        return self._seq
+
+    def close(self):
+        """Wake up all readers; no further items will arrive."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+
+class StageStats:
+    """Rolling timing statistics for one pipeline stage."""
+
+    def __init__(self, smoothing: float = 0.1):
+        self._lock = Lock()
+        self.smoothing = smoothing
+        self.count = 0
+        self.last_ms = 0.0
+        self.avg_ms = 0.0
+        self._started = None
+
+    def record(self, elapsed_s: float):
+        with self._lock:
+            if self._started is None:
+                self._started = time.perf_counter() - elapsed_s
+            ms = elapsed_s * 1000
+            self.last_ms = ms
+            self.avg_ms = ms if self.count == 0 else (1 - self.smoothing) * self.avg_ms + self.smoothing * ms
+            self.count += 1
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            elapsed = time.perf_counter() - self._started if self._started else 0
+            return {
+                "frames": self.count,
+                "last_ms": round(self.last_ms, 2),
+                "avg_ms": round(self.avg_ms, 2),
+                "fps": round(self.count / elapsed, 2) if elapsed > 0 else 0.0
+            }
+
+
+class StreamPipeline:
+    """Capture -> inference -> encode pipeline running on three threads."""
+
+    def __init__(self, open_capture, detect, render, name: str = "stream"):
+        """
+        Args:
+            open_capture: Callable returning an opened cv2.VideoCapture (or None)
+            detect: Callable(frame) -> detection info, run on the inference thread
+            render: Callable(frame, detection info) -> encoded bytes, run on the encode thread
+            name: Label used in logs and stats
+        """
+        self.open_capture = open_capture
+        self.detect = detect
+        self.render = render
+        self.name = name
+
+        self.captured = LatestFrameBuffer()
+        self.inferred = LatestFrameBuffer()
+        self.encoded = LatestFrameBuffer()
+
+        self.stats = {
+            "capture": StageStats(),
+            "inference": StageStats(),
+            "encode": StageStats()
+        }
+        self._stop = Event()
+        self._threads = []
+        self.started_at = None
+
+    def start(self) -> bool:
+        """Open the source and start all stages. Returns False if the source cannot be opened."""
+        cap = self.open_capture()
+        if cap is None or not cap.isOpened():
+            print(f"❌ Could not open source for {self.name}")
+            self.encoded.close()
+            return False
+
+        self.started_at = time.time()
+        self._threads = [
+            Thread(target=self._capture_loop, args=(cap,), name=f"{self.name}-capture", daemon=True),
+            Thread(target=self._inference_loop, name=f"{self.name}-inference", daemon=True),
+            Thread(target=self._encode_loop, name=f"{self.name}-encode", daemon=True)
+        ]
+        for thread in self._threads:
+            thread.start()
+        return True
+
+    def stop(self):
+        """Stop all stages and release the source."""
+        self._stop.set()
+        self.captured.close()
+
+    @property
+    def running(self) -> bool:
+        return not self.encoded.closed
+
+    def _capture_loop(self, cap):
+        try:
+            while not self._stop.is_set():
+                start = time.perf_counter()
+                success, frame = cap.read()
+                if not success:
+                    break
+                self.stats["capture"].record(time.perf_counter() - start)
+                self.captured.put(frame)
+        finally:
+            cap.release()
+            self.captured.close()
+
+    def _inference_loop(self):
+        seq = 0
+        try:
+            while not self._stop.is_set():
+                seq, frame = self.captured.get(seq, timeout=1.0)
+                if frame is None:
+                    if self.captured.closed:
+                        break
+                    continue
+                start = time.perf_counter()
+                info = self.detect(frame)
+                self.stats["inference"].record(time.perf_counter() - start)
+                self.inferred.put((frame, info))
+        finally:
+            self.inferred.close()
+
+    def _encode_loop(self):
+        seq = 0
+        try:
+            while not self._stop.is_set():
+                seq, item = self.inferred.get(seq, timeout=1.0)
+                if item is None:
+                    if self.inferred.closed:
+                        break
+                    continue
+                start = time.perf_counter()
+                frame_bytes = self.render(*item)
+                self.stats["encode"].record(time.perf_counter() - start)
+                if frame_bytes is not None:
+                    self.encoded.put(frame_bytes)
+        finally:
+            self.encoded.close()
+
+    def stream(self):
+        """Yield the freshest encoded frames as multipart MJPEG chunks."""
+        seq = 0
+        while True:
+            seq, frame_bytes = self.encoded.get(seq, timeout=1.0)
+            if frame_bytes is None:
+                if self.encoded.closed:
+                    return
+                continue
+            yield (b'--frame\r\n'
+                   b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
+
+    def get_stats(self) -> dict:
+        """Get per-stage timings and dropped-frame counts."""
+        stats = {
+            "name": self.name,
+            "running": self.running,
+            "started_at": self.started_at,
+            "stages": {name: stats.to_dict() for name, stats in self.stats.items()},
+            "dropped": {
+                "before_inference": self.captured.dropped,
+                "before_encode": self.inferred.dropped,
+                "before_output": self.encoded.dropped
+            }
+        }
+        # Detectors with their own metrics (e.g. detector-plus-tracker mode)
+        if hasattr(self.detect, "get_stats"):
+            stats["detector"] = self.detect.get_stats()
+        return stats
@@ -0,0 +1,50 @@
+import numpy as np
+
+from change_gate import ChangeGate
+
+BBOX = (-6.0, 34.0, -4.0, 35.5)
+
+
+def scene(seed, size=1024):
+    """Vegetation-like texture; a new seed only changes the per-pixel sensor noise."""
+    y, x = np.mgrid[0:size, 0:size].astype(np.float32)
+    base = 60 + 25 * np.sin(x * 0.02) * np.cos(y * 0.015)
+    rng = np.random.default_rng(seed)
+    noise = rng.normal(0, 3, (size, size, 3))
+    image = np.stack([base * 0.6, base * 1.2, base * 0.4], axis=-1) + noise
+    return np.clip(image, 0, 255).astype(np.uint8)
+
+
+def test_change_gate():
+    gate = ChangeGate(enabled=True, threshold=0.08)
+    key = gate.key("North", BBOX)
+
+    before = scene(0)
+    gate.update(key, gate.signature(before), {"prediction": "No Fire", "is_fire": False})
+
+    # Same landscape on the next pass (different noise): reuse the result
+    previous, score = gate.check(key, gate.signature(scene(1)))
+    assert previous is not None and previous["prediction"] == "No Fire", score
+    print(f"✅ Unchanged scene skipped (score {score})")
+
+    # A new 30-pixel fire (5x6 px) must force classification
+    burning = scene(1)
+    burning[500:505, 700:706] = (255, 140, 20)
+    previous, score = gate.check(key, gate.signature(burning))
+    assert previous is None, f"small fire was skipped (score {score})"
+    print(f"✅ 30-pixel fire not skipped (score {score} >= {gate.threshold})")
+
+    # Even 3 fire pixels are seen
+    burning = scene(1)
+    burning[500, 700:703] = (255, 140, 20)
+    previous, score = gate.check(key, gate.signature(burning))
+    assert previous is None, f"3-pixel fire was skipped (score {score})"
+    print(f"✅ 3-pixel fire not skipped (score {score})")
+
+    # Disabled gate never skips
+    assert ChangeGate(enabled=False).check(key, gate.signature(before)) == (None, None)
+    print(f"✅ Disabled gate classifies every zone ({gate.get_stats()})")
+
+
+if __name__ == "__main__":
+    test_change_gate()
@@ -0,0 +1,103 @@
+import time
+import socket
+import asyncio
+
+import cv2
+import numpy as np
+from aiosmtpd.controller import Controller
+
+
+class EphemeralController(Controller):
+    """Controller listening on a free port (port=0); the chosen port ends up in self.port."""
+
+    def _trigger_server(self):
+        self.port = self.server.sockets[0].getsockname()[1]
+        super()._trigger_server()
+
+
+class CountingHandler:
+    """aiosmtpd handler that counts received messages.
+
+    `handshake_delay` is added to every EHLO to stand in for the TLS and login
+    round trips of a real remote server.
+    """
+
+    def __init__(self, handshake_delay=0.05):
+        self.handshake_delay = handshake_delay
+        self.messages = 0
+        self.largest = 0
+
+    async def handle_EHLO(self, server, session, envelope, hostname, responses):
+        await asyncio.sleep(self.handshake_delay)
+        session.host_name = hostname
+        return responses
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages += 1
+        self.largest = max(self.largest, len(envelope.content))
+        return "250 OK"
+
+
+def fake_image_png(seed):
+    rng = np.random.default_rng(seed)
+    image = rng.integers(0, 255, (128, 128, 3), dtype=np.uint8)
+    return cv2.imencode(".png", image)[1].tobytes()
+
+
+def test_email_service(monkeypatch, alerts=50):
+    handler = CountingHandler()
+    controller = EphemeralController(handler, hostname="127.0.0.1", port=0)
+    controller.start()
+
+    for name, value in {
+        "SMTP_EMAIL": "alerts@example.com",
+        "SMTP_PASSWORD": "unused",
+        "SMTP_SERVER": "127.0.0.1",
+        "SMTP_PORT": str(controller.port),
+        "SMTP_STARTTLS": "0",
+        "ALERT_RECIPIENTS": "ops@example.com"
+    }.items():
+        monkeypatch.setenv(name, value)
+    from email_service import EmailService
+    service = EmailService()
+
+    try:
+        rates = {}
+        for mode in ("reconnect", "pooled"):
+            start = time.perf_counter()
+            for i in range(alerts):
+                result = service.send_alert(f"Zone {i}", (31.6, -8.0), 0.9, "Fire")
+                assert result["success"], result
+                if mode == "reconnect":
+                    service.close()  # previous behaviour: new connection for every alert
+            rates[mode] = alerts / (time.perf_counter() - start)
+            print(f"✅ {mode:<10} {rates[mode]:7.1f} alerts/s")
+        print(f"   Pooled speed-up: {rates['pooled'] / rates['reconnect']:.1f}x")
+
+        # A dropped connection is re-established transparently
+        service._connection.sock.shutdown(socket.SHUT_RDWR)
+        assert service.send_alert("Zone X", (31.6, -8.0), 0.9, "Fire")["success"]
+        print(f"✅ Reconnected after drop ({service.get_stats()['reconnects']} reconnect)")
+
+        detections = [
+            {"zone_name": f"Zone {i}", "coordinates": (31.0 + i, -8.0), "confidence": 0.8 + i / 100,
+             "prediction": "Fire", "image_bytes": fake_image_png(i)}
+            for i in range(5)
+        ]
+        before = handler.messages
+        result = service.send_digest(detections)
+        assert result["success"], result
+        assert handler.messages == before + 1
+        print(f"✅ Digest: {len(detections)} zones in one email ({handler.largest // 1024} KB)")
+
+        assert handler.messages == 2 * alerts + 2
+        print(f"✅ Server received {handler.messages} messages over {service.get_stats()['connections']} connections")
+    finally:
+        service.close()
+        controller.stop()
+
+
+if __name__ == "__main__":
+    import pytest
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        test_email_service(monkeypatch)
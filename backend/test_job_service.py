@@ -0,0 +1,53 @@
+import io
+import json
+import os
+import tempfile
+import threading
+
+from job_service import JobService
+from yolo_service import yolo_service
+
+
+def test_jobs_visible_to_other_workers(monkeypatch):
+    """A job run by one worker can be followed and downloaded through another."""
+    release = threading.Event()
+
+    def fake_process_video(input_path, output_path, progress=None):
+        progress(5, 1)
+        release.wait(5)
+        with open(output_path, "wb") as f:
+            f.write(b"video")
+        return True, "ok"
+
+    monkeypatch.setattr(yolo_service, "process_video", fake_process_video)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        owner = JobService(tmp_dir, max_workers=1)
+        sibling = JobService(tmp_dir, max_workers=1)  # stands for another worker process
+
+        job = owner.submit_video(io.BytesIO(b"not really a video"), "clip.mp4")
+        job_id = job["job_id"]
+        assert job_id not in sibling.jobs
+
+        events = sibling.events(job_id, timeout=5)
+        first = json.loads(next(events)[len("data: "):])
+        assert first["job_id"] == job_id and first["status"] in ("queued", "running"), first
+        assert sibling.get_result_path(job_id) is None
+
+        release.set()
+        statuses = [json.loads(event[len("data: "):])["status"] for event in events if event.startswith("data: ")]
+        assert statuses[-1] == "done", statuses
+
+        path = sibling.get_result_path(job_id)
+        assert path and open(path, "rb").read() == b"video"
+        assert sibling.get_job(job_id)["result_url"] == f"/api/jobs/{job_id}/result"
+        assert [j["job_id"] for j in sibling.list_jobs()] == [job_id]
+        assert sibling.get_job("../" + job_id) is None
+        owner._executor.shutdown(wait=True)
+        print(f"✅ Job {job_id[:8]} followed and downloaded through another worker ({statuses})")
+
+
+if __name__ == "__main__":
+    import pytest
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        test_jobs_visible_to_other_workers(monkeypatch)
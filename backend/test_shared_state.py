@@ -0,0 +1,62 @@
+import os
+import tempfile
+
+import numpy as np
+
+from change_gate import ChangeGate
+from shared_state import ProcessLock, read_json, write_json
+
+
+def _child(action):
+    """Run action() in a forked process and return its exit code (0 = True)."""
+    pid = os.fork()
+    if pid == 0:
+        os._exit(0 if action() else 1)
+    return os.waitpid(pid, 0)[1] == 0
+
+
+def test_process_lock():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "grid.lock")
+        lock = ProcessLock(path)
+        assert lock.acquire()
+        assert not lock.acquire() and lock.is_locked()
+
+        # Another worker process cannot take it while it is held...
+        if hasattr(os, "fork"):
+            assert not _child(lambda: ProcessLock(path).acquire())
+            lock.release()
+            # ...and a worker that dies while holding it does not leave it stuck
+            assert _child(lambda: ProcessLock(path).acquire())
+        else:
+            lock.release()
+        assert lock.acquire()
+        lock.release()
+        print("✅ Process lock is exclusive across workers and freed when its holder exits")
+
+
+def test_shared_baselines():
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        write_json(os.path.join(tmp_dir, "job.json"), {"status": "running"})
+        assert read_json(os.path.join(tmp_dir, "job.json")) == {"status": "running"}
+        assert read_json(os.path.join(tmp_dir, "missing.json")) is None
+
+        # Two gates on one directory stand for two worker processes
+        writer = ChangeGate(enabled=True, store_dir=tmp_dir)
+        reader = ChangeGate(enabled=True, store_dir=tmp_dir)
+        key = writer.key("North", (-6.0, 34.0, -4.0, 35.5))
+        signature = writer.signature(np.full((64, 64, 3), 80, dtype=np.uint8))
+        writer.update(key, signature, {"prediction": "No Fire", "coordinates": (34.7, -5.0)})
+
+        previous, score = reader.check(key, signature)
+        assert previous == {"prediction": "No Fire", "coordinates": [34.7, -5.0]}, previous
+        assert score == 0.0
+        assert reader.get_stats()["baselines"] == 1
+        reader.clear()
+        assert writer.check(key, signature) == (None, None)
+        print("✅ Change-gate baselines are shared through the state directory")
+
+
+if __name__ == "__main__":
+    test_process_lock()
+    test_shared_baselines()
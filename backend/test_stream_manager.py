@@ -0,0 +1,157 @@
+import os
+import time
+import json
+import tempfile
+import numpy as np
+import cv2
+
+from detections import ClassTable, Detections, summarize
+from stream_manager import StreamManager, check_source_url
+from yolo_service import yolo_service
+
+CLASSES = ClassTable({0: "smoke", 1: "fire"})
+
+
+def create_fake_camera(path, frames=150, fps=25, size=(640, 360)):
+    """Write a short video with a moving orange blob to use as a fake camera."""
+    width, height = size
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), fps, size)
+    for i in range(frames):
+        frame = np.full((height, width, 3), (60, 90, 60), dtype=np.uint8)
+        cx = int((i / frames) * (width - 80)) + 40
+        cv2.circle(frame, (cx, height // 2), 30, (0, 120, 255), -1)
+        writer.write(frame)
+    writer.release()
+
+
+def create_solid_camera(path, value, frames=50, fps=25, size=(320, 180)):
+    """Write a video whose frames are all one gray level, so every frame names its camera."""
+    width, height = size
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), fps, size)
+    for _ in range(frames):
+        writer.write(np.full((height, width, 3), value, dtype=np.uint8))
+    writer.release()
+
+
+def camera_index(frame):
+    return int(round(float(frame.mean()) / 40)) - 1
+
+
+def test_batching_and_fan_out(num_streams=4, max_batch=3, duration=3.0):
+    """Frames of several cameras share one model call, and each result reaches its own camera."""
+    batches = []
+    fired = set()
+
+    def detect_batch(frames):
+        batches.append(len(frames))
+        time.sleep(0.02)  # model latency lets frames from every camera pile up
+        results = []
+        for frame in frames:
+            index = camera_index(frame)
+            # One box whose confidence names the camera; only camera 0 is on fire
+            boxes = Detections(np.array([[0, 0, 10, 10]], np.int32), np.array([index / 10], np.float32),
+                               np.array([1 if index == 0 else 0], np.int32), CLASSES)
+            results.append(summarize(boxes))
+        return results
+
+    def render(frame, detection):
+        return bytes([camera_index(frame)])
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        manager = StreamManager(detect_batch, render, on_fire=fired.add, max_batch=max_batch)
+        for i in range(num_streams):
+            path = os.path.join(tmp_dir, f"camera_{i}.avi")
+            create_solid_camera(path, 40 * (i + 1))
+            manager.add_source(f"cam-{i}", path, loop=True)
+
+        time.sleep(duration)
+        sources = {stream_id: manager.get_source(stream_id) for stream_id in list(manager.sources)}
+        manager.stop()
+
+    # Batching: cameras share model calls, never more than max_batch frames per call
+    assert max(batches) > 1, batches
+    assert max(batches) <= max_batch, batches
+    print(f"✅ {len(batches)} model calls for {sum(batches)} frames (largest batch {max(batches)})")
+
+    # Fan-out: each camera got its own detection, annotated frame and alert
+    for i in range(num_streams):
+        source = sources[f"cam-{i}"]
+        assert source.latest is not None, f"cam-{i} never inferred"
+        assert source.latest["detections"][0]["confidence"] == round(i / 10, 4), (i, source.latest)
+        assert source.latest["fire_detected"] == (i == 0)
+        _, frame_bytes = source.encoded.get(0, timeout=0)
+        assert frame_bytes == bytes([i]), (i, frame_bytes)
+    assert fired == {"cam-0"}, fired
+    print(f"✅ Results fanned out to {num_streams} cameras; fire alert only for {sorted(fired)}")
+
+
+def test_failed_batch_keeps_loop_alive(duration=2.0):
+    """A model error is logged and counted; later batches are still served."""
+    calls = []
+
+    def detect_batch(frames):
+        calls.append(len(frames))
+        if len(calls) == 1:
+            raise RuntimeError("CUDA out of memory")
+        return [None for _ in frames]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        manager = StreamManager(detect_batch, lambda frame, detection: b"", max_batch=2)
+        manager.ERROR_BACKOFF = 0.1
+        path = os.path.join(tmp_dir, "camera.avi")
+        create_solid_camera(path, 40)
+        manager.add_source("cam-0", path, loop=True)
+        time.sleep(duration)
+        status = manager.get_status()
+        manager.stop()
+
+    assert status["errors"] == 1, status
+    assert len(calls) > 1, calls
+    print(f"✅ Inference loop survived a failed batch ({len(calls) - 1} batches after it)")
+
+
+def test_source_validation():
+    allowed = ["10.0.0.0/24", "cam.example.org"]
+    assert check_source_url("0", allowed) is None
+    assert check_source_url("rtsp://10.0.0.5/stream1", allowed) is None
+    assert check_source_url("https://user:pw@cam.example.org/live.mjpg", allowed) is None
+    assert check_source_url("/etc/passwd", allowed)
+    assert check_source_url("file:///etc/passwd", allowed)
+    assert check_source_url("rtsp://10.0.1.5/stream1", allowed)
+    assert check_source_url("http://169.254.169.254/latest/meta-data", allowed)
+    assert check_source_url("http://cam.example.org.evil.com/", allowed)
+    assert check_source_url("rtsp://10.0.0.5/stream1", [])
+    print("✅ Only webcam indices and allow-listed rtsp/http(s) hosts are accepted")
+
+
+def test_stream_manager(num_streams=4, duration=5.0):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        manager = StreamManager(yolo_service.detect_batch, yolo_service.render_stream_frame, max_batch=num_streams)
+
+        for i in range(num_streams):
+            path = os.path.join(tmp_dir, f"camera_{i}.avi")
+            create_fake_camera(path)
+            manager.add_source(f"fake-{i}", path, loop=True)
+
+        time.sleep(duration)
+        status = manager.get_status()
+        manager.stop()
+
+    inferred = {s["id"]: s["stages"]["inference"]["frames"] for s in status["streams"]}
+    print(f"✅ Batches: {status['batch']['frames']} (avg size {status['batch']['avg_size']}, "
+          f"{status['batch']['avg_ms']} ms/batch)")
+    for stream in status["streams"]:
+        print(f"   📹 {stream['id']}: decoded={stream['stages']['decode']['frames']} "
+              f"inferred={stream['stages']['inference']['frames']} "
+              f"dropped={stream['dropped']['before_inference']}")
+    print(f"Data: {json.dumps(status['batch'], indent=2)}")
+
+    # Fair scheduling: every fake camera must have been served
+    assert all(count > 0 for count in inferred.values()), inferred
+
+
+if __name__ == "__main__":
+    test_source_validation()
+    test_batching_and_fan_out()
+    test_failed_batch_keeps_loop_alive()
+    test_stream_manager()
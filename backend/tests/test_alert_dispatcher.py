@@ -0,0 +1,92 @@
+import time
+
+from alert_dispatcher import AlertDispatcher, AlertFailed
+
+
+class StubSender:
+    """Records delivered payloads; fails the first `failures` attempts."""
+
+    def __init__(self, failures: int = 0, retry: bool = True):
+        self.failures = failures
+        self.retry = retry
+        self.attempts = []
+        self.delivered = []
+
+    def __call__(self, payload):
+        self.attempts.append(payload)
+        if len(self.attempts) <= self.failures:
+            raise AlertFailed("stub failure", retry=self.retry)
+        self.delivered.append(payload)
+
+
+def wait_for(condition, timeout: float = 5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def make_dispatcher(sender, workers: int = 1, **kwargs) -> AlertDispatcher:
+    dispatcher = AlertDispatcher(workers=workers, backoff=0.01, **kwargs)
+    dispatcher.register("test", sender)
+    return dispatcher
+
+
+def test_pending_alert_is_flushed_with_newest_payload():
+    sender = StubSender()
+    # No workers yet: alerts stay pending in the queue
+    dispatcher = make_dispatcher(sender, workers=0)
+    assert dispatcher.dispatch("test", "cam-1", {"n": 1})
+    assert not dispatcher.dispatch("test", "cam-1", {"n": 2})
+    assert dispatcher.dispatch("test", "cam-2", {"n": 3})
+
+    dispatcher.workers = 1
+    dispatcher._ensure_workers()
+    wait_for(lambda: len(sender.delivered) == 2)
+    assert sender.delivered == [{"n": 2}, {"n": 3}]
+    assert dispatcher.get_stats()["coalesced"] == 1
+
+
+def test_alerts_coalesced_within_window():
+    sender = StubSender()
+    dispatcher = make_dispatcher(sender, coalesce_window=60)
+    assert dispatcher.dispatch("test", "cam-1", {"n": 1})
+    wait_for(lambda: dispatcher.get_stats()["sent"] == 1)
+
+    # Delivered, but still inside the window: merged into the last alert
+    assert not dispatcher.dispatch("test", "cam-1", {"n": 2})
+    # Other sources and a zero window are not affected
+    assert dispatcher.dispatch("test", "cam-2", {"n": 3})
+    wait_for(lambda: dispatcher.get_stats()["sent"] == 2)
+    assert sender.delivered == [{"n": 1}, {"n": 3}]
+
+    sender = StubSender()
+    dispatcher = make_dispatcher(sender, coalesce_window=0)
+    assert dispatcher.dispatch("test", "cam-1", {"n": 1})
+    wait_for(lambda: dispatcher.get_stats()["sent"] == 1)
+    assert dispatcher.dispatch("test", "cam-1", {"n": 2})
+
+
+def test_failed_delivery_is_retried():
+    sender = StubSender(failures=2)
+    dispatcher = make_dispatcher(sender, max_retries=3)
+    assert dispatcher.dispatch("test", "zone-a", {"n": 1})
+    wait_for(lambda: dispatcher.get_stats()["sent"] == 1)
+
+    stats = dispatcher.get_stats()
+    assert len(sender.attempts) == 3
+    assert stats["retries"] == 2 and stats["failed"] == 0
+
+
+def test_failed_alert_does_not_suppress_the_next_one():
+    sender = StubSender(failures=1, retry=False)
+    dispatcher = make_dispatcher(sender, coalesce_window=60, max_retries=3)
+    assert dispatcher.dispatch("test", "zone-a", {"n": 1})
+    wait_for(lambda: dispatcher.get_stats()["failed"] == 1)
+    # Not retryable: given up after one attempt
+    assert len(sender.attempts) == 1
+
+    # The failure cleared the coalescing timestamp: a follow-up is delivered
+    assert dispatcher.dispatch("test", "zone-a", {"n": 2})
+    wait_for(lambda: dispatcher.get_stats()["sent"] == 1)
+    assert sender.delivered == [{"n": 2}]
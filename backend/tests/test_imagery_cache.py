@@ -0,0 +1,74 @@
+import os
+import time
+
+import numpy as np
+
+from imagery_cache import ImageryCache
+
+
+def array(value: int):
+    return np.full((32, 32), value, dtype=np.uint8)  # 1024 bytes + .npy header
+
+
+def test_hit_and_miss(tmp_path):
+    cache = ImageryCache(str(tmp_path), ttl_hours=1, max_bytes=1024 * 1024)
+    key = cache.make_key((-6.0, 34.0, -4.0, 35.5), "//VERSION=3", ("2026-01-01", "2026-01-10"), 60, (512, 512))
+    assert cache.get(key) is None
+
+    cache.put(key, array(7))
+    cached = cache.get(key)
+    assert cached is not None and (cached == 7).all()
+    # A different request fingerprint misses
+    assert cache.get(cache.make_key((-6.0, 34.0, -4.0, 35.6), "//VERSION=3",
+                                    ("2026-01-01", "2026-01-10"), 60, (512, 512))) is None
+
+    stats = cache.get_stats()
+    assert (stats["hits"], stats["misses"], stats["entries"]) == (1, 2, 1), stats
+
+    # Entries survive a restart (index rebuilt from disk)
+    assert (ImageryCache(str(tmp_path)).get(key) == 7).all()
+
+
+def test_expired_entry_is_a_miss(tmp_path):
+    cache = ImageryCache(str(tmp_path), ttl_hours=0)
+    cache.put("a", array(1))
+    time.sleep(0.01)
+    assert cache.get("a") is None
+    assert cache.get_stats()["entries"] == 0
+
+
+def test_least_recently_used_evicted_at_max_bytes(tmp_path):
+    entry_size = len(array(0).tobytes()) + 128  # .npy header is 128 bytes
+    cache = ImageryCache(str(tmp_path), ttl_hours=1, max_bytes=2 * entry_size)
+    cache.put("a", array(1))
+    time.sleep(0.01)
+    cache.put("b", array(2))
+    time.sleep(0.01)
+    assert cache.get("a") is not None  # "b" is now the least recently used
+    time.sleep(0.01)
+    cache.put("c", array(3))
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    stats = cache.get_stats()
+    assert stats["evictions"] == 1 and stats["bytes"] <= stats["max_bytes"], stats
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["a.npy", "c.npy"]
+
+
+def test_index_skips_entries_that_vanish(tmp_path, monkeypatch):
+    ImageryCache(str(tmp_path)).put("a", array(1))
+    ImageryCache(str(tmp_path)).put("b", array(2))
+
+    # "a" is deleted by another worker between listdir() and stat()
+    real_stat = os.stat
+
+    def stat(path, *args, **kwargs):
+        if str(path).endswith("a.npy"):
+            raise FileNotFoundError(path)
+        return real_stat(path, *args, **kwargs)
+
+    monkeypatch.setattr(os, "stat", stat)
+    cache = ImageryCache(str(tmp_path))
+    monkeypatch.undo()
+    assert cache.get_stats()["entries"] == 1
+    assert (cache.get("b") == 2).all()
@@ -0,0 +1,55 @@
+import numpy as np
+
+import tiling
+from detections import ClassTable, Detections
+
+CLASSES = ClassTable({0: "smoke", 1: "fire"})
+
+
+def boxes(*rows):
+    """Detections from (x1, y1, x2, y2, conf, cls) rows in tile coordinates."""
+    if not rows:
+        return Detections.empty(CLASSES)
+    array = np.array(rows, dtype=np.float64)
+    return Detections(array[:, :4].astype(np.int32), array[:, 4].astype(np.float32),
+                      array[:, 5].astype(np.int32), CLASSES)
+
+
+def test_tiles_cover_image_with_overlap():
+    frame = np.zeros((1000, 1500, 3), np.uint8)
+    tiles, offsets = tiling.make_tiles(frame, tile=640, overlap=0.2)
+    assert tiling.tile_origins(1000, 640, 0.2) == [0, 360]
+    assert tiling.tile_origins(1500, 640, 0.2) == [0, 512, 860]
+    assert len(tiles) == 6 and offsets[-1] == (860, 360)
+    # Last tiles are aligned to the image edge, so every tile has full size
+    assert all(t.shape[:2] == (640, 640) for t in tiles)
+
+
+def test_plume_cut_at_tile_border_is_merged():
+    # A plume spanning x = 500..700 in the image: tile 0 (origin 0) only sees it up to its
+    # border at x = 640, tile 1 (origin 512) sees all of it
+    left = boxes((500, 100, 640, 200, 0.55, 0),
+                 (50, 50, 90, 90, 0.7, 1))        # unrelated fire, only in tile 0
+    right = boxes((-12, 100, 188, 200, 0.9, 0),   # full plume, image x 500..700
+                  (-12, 100, 188, 200, 0.4, 1))   # fire box at the same place: other class
+    merged = tiling.merge([left, right], [(0, 0), (512, 0)], threshold=0.6)
+
+    kept = sorted(zip(merged.xyxy.tolist(), [round(c, 2) for c in merged.conf.tolist()], merged.cls.tolist()))
+    assert kept == [
+        ([50, 50, 90, 90], 0.7, 1),
+        ([500, 100, 700, 200], 0.4, 1),
+        ([500, 100, 700, 200], 0.9, 0),
+    ], kept
+
+
+def test_intersection_over_smaller_box():
+    # The cut box lies entirely inside the big one but has an IoU of only 0.4:
+    # plain IoU suppression would keep both
+    big = boxes((0, 0, 300, 100, 0.9, 0))
+    cut = boxes((180, 0, 300, 100, 0.5, 0))
+    merged = tiling.merge([big, cut], [(0, 0), (0, 0)], threshold=0.6)
+    assert merged.xyxy.tolist() == [[0, 0, 300, 100]]
+    # Covering only a quarter of the smaller box: both stay
+    assert len(tiling.merge([big, boxes((250, 0, 450, 100, 0.5, 0))], [(0, 0), (0, 0)], threshold=0.6)) == 2
+    # No boxes at all
+    assert len(tiling.merge([boxes(), boxes()], [(0, 0), (640, 0)])) == 0
@@ -0,0 +1,63 @@
+import numpy as np
+
+from detections import ClassTable, Detections
+from tracker import OpticalFlowTracker, TrackedDetector
+
+CLASSES = ClassTable({0: "smoke", 1: "fire"})
+BOX = np.array([[100, 80, 180, 160]], np.int32)
+
+
+def textured_frame(seed: int = 0, size=(240, 320)):
+    """Smooth random texture (blurred noise) that Lucas-Kanade can lock on to."""
+    rng = np.random.default_rng(seed)
+    noise = rng.integers(0, 256, (size[0] // 8, size[1] // 8), dtype=np.uint8)
+    gray = np.kron(noise, np.ones((8, 8), np.uint8)).astype(np.float32)
+    gray = (gray + np.roll(gray, 3, axis=0) + np.roll(gray, 3, axis=1)) / 3
+    return np.repeat(gray.astype(np.uint8)[..., None], 3, axis=2)
+
+
+def shifted(frame, dx: int, dy: int):
+    return np.roll(np.roll(frame, dy, axis=0), dx, axis=1)
+
+
+def test_box_follows_shifted_frame():
+    frame = textured_frame()
+    tracker = OpticalFlowTracker()
+    tracker.reset(frame, Detections(BOX.copy(), np.array([0.9], np.float32), np.array([1], np.int32), CLASSES))
+
+    # Two steps of (+6, +4) px: the box follows and the points pass the forward-backward check
+    moved = tracker.update(shifted(frame, 6, 4))
+    assert np.abs(moved.xyxy - (BOX + [6, 4, 6, 4])).max() <= 1, moved.xyxy
+    assert tracker.confidence >= 0.8, tracker.confidence
+
+    moved = tracker.update(shifted(frame, 12, 8))
+    assert np.abs(moved.xyxy - (BOX + [12, 8, 12, 8])).max() <= 1, moved.xyxy
+    assert tracker.confidence >= 0.8, tracker.confidence
+    # Class and confidence travel with the box
+    assert moved.cls.tolist() == [1] and moved.conf.tolist() == [np.float32(0.9)]
+
+
+def test_detector_runs_every_k_and_on_lost_track():
+    calls = []
+
+    def detect(frame):
+        calls.append(frame)
+        return {"boxes": Detections(BOX.copy(), np.array([0.8], np.float32), np.array([0], np.int32), CLASSES),
+                "fire_detected": False, "smoke_detected": True}
+
+    frame = textured_frame()
+    detector = TrackedDetector(detect, every_k=3, min_confidence=0.5)
+    assert detector(frame).get("tracked") is None
+    tracked = detector(shifted(frame, 4, 2))
+    assert tracked["tracked"] and tracked["smoke_detected"]
+    assert np.abs(tracked["boxes"].xyxy - (BOX + [4, 2, 4, 2])).max() <= 1
+    assert detector(shifted(frame, 8, 4))["tracked"]
+    # Frame k: back to the detector
+    assert detector(shifted(frame, 12, 6)).get("tracked") is None
+    assert len(calls) == 2
+
+    # An unrelated scene breaks the track: the detector is re-run at once
+    assert detector(textured_frame(seed=1)).get("tracked") is None
+    stats = detector.get_stats()
+    assert stats["detector_runs"] == 3 and stats["forced_detections"] == 1, stats
+    assert stats["tracked_frames"] == 2
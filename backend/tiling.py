@@ -0,0 +1,98 @@
+"""
+Sliced (tiled) inference for high-resolution images.
+Large drone or tower photos are cut into overlapping tiles at native
+resolution so small, distant smoke plumes keep enough pixels for YOLO.
+Boxes from all tiles (plus one downscaled full-image pass for objects larger
+than a tile) are merged with class-aware non-maximum suppression.
+
+Enable with TILED_INFERENCE=1 or per request with /detect/image?tiled=true.
+"""
+
+import os
+import numpy as np
+from dotenv import load_dotenv
+
+from detections import Detections
+
+load_dotenv()
+
+TILED_INFERENCE = os.getenv("TILED_INFERENCE", "0") == "1"
+TILE_SIZE = int(os.getenv("TILE_SIZE", "640"))
+TILE_OVERLAP = float(os.getenv("TILE_OVERLAP", "0.2"))
+# Images whose longer side is at most this are processed in a single pass
+TILE_MIN_SIZE = int(os.getenv("TILE_MIN_SIZE", "1280"))
+# Boxes covering this fraction of a smaller same-class box replace it
+TILE_MERGE_THRESHOLD = float(os.getenv("TILE_MERGE_THRESHOLD", "0.6"))
+
+
+def needs_tiling(shape, min_size: int = TILE_MIN_SIZE) -> bool:
+    return max(shape[:2]) > min_size
+
+
+def tile_origins(length: int, tile: int, overlap: float) -> list:
+    """Start positions along one axis; the last tile is aligned to the edge."""
+    if length <= tile:
+        return [0]
+    step = max(1, int(tile * (1 - overlap)))
+    starts = list(range(0, length - tile, step))
+    starts.append(length - tile)
+    return starts
+
+
+def make_tiles(frame, tile: int = TILE_SIZE, overlap: float = TILE_OVERLAP):
+    """
+    Cut a frame into overlapping tiles (views, no copies).
+
+    Returns:
+        (tiles, offsets) with the (x, y) origin of each tile
+    """
+    height, width = frame.shape[:2]
+    tiles = []
+    offsets = []
+    for y in tile_origins(height, tile, overlap):
+        for x in tile_origins(width, tile, overlap):
+            tiles.append(frame[y:y + tile, x:x + tile])
+            offsets.append((x, y))
+    return tiles, offsets
+
+
+def merge(parts, offsets, threshold: float = TILE_MERGE_THRESHOLD) -> Detections:
+    """
+    Shift per-tile detections into image coordinates and suppress duplicates.
+
+    Overlap is measured as intersection over the smaller box, so a plume cut
+    at a tile border is absorbed by the complete box from the neighbouring tile.
+
+    Args:
+        parts: List of Detections (one per tile)
+        offsets: (x, y) origin of each tile
+        threshold: Overlap above which the lower-confidence box is dropped
+    """
+    classes = parts[0].classes
+    shifts = [np.tile(np.array(offset, dtype=np.int32), 2) for offset in offsets]
+    xyxy = np.concatenate([p.xyxy + shift for p, shift in zip(parts, shifts)])
+    conf = np.concatenate([p.conf for p in parts])
+    cls = np.concatenate([p.cls for p in parts])
+    if not len(conf):
+        return Detections.empty(classes)
+
+    order = np.argsort(-conf, kind="stable")
+    xyxy, conf, cls = xyxy[order], conf[order], cls[order]
+    areas = np.maximum(xyxy[:, 2] - xyxy[:, 0], 1) * np.maximum(xyxy[:, 3] - xyxy[:, 1], 1)
+
+    keep = np.ones(len(conf), dtype=bool)
+    for i in range(len(conf)):
+        if not keep[i]:
+            continue
+        rest = np.nonzero(keep[i + 1:] & (cls[i + 1:] == cls[i]))[0] + i + 1
+        if not len(rest):
+            continue
+        ix1 = np.maximum(xyxy[i, 0], xyxy[rest, 0])
+        iy1 = np.maximum(xyxy[i, 1], xyxy[rest, 1])
+        ix2 = np.minimum(xyxy[i, 2], xyxy[rest, 2])
+        iy2 = np.minimum(xyxy[i, 3], xyxy[rest, 3])
+        inter = np.clip(ix2 - ix1, 0, None) * np.clip(iy2 - iy1, 0, None)
+        overlap = inter / np.minimum(areas[i], areas[rest])
+        keep[rest[overlap > threshold]] = False
+
+    return Detections(xyxy[keep], conf[keep], cls[keep], classes)
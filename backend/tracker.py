@@ -0,0 +1,169 @@
+"""
+Detector-plus-tracker mode for video detection.
+Runs the full YOLO detector every k frames and moves the boxes in between
+with a lightweight pyramidal Lucas-Kanade optical-flow tracker.
+"""
+
+import os
+import time
+import numpy as np
+import cv2
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Run YOLO every k frames (1 = every frame, tracker disabled)
+DETECT_EVERY_K = max(1, int(os.getenv("DETECT_EVERY_K", "1")))
+# Re-run YOLO immediately when the tracker's confidence drops below this
+TRACKER_MIN_CONFIDENCE = float(os.getenv("TRACKER_MIN_CONFIDENCE", "0.5"))
+
+
+class OpticalFlowTracker:
+    """Moves detection boxes between frames using sparse optical flow on a point grid."""
+
+    GRID = 5                 # GRID x GRID points sampled inside each box
+    MAX_FB_ERROR = 1.5       # forward-backward error (pixels) for a point to count
+    LK_PARAMS = dict(
+        winSize=(21, 21),
+        maxLevel=3,
+        criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 20, 0.03)
+    )
+
+    def __init__(self):
+        self.prev_gray = None
+        self.boxes = None  # Detections being followed
+        self.confidence = 0.0
+
+    def reset(self, frame, boxes):
+        """Start tracking from a fresh detection."""
+        self.prev_gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        self.boxes = boxes
+        self.confidence = 1.0
+
+    def _grid_points(self, xyxy):
+        """GRID x GRID points per box, as an (N * GRID * GRID, 1, 2) array."""
+        xyxy = xyxy.astype(np.float32)
+        # Stay away from the edges, where the background dominates
+        steps = np.linspace(0.15, 0.85, self.GRID, dtype=np.float32)
+        xs = xyxy[:, 0:1] + (xyxy[:, 2:3] - xyxy[:, 0:1]) * steps
+        ys = xyxy[:, 1:2] + (xyxy[:, 3:4] - xyxy[:, 1:2]) * steps
+        grid_x = np.broadcast_to(xs[:, None, :], (len(xyxy), self.GRID, self.GRID))
+        grid_y = np.broadcast_to(ys[:, :, None], (len(xyxy), self.GRID, self.GRID))
+        return np.stack([grid_x, grid_y], axis=-1).reshape(-1, 1, 2)
+
+    def update(self, frame):
+        """
+        Move every box to the new frame.
+
+        Returns:
+            Detections at their new positions; self.confidence holds the fraction of points
+            tracked reliably for the worst box (1.0 when there are no boxes)
+        """
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        if self.prev_gray is None or self.boxes is None or not len(self.boxes):
+            # Nothing to follow: the scene is treated as unchanged until the next detection
+            self.prev_gray = gray
+            self.confidence = 1.0
+            return self.boxes
+
+        points = self._grid_points(self.boxes.xyxy)
+        forward, status_f, _ = cv2.calcOpticalFlowPyrLK(self.prev_gray, gray, points, None, **self.LK_PARAMS)
+        backward, status_b, _ = cv2.calcOpticalFlowPyrLK(gray, self.prev_gray, forward, None, **self.LK_PARAMS)
+
+        fb_error = np.linalg.norm((points - backward).reshape(-1, 2), axis=1)
+        valid = (status_f.ravel() == 1) & (status_b.ravel() == 1) & (fb_error < self.MAX_FB_ERROR)
+        motion = (forward - points).reshape(-1, 2)
+
+        height, width = gray.shape
+        per_box = self.GRID * self.GRID
+        xyxy = self.boxes.xyxy
+        shifts = np.zeros((len(xyxy), 2), dtype=np.float32)
+        confidences = []
+        for i in range(len(xyxy)):
+            box_valid = valid[i * per_box:(i + 1) * per_box]
+            confidences.append(float(box_valid.mean()))
+            if box_valid.any():
+                shifts[i] = np.median(motion[i * per_box:(i + 1) * per_box][box_valid], axis=0)
+
+        # Keep every box inside the frame
+        dx = np.rint(np.clip(shifts[:, 0], -xyxy[:, 0], width - xyxy[:, 2])).astype(np.int32)
+        dy = np.rint(np.clip(shifts[:, 1], -xyxy[:, 1], height - xyxy[:, 3])).astype(np.int32)
+        moved = self.boxes.with_boxes(xyxy + np.stack([dx, dy, dx, dy], axis=1))
+
+        self.boxes = moved
+        self.prev_gray = gray
+        self.confidence = min(confidences)
+        return moved
+
+
+class TrackedDetector:
+    """
+    Wraps a per-frame detect function: detection every k frames, tracking in between.
+
+    The wrapped function must return a dict with "boxes" as Detections, plus
+    "fire_detected" and "smoke_detected" flags.
+    """
+
+    def __init__(self, detect, every_k: int = DETECT_EVERY_K, min_confidence: float = TRACKER_MIN_CONFIDENCE):
+        """
+        Args:
+            detect: Callable(frame) -> detection dict (or None)
+            every_k: Run the detector every k frames
+            min_confidence: Tracker confidence below which detection is re-run at once
+        """
+        self.detect = detect
+        self.every_k = max(1, every_k)
+        self.min_confidence = min_confidence
+        self.tracker = OpticalFlowTracker()
+        self.last_detection = None
+        self.frames_since_detection = 0
+
+        self.frames = 0
+        self.detector_runs = 0
+        self.forced_detections = 0
+        self.detect_time = 0.0
+        self.track_time = 0.0
+
+    def __call__(self, frame):
+        if self.last_detection is None or self.frames_since_detection >= self.every_k - 1:
+            return self._run_detector(frame)
+
+        start = time.perf_counter()
+        boxes = self.tracker.update(frame)
+        self.track_time += time.perf_counter() - start
+
+        if self.tracker.confidence < self.min_confidence:
+            self.forced_detections += 1
+            return self._run_detector(frame)
+
+        self.frames += 1
+        self.frames_since_detection += 1
+        return {**self.last_detection, "boxes": boxes, "tracked": True}
+
+    def _run_detector(self, frame):
+        start = time.perf_counter()
+        detection = self.detect(frame)
+        self.detect_time += time.perf_counter() - start
+        self.detector_runs += 1
+        self.frames += 1
+        self.frames_since_detection = 0
+
+        self.last_detection = detection
+        if detection is not None:
+            self.tracker.reset(frame, detection["boxes"])
+        return detection
+
+    def get_stats(self) -> dict:
+        """Get detector/tracker split and the effective fps gain over detecting every frame."""
+        avg_detect_ms = self.detect_time / self.detector_runs * 1000 if self.detector_runs else 0.0
+        avg_frame_ms = (self.detect_time + self.track_time) / self.frames * 1000 if self.frames else 0.0
+        return {
+            "every_k": self.every_k,
+            "frames": self.frames,
+            "detector_runs": self.detector_runs,
+            "tracked_frames": self.frames - self.detector_runs,
+            "forced_detections": self.forced_detections,
+            "avg_detect_ms": round(avg_detect_ms, 2),
+            "avg_frame_ms": round(avg_frame_ms, 2),
+            "fps_gain": round(avg_detect_ms / avg_frame_ms, 2) if avg_frame_ms else 1.0
+        }
@@ -0,0 +1,381 @@
+"""
+Offline video processing for uploaded videos.
+Decodes on a reader thread, runs YOLO on batches of frames, draws and writes
+on a writer thread. Long videos can also be split into keyframe-aligned
+segments processed in parallel worker processes, then stitched back together.
+"""
+
+import os
+import shutil
+import subprocess
+import tempfile
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from queue import Queue, Empty, Full
+from threading import Thread, Event
+
+import cv2
+from dotenv import load_dotenv
+
+load_dotenv()
+
+VIDEO_BATCH_SIZE = max(1, int(os.getenv("VIDEO_BATCH_SIZE", "8")))
+VIDEO_WORKERS = max(1, int(os.getenv("VIDEO_WORKERS", "1")))
+# Videos shorter than this (in frames) are never split across processes
+VIDEO_PARALLEL_MIN_FRAMES = int(os.getenv("VIDEO_PARALLEL_MIN_FRAMES", "1500"))
+
+_END = None  # queue sentinel
+
+
+def _put(queue: Queue, item, stop: Event) -> bool:
+    """Put into a bounded queue, giving up (False) once `stop` is set."""
+    while not stop.is_set():
+        try:
+            queue.put(item, timeout=0.1)
+            return True
+        except Full:
+            continue
+    return False
+
+
+def _read_frames(cap, queue: Queue, start_frame: int, end_frame, stop: Event):
+    """Reader thread: decode frames [start_frame, end_frame) into the queue."""
+    if start_frame:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+    index = start_frame
+    try:
+        while end_frame is None or index < end_frame:
+            ret, frame = cap.read()
+            if not ret or not _put(queue, frame, stop):
+                break
+            index += 1
+    finally:
+        _put(queue, _END, stop)
+
+
+def _write_frames(out, queue: Queue, draw, stop: Event, errors: list):
+    """Writer thread: draw detections and encode frames in order."""
+    try:
+        while not stop.is_set():
+            try:
+                item = queue.get(timeout=0.1)
+            except Empty:
+                continue
+            if item is _END:
+                break
+            frame, detection = item
+            draw(frame, detection)
+            out.write(frame)
+    except Exception as e:
+        errors.append(e)
+        stop.set()
+
+
+def _get(queue: Queue, stop: Event, errors: list):
+    """Get from a queue, raising the worker thread's error if it failed."""
+    while True:
+        if errors:
+            raise errors[0]
+        try:
+            return queue.get(timeout=0.1)
+        except Empty:
+            continue
+
+
+def open_writer(output_path: str, fps: float, size: tuple):
+    """Create the MP4 writer used for processed videos."""
+    fourcc = cv2.VideoWriter_fourcc(*'avc1')
+    return cv2.VideoWriter(output_path, fourcc, fps, size)
+
+
+def process_batched(service, video_path: str, output_path: str, start_frame: int = 0,
+                    end_frame=None, batch_size: int = VIDEO_BATCH_SIZE, progress=None):
+    """
+    Process a video (or a frame range of it) with batched inference.
+
+    Args:
+        service: YoloService providing detect_video_batch and draw_video_detections
+        video_path: Input video path
+        output_path: Output MP4 path
+        start_frame: First frame to process
+        end_frame: Frame after the last one to process (None = until the end)
+        batch_size: Frames per YOLO call
+        progress: Optional callback(frames_done, fire_frames)
+
+    Returns:
+        dict with frame and fire-frame counts, or None if the video cannot be opened
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        return None
+
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+    out = open_writer(output_path, fps, (width, height))
+
+    # Set on any failure so the reader/writer threads stop instead of blocking on full queues
+    stop = Event()
+    errors = []
+    read_queue = Queue(maxsize=batch_size * 2)
+    write_queue = Queue(maxsize=batch_size * 2)
+    reader = Thread(target=_read_frames, args=(cap, read_queue, start_frame, end_frame, stop), daemon=True)
+    writer = Thread(target=_write_frames, args=(out, write_queue, service.draw_video_detections, stop, errors),
+                    daemon=True)
+    reader.start()
+    writer.start()
+
+    frames = 0
+    fire_frames = 0
+    batch = []
+    try:
+        while True:
+            frame = _get(read_queue, stop, errors)
+            if frame is not _END:
+                batch.append(frame)
+            if batch and (len(batch) >= batch_size or frame is _END):
+                detections = service.detect_video_batch(batch)
+                for batch_frame, detection in zip(batch, detections):
+                    if not _put(write_queue, (batch_frame, detection), stop):
+                        raise errors[0]
+                    frames += 1
+                    fire_frames += int(detection["fire_detected"])
+                if progress:
+                    progress(frames, fire_frames)
+                batch = []
+            if frame is _END:
+                break
+        _put(write_queue, _END, stop)
+        writer.join()
+        if errors:
+            raise errors[0]
+    finally:
+        stop.set()
+        writer.join()
+        reader.join()
+        cap.release()
+        out.release()
+
+    return {"frames": frames, "fire_frames": fire_frames, "fps": fps, "size": (width, height)}
+
+
+def _fire_ranges(times: list, frame_duration: float, gap: float) -> list:
+    """Merge fire frame timestamps into {"start", "end"} ranges in seconds."""
+    ranges = []
+    for t in times:
+        end = round(t + frame_duration, 3)
+        if ranges and t - ranges[-1]["end"] <= gap:
+            ranges[-1]["end"] = end
+        else:
+            ranges.append({"start": t, "end": end})
+    return ranges
+
+
+def analyze_batched(service, video_path: str, batch_size: int = VIDEO_BATCH_SIZE,
+                    progress=None, gap: float = 0.5):
+    """
+    Run batched detection over a video without drawing or encoding any frames.
+
+    Args:
+        service: YoloService providing detect_video_batch
+        video_path: Input video path
+        batch_size: Frames per YOLO call
+        progress: Optional callback(frames_done, fire_frames)
+        gap: Fire frames closer than this (seconds) are merged into one range
+
+    Returns:
+        dict with counts, a timeline of frames that have detections and the
+        fire time ranges, or None if the video cannot be opened
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        return None
+
+    fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+    stop = Event()
+    read_queue = Queue(maxsize=batch_size * 2)
+    reader = Thread(target=_read_frames, args=(cap, read_queue, 0, None, stop), daemon=True)
+    reader.start()
+
+    frames = 0
+    timeline = []
+    fire_times = []
+    batch = []
+    try:
+        while True:
+            frame = read_queue.get()
+            if frame is not _END:
+                batch.append(frame)
+            if batch and (len(batch) >= batch_size or frame is _END):
+                for detection in service.detect_video_batch(batch):
+                    t = round(frames / fps, 3)
+                    if len(detection["boxes"]):
+                        timeline.append({
+                            "frame": frames,
+                            "t": t,
+                            "fire": detection["fire_detected"],
+                            "smoke": detection["smoke_detected"],
+                            "detections": detection["boxes"].to_list(precision=4)
+                        })
+                    if detection["fire_detected"]:
+                        fire_times.append(t)
+                    frames += 1
+                if progress:
+                    progress(frames, len(fire_times))
+                batch = []
+            if frame is _END:
+                break
+    finally:
+        stop.set()  # unblocks the reader if detection failed while the queue was full
+        reader.join()
+        cap.release()
+
+    return {
+        "frames": frames,
+        "fire_frames": len(fire_times),
+        "fps": fps,
+        "duration": round(frames / fps, 3),
+        "fire_ranges": _fire_ranges(fire_times, 1.0 / fps, gap),
+        "timeline": timeline
+    }
+
+
+def find_segments(video_path: str, total_frames: int, fps: float, count: int) -> list:
+    """
+    Split a video into roughly equal frame ranges starting on keyframes.
+
+    Keyframe positions come from ffprobe when it is installed; seeking to a
+    keyframe lets each worker start decoding immediately. Without ffprobe the
+    ranges are split evenly (OpenCV then decodes from the previous keyframe).
+
+    Returns:
+        List of (start_frame, end_frame) tuples covering the whole video
+    """
+    keyframes = []
+    if shutil.which("ffprobe"):
+        try:
+            output = subprocess.run(
+                ["ffprobe", "-v", "error", "-select_streams", "v:0", "-skip_frame", "nokey",
+                 "-show_entries", "frame=pts_time", "-of", "csv=p=0", video_path],
+                capture_output=True, text=True, timeout=60, check=True
+            ).stdout
+            keyframes = sorted({int(round(float(t) * fps)) for t in output.split() if t.strip()})
+        except (subprocess.SubprocessError, ValueError):
+            keyframes = []
+
+    starts = [0]
+    for i in range(1, count):
+        target = total_frames * i // count
+        if keyframes:
+            target = min(keyframes, key=lambda k: abs(k - target))
+        if starts[-1] < target < total_frames:
+            starts.append(target)
+
+    return [(start, end) for start, end in zip(starts, starts[1:] + [total_frames])]
+
+
+def concat_segments(segment_paths: list, output_path: str, fps: float, size: tuple):
+    """Stitch processed segments, stream-copying with ffmpeg when available."""
+    if shutil.which("ffmpeg"):
+        list_path = output_path + ".txt"
+        with open(list_path, "w") as f:
+            for path in segment_paths:
+                f.write(f"file '{os.path.abspath(path)}'\n")
+        try:
+            subprocess.run(
+                ["ffmpeg", "-y", "-v", "error", "-f", "concat", "-safe", "0",
+                 "-i", list_path, "-c", "copy", output_path],
+                check=True, timeout=600
+            )
+            return
+        except subprocess.SubprocessError as e:
+            print(f"⚠️ ffmpeg concat failed ({e}), re-encoding segments")
+        finally:
+            os.remove(list_path)
+
+    out = open_writer(output_path, fps, size)
+    for path in segment_paths:
+        cap = cv2.VideoCapture(path)
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            out.write(frame)
+        cap.release()
+    out.release()
+
+
+def _init_worker(threads: int):
+    """Limit each worker process to its share of the CPU."""
+    cv2.setNumThreads(threads)
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+
+def _process_segment(video_path: str, segment_path: str, start_frame: int, end_frame: int, batch_size: int):
+    """Worker process entry point: process one segment with the worker's own model."""
+    from yolo_service import yolo_service
+    if not yolo_service.model:
+        raise RuntimeError("Model not loaded")
+    return process_batched(yolo_service, video_path, segment_path, start_frame, end_frame, batch_size)
+
+
+def process_parallel(video_path: str, output_path: str, workers: int = VIDEO_WORKERS,
+                     batch_size: int = VIDEO_BATCH_SIZE, progress=None):
+    """
+    Process a long video as keyframe-aligned segments in parallel worker processes.
+
+    Returns:
+        dict with frame and fire-frame counts, or None if the video cannot be opened
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        return None
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+    size = (int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+    cap.release()
+
+    segments = find_segments(video_path, total_frames, fps, workers)
+    threads = max(1, (os.cpu_count() or 1) // len(segments))
+    print(f"🎬 Processing {total_frames} frames as {len(segments)} parallel segment(s)")
+
+    parts_dir = tempfile.mkdtemp(prefix="segments_", dir=os.path.dirname(os.path.abspath(output_path)))
+    try:
+        segment_paths = [os.path.join(parts_dir, f"part_{i:03d}.mp4") for i in range(len(segments))]
+        # spawn: torch/OpenMP thread pools are not safe to fork
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=len(segments), mp_context=context,
+                                 initializer=_init_worker, initargs=(threads,)) as pool:
+            futures = [
+                pool.submit(_process_segment, video_path, path, start, end, batch_size)
+                for path, (start, end) in zip(segment_paths, segments)
+            ]
+            results = []
+            for future in futures:
+                results.append(future.result())
+                if progress:
+                    progress(sum(r["frames"] for r in results), sum(r["fire_frames"] for r in results))
+
+        concat_segments(segment_paths, output_path, fps, size)
+    finally:
+        shutil.rmtree(parts_dir, ignore_errors=True)
+
+    return {
+        "frames": sum(r["frames"] for r in results),
+        "fire_frames": sum(r["fire_frames"] for r in results),
+        "fps": fps,
+        "size": size,
+        "segments": len(segments)
+    }
+
+
+def count_frames(video_path: str) -> int:
+    """Frame count reported by the container (0 if unknown)."""
+    cap = cv2.VideoCapture(video_path)
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) if cap.isOpened() else 0
+    cap.release()
+    return max(0, total)
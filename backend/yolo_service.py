@@ -1,18 +1,25 @@
 import cv2
 import os
-from ultralytics import YOLO
-import requests
+import shutil
 from dotenv import load_dotenv
 import time
-from threading import Thread
 import numpy as np
-import base64
+from model_manager import model_manager
+from alert_dispatcher import alert_dispatcher
+from detections import ClassTable, from_result, summarize
+import tiling
+from stream_pipeline import StreamPipeline
+from tracker import TrackedDetector, DETECT_EVERY_K
+from frame_gate import GatedDetector, create_frame_gate
+from video_processor import (
+    process_batched, process_parallel, analyze_batched, open_writer, count_frames, VIDEO_WORKERS, VIDEO_PARALLEL_MIN_FRAMES
+)
 
 load_dotenv()
 
 MODEL_PATH = "best.pt"
-BOT_TOKEN = os.getenv("BOT_TOKEN")
-CHAT_ID = os.getenv("CHAT_ID")
+# Inference runtime: "pytorch" (default), "onnx" (ONNX Runtime) or "openvino"
+YOLO_BACKEND = os.getenv("YOLO_BACKEND", "pytorch").lower()
 
 class YoloService:
     # Detection parameters - optimized for fire/smoke detection
@@ -24,136 +31,272 @@ class YoloService:
     WEBCAM_HEIGHT = 720        # Webcam resolution height
     
     def __init__(self):
-        self.model = None
-        self.last_alert_time = 0
-        self.alert_cooldown = 30  # seconds
-        try:
-            self.model = YOLO(MODEL_PATH)
-            print(f"✅ YOLOv8 Model loaded from {MODEL_PATH}")
-            print(f"   📊 Detection settings: conf={self.CONF_THRESHOLD}, iou={self.IOU_THRESHOLD}, imgsz={self.IMG_SIZE}")
-        except Exception as e:
-            print(f"⚠️ Error loading YOLO model: {e}")
+        self.model_path = MODEL_PATH
+        self.backend = YOLO_BACKEND
+        self.classes = None  # ClassTable, set when the model is loaded
+        # ultralytics/torch are only imported when the model is first needed.
+        # ONNX Runtime / OpenVINO sessions own native thread pools that do not
+        # survive os.fork(), so only the PyTorch model is preloaded by serve.py.
+        model_manager.register("yolo", self._load_model, self._warmup_model,
+                               fork_safe=(self.backend == "pytorch"))
 
-    def enhance_frame(self, frame):
-        """Enhance frame quality for better detection."""
-        # Adjust contrast and brightness
-        alpha = 1.2  # Contrast (1.0 = no change)
-        beta = 10    # Brightness (0 = no change)
-        enhanced = cv2.convertScaleAbs(frame, alpha=alpha, beta=beta)
-        return enhanced
-
-    def send_telegram_alert(self, message):
-        if not BOT_TOKEN or not CHAT_ID:
-            print("⚠️ Telegram credentials not set")
-            return
-
-        current_time = time.time()
-        if current_time - self.last_alert_time < self.alert_cooldown:
-            return
-
-        def _send():
-            url = f'https://api.telegram.org/bot{BOT_TOKEN}/sendMessage'
-            payload = {
-                'chat_id': CHAT_ID,
-                'text': message
-            }
+    # Exported artifacts, cached next to the weights
+    EXPORT_FORMATS = {
+        "onnx": lambda path: os.path.splitext(path)[0] + ".onnx",
+        "openvino": lambda path: os.path.splitext(path)[0] + "_openvino_model"
+    }
+
+    def _load_model(self):
+        model = self._load_backend(self.backend)
+        if model is None and self.backend != "pytorch":
+            print("⚠️ Falling back to the PyTorch backend")
+            self.backend = "pytorch"
+            model = self._load_backend("pytorch")
+        self.classes = ClassTable(model.names)
+        print(f"✅ YOLOv8 Model loaded from {self.model_path} ({self.backend})")
+        print(f"   📊 Detection settings: conf={self.CONF_THRESHOLD}, iou={self.IOU_THRESHOLD}, imgsz={self.IMG_SIZE}")
+        return model
+
+    def _load_backend(self, backend):
+        """
+        Load the model for an inference backend, exporting best.pt on first use.
+
+        The exported model is reused until the weights change (newer mtime).
+
+        Returns:
+            ultralytics YOLO model, or None if the export failed
+        """
+        from ultralytics import YOLO
+        if backend == "pytorch":
+            return YOLO(self.model_path)
+        if backend not in self.EXPORT_FORMATS:
+            print(f"⚠️ Unknown YOLO backend '{backend}' (available: pytorch, {', '.join(self.EXPORT_FORMATS)})")
+            return None
+
+        artifact = self.EXPORT_FORMATS[backend](self.model_path)
+        if not os.path.exists(artifact) or os.path.getmtime(artifact) < os.path.getmtime(self.model_path):
+            print(f"📦 Exporting {self.model_path} to {backend}...")
             try:
-                requests.post(url, data=payload)
-                self.last_alert_time = current_time
-                print("✅ Telegram alert sent")
+                # Dynamic shapes: letterboxed inputs are not square and frames are batched
+                exported = YOLO(self.model_path).export(format=backend, imgsz=self.IMG_SIZE, dynamic=True)
             except Exception as e:
-                print(f"❌ Telegram alert failed: {e}")
+                print(f"❌ {backend} export failed: {e}")
+                return None
+            if os.path.abspath(exported) != os.path.abspath(artifact):
+                shutil.move(exported, artifact)
+        return YOLO(artifact, task="detect")
+
+    def _warmup_model(self, model):
+        dummy = np.zeros((self.IMG_SIZE, self.IMG_SIZE, 3), dtype=np.uint8)
+        model(dummy, conf=self.CONF_THRESHOLD, iou=self.IOU_THRESHOLD, imgsz=self.IMG_SIZE, verbose=False)
+
+    @property
+    def model(self):
+        """YOLO model, loaded on first access (None if loading failed)."""
+        return model_manager.get("yolo")
+
+    # Contrast/brightness enhancement (alpha=1.2, beta=10) as a lookup table,
+    # same values as cv2.convertScaleAbs(frame, alpha=1.2, beta=10)
+    ENHANCE_LUT = np.clip(np.rint(np.arange(256) * 1.2 + 10), 0, 255).astype(np.uint8)
+    LETTERBOX_STRIDE = 32      # model stride: padded inputs are multiples of this
+    LETTERBOX_COLOR = (114, 114, 114)
+
+    def enhance_frame(self, frame):
+        """Enhance frame quality for better detection."""
+        return cv2.LUT(frame, self.ENHANCE_LUT)
 
-        Thread(target=_send).start()
+    def preprocess_frame(self, frame):
+        """
+        Letterbox a frame to IMG_SIZE and enhance it, ready for YOLO.
 
-    def generate_frames(self):
-        # Open webcam with HD resolution
-        cap = cv2.VideoCapture(0)
+        The frame is resized first so the enhancement only touches the pixels
+        the model sees; padding keeps the aspect ratio and rounds each side up
+        to the model stride, so YOLO does not resize it again.
+
+        Returns:
+            (input image, scale, (pad_x, pad_y)) to map boxes back to the frame
+        """
+        height, width = frame.shape[:2]
+        scale = self.IMG_SIZE / max(height, width)
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+
+        if scale < 1:
+            small = cv2.LUT(cv2.resize(frame, size, interpolation=cv2.INTER_AREA), self.ENHANCE_LUT)
+        elif scale > 1:
+            small = cv2.resize(cv2.LUT(frame, self.ENHANCE_LUT), size, interpolation=cv2.INTER_LINEAR)
+        else:
+            small = cv2.LUT(frame, self.ENHANCE_LUT)
+
+        stride = self.LETTERBOX_STRIDE
+        pad_w = -size[0] % stride
+        pad_h = -size[1] % stride
+        left, top = pad_w // 2, pad_h // 2
+        if pad_w or pad_h:
+            small = cv2.copyMakeBorder(small, top, pad_h - top, left, pad_w - left,
+                                       cv2.BORDER_CONSTANT, value=self.LETTERBOX_COLOR)
+        return small, scale, (left, top)
+
+    def send_telegram_alert(self, message, source="yolo"):
+        """Queue a Telegram alert; repeats from the same source are coalesced."""
+        alert_dispatcher.dispatch("telegram", source, {"text": message})
+
+    def alert_uploaded_image(self):
+        """Fire alert for an uploaded image (also sent when the result comes from the cache)."""
+        self.send_telegram_alert("🔥 FIRE DETECTED in uploaded image!", source="upload")
+
+    def open_webcam(self, source=0):
+        """Open a camera with HD resolution and a minimal driver buffer."""
+        cap = cv2.VideoCapture(source)
         if not cap.isOpened():
-            print("❌ Could not open webcam")
-            return
-        
+            print(f"❌ Could not open webcam {source}")
+            return cap
+
         # Set webcam resolution for better detection
         cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.WEBCAM_WIDTH)
         cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.WEBCAM_HEIGHT)
+        # Keep only the newest frame in the driver queue
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
         print(f"📷 Webcam opened at {self.WEBCAM_WIDTH}x{self.WEBCAM_HEIGHT}")
+        return cap
 
-        # Override class names for consistency
-        CUSTOM_NAMES = {0: 'Smoke', 1: 'Fire'}
+    def infer(self, frames, min_area=0):
+        """
+        Enhance frames and run YOLO on them in one batched call.
 
-        while True:
-            success, frame = cap.read()
-            if not success:
-                break
+        Args:
+            frames: List of BGR frames
+            min_area: Drop boxes smaller than this (pixels²)
 
-            if self.model:
-                # Enhance frame for better detection
-                enhanced_frame = self.enhance_frame(frame)
-                
-                # Run inference with optimized parameters
-                results = self.model(
-                    enhanced_frame, 
-                    conf=self.CONF_THRESHOLD,
-                    iou=self.IOU_THRESHOLD,
-                    imgsz=self.IMG_SIZE,
-                    verbose=False
-                )
-                
-                fire_detected = False
-                smoke_detected = False
-                detection_count = 0
+        Returns:
+            List with one Detections per frame
+        """
+        # Letterbox + enhance on the small image, then map boxes back to each frame
+        inputs = [self.preprocess_frame(frame) for frame in frames]
+
+        # Run inference with optimized parameters
+        results = self.model(
+            [image for image, _, _ in inputs],
+            conf=self.CONF_THRESHOLD,
+            iou=self.IOU_THRESHOLD,
+            imgsz=self.IMG_SIZE,
+            verbose=False
+        )
+        return [
+            from_result(result, self.classes, min_area, scale, offset, frame.shape[:2])
+            for result, (_, scale, offset), frame in zip(results, inputs, frames)
+        ]
+
+    def detect_stream_frame(self, frame):
+        """
+        Run YOLO on a live frame (inference stage of the stream pipeline).
+
+        Returns:
+            dict with boxes to draw and fire/smoke flags, or None if no model
+        """
+        detection = self.detect_batch([frame])[0]
+
+        if detection and detection["fire_detected"]:
+            self.send_telegram_alert("🔥 FIRE DETECTED! Immediate action required.", source="webcam")
+
+        return detection
+
+    def detect_batch(self, frames):
+        """
+        Run YOLO on several live frames in one batched call.
+
+        Small boxes (below MIN_BOX_AREA) are dropped as likely false positives.
+
+        Args:
+            frames: List of BGR frames (may come from different cameras)
+
+        Returns:
+            List with one detection dict per frame (None entries if no model)
+        """
+        if not self.model:
+            return [None] * len(frames)
+
+        return [summarize(detections) for detections in self.infer(frames, self.MIN_BOX_AREA)]
+
+    def render_stream_frame(self, frame, detection):
+        """Draw detections and status overlay, then JPEG-encode (encode stage)."""
+        if detection is not None:
+            for x1, y1, x2, y2, class_name, conf, is_fire in detection["boxes"].rows():
+                # Red for fire, orange for smoke
+                color = (0, 0, 255) if is_fire else (0, 165, 255)
+
+                # Draw enhanced bounding box
+                cv2.rectangle(frame, (x1, y1), (x2, y2), color, 3)
                 
-                for result in results:
-                    boxes = result.boxes
-                    for box in boxes:
-                        cls = int(box.cls[0])
-                        x1, y1, x2, y2 = map(int, box.xyxy[0])
-                        conf = float(box.conf[0])
-                        
-                        # Filter small detections (likely false positives)
-                        box_area = (x2 - x1) * (y2 - y1)
-                        if box_area < self.MIN_BOX_AREA:
-                            continue
-                        
-                        # Use custom names for consistency
-                        class_name = CUSTOM_NAMES.get(cls, self.model.names[cls])
-                        detection_count += 1
-
-                        # Color based on detection type
-                        if 'Fire' in class_name or 'fire' in class_name:
-                            color = (0, 0, 255)  # Red for fire
-                            fire_detected = True
-                        else:
-                            color = (0, 165, 255)  # Orange for smoke
-                            smoke_detected = True
-                        
-                        # Draw enhanced bounding box
-                        cv2.rectangle(frame, (x1, y1), (x2, y2), color, 3)
-                        
-                        # Draw label with background
-                        label = f"{class_name} {conf:.0%}"
-                        (label_w, label_h), _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)
-                        cv2.rectangle(frame, (x1, y1 - label_h - 10), (x1 + label_w + 10, y1), color, -1)
-                        cv2.putText(frame, label, (x1 + 5, y1 - 5),
-                                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-
-                # Add status overlay
-                status_color = (0, 0, 255) if fire_detected else (0, 165, 255) if smoke_detected else (0, 255, 0)
-                status_text = f"🔥 FIRE!" if fire_detected else f"💨 SMOKE" if smoke_detected else "✓ Clear"
-                cv2.putText(frame, status_text, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, status_color, 2)
-                cv2.putText(frame, f"Detections: {detection_count}", (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-
-                if fire_detected:
-                    self.send_telegram_alert("🔥 FIRE DETECTED! Immediate action required.")
-
-            ret, buffer = cv2.imencode('.jpg', frame)
-            frame_bytes = buffer.tobytes()
-            yield (b'--frame\r\n'
-                   b'Content-Type: image/jpeg\r\n\r\n' + frame_bytes + b'\r\n')
+                # Draw label with background
+                label = f"{class_name} {conf:.0%}"
+                (label_w, label_h), _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)
+                cv2.rectangle(frame, (x1, y1 - label_h - 10), (x1 + label_w + 10, y1), color, -1)
+                cv2.putText(frame, label, (x1 + 5, y1 - 5),
+                            cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
 
-        cap.release()
+            fire_detected = detection["fire_detected"]
+            smoke_detected = detection["smoke_detected"]
+
+            # Add status overlay
+            status_color = (0, 0, 255) if fire_detected else (0, 165, 255) if smoke_detected else (0, 255, 0)
+            status_text = f"🔥 FIRE!" if fire_detected else f"💨 SMOKE" if smoke_detected else "✓ Clear"
+            cv2.putText(frame, status_text, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, status_color, 2)
+            cv2.putText(frame, f"Detections: {len(detection['boxes'])}", (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+
+        ret, buffer = cv2.imencode('.jpg', frame)
+        return buffer.tobytes() if ret else None
+
+    def create_stream_pipeline(self, source=0) -> StreamPipeline:
+        """Build (but do not start) the capture/inference/encode pipeline for a camera."""
+        detect = self.detect_stream_frame
+        if DETECT_EVERY_K > 1:
+            # Full detection every k frames, optical-flow tracking in between
+            detect = TrackedDetector(detect, DETECT_EVERY_K)
+
+        gate = create_frame_gate()
+        if gate is not None:
+            # Skip unchanged, blurred or badly exposed frames before inference
+            detect = GatedDetector(detect, gate)
+
+        return StreamPipeline(
+            lambda: self.open_webcam(source),
+            detect,
+            self.render_stream_frame,
+            name=f"camera-{source}"
+        )
+
+    def detect_tiled(self, frame):
+        """
+        Sliced inference for a high-resolution image.
 
-    def process_image(self, image_bytes):
+        The full (downscaled) image and all overlapping native-resolution
+        tiles go through YOLO in one batch; boxes are merged with NMS.
+        Images below TILE_MIN_SIZE get a single pass.
+
+        Returns:
+            Detections in original image coordinates
+        """
+        if not tiling.needs_tiling(frame.shape):
+            return self.infer([frame])[0]
+
+        tiles, offsets = tiling.make_tiles(frame)
+        # Full-image pass last: on equal confidence the sharper tile box wins
+        parts = self.infer(tiles + [frame])
+        return tiling.merge(parts, offsets + [(0, 0)])
+
+    def process_image(self, image_bytes, render=True, tiled=None):
+        """
+        Detect fire/smoke in an uploaded image.
+
+        Args:
+            image_bytes: Encoded image (JPEG, PNG, ...)
+            render: Draw boxes and return the annotated JPEG; when False only
+                detections are computed (no drawing or re-encoding)
+            tiled: Use sliced inference for large images (default: TILED_INFERENCE)
+
+        Returns:
+            (jpeg_bytes or None, list of detections), or (None, {"error": ...})
+        """
         if not self.model:
             return None, {"error": "Model not loaded"}
         
@@ -164,77 +307,128 @@ class YoloService:
         if frame is None:
             return None, {"error": "Could not decode image"}
 
-        # Enhance frame and run inference with optimized parameters
-        enhanced_frame = self.enhance_frame(frame)
-        results = self.model(
-            enhanced_frame,
-            conf=self.CONF_THRESHOLD,
-            iou=self.IOU_THRESHOLD,
-            imgsz=self.IMG_SIZE
-        )
-        
-        detections = []
-        fire_detected = False
-        
-        # Override class names if needed (Fix for inverted labels)
-        # Assuming model sees class 1 as Fire, but metadata says Smoke
-        CUSTOM_NAMES = {0: 'Smoke', 1: 'Fire'}
-
-        for result in results:
-            boxes = result.boxes
-            for box in boxes:
-                cls = int(box.cls[0])
-                # class_name = self.model.names[cls] # Original
-                class_name = CUSTOM_NAMES.get(cls, self.model.names[cls])
-                
-                x1, y1, x2, y2 = map(int, box.xyxy[0])
-                conf = float(box.conf[0])
-                
-                detections.append({
-                    "class": class_name,
-                    "confidence": conf,
-                    "box": [x1, y1, x2, y2]
-                })
-
-                # Draw box
-                color = (0, 0, 255) if 'Fire' in class_name or 'fire' in class_name else (0, 255, 0)
-                cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
-                cv2.putText(frame, f"{class_name} {conf:.2f}", (x1, y1 - 10),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
-                
-                if 'Fire' in class_name or 'fire' in class_name:
-                    fire_detected = True
+        if tiled is None:
+            tiled = tiling.TILED_INFERENCE
+        detection = summarize(self.detect_tiled(frame) if tiled else self.infer([frame])[0])
+
+        if detection["fire_detected"]:
+            self.alert_uploaded_image()
 
-        if fire_detected:
-            self.send_telegram_alert("🔥 FIRE DETECTED in uploaded image!")
+        detections = detection["boxes"].to_list()
+        if not render:
+            return None, detections
 
-        # Encode back to jpg
+        # Draw boxes and encode back to jpg
+        self.draw_video_detections(frame, detection)
         _, buffer = cv2.imencode('.jpg', frame)
-        encoded_image = base64.b64encode(buffer).decode('utf-8')
-        
-        return encoded_image, detections
+        return buffer.tobytes(), detections
+
+    def detect_video_frame(self, frame):
+        """Run YOLO on one frame of an uploaded video (see detect_video_batch)."""
+        return self.detect_video_batch([frame])[0]
+
+    def detect_video_batch(self, frames):
+        """
+        Run YOLO on a batch of frames from an uploaded video.
 
-    def process_video(self, video_path, output_path):
+        Returns:
+            List with one dict per frame: boxes to draw and fire/smoke flags
+        """
+        return [summarize(detections) for detections in self.infer(frames)]
+
+    def draw_video_detections(self, frame, detection):
+        """Draw video detection boxes onto the frame in place."""
+        for x1, y1, x2, y2, class_name, conf, is_fire in detection["boxes"].rows():
+            color = (0, 0, 255) if is_fire else (0, 255, 0)
+            cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+            cv2.putText(frame, f"{class_name} {conf:.2f}", (x1, y1 - 10),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+
+    def process_video(self, video_path, output_path, detect_every_k=None, mode=None, progress=None):
+        """
+        Detect fire in a video file and write an annotated copy.
+
+        Args:
+            video_path: Input video path
+            output_path: Output MP4 path
+            detect_every_k: Run YOLO every k frames and track boxes in between
+                (defaults to DETECT_EVERY_K; 1 runs YOLO on every frame)
+            mode: "sequential", "batched" or "parallel" (default: parallel for
+                long videos when VIDEO_WORKERS > 1, batched otherwise; tracker
+                mode always runs sequentially)
+            progress: Optional callback(frames_done, fire_frames)
+        """
         if not self.model:
             return False, "Model not loaded"
+
+        every_k = detect_every_k or DETECT_EVERY_K
+        if mode is None:
+            if every_k > 1:
+                mode = "sequential"
+            elif VIDEO_WORKERS > 1 and count_frames(video_path) >= VIDEO_PARALLEL_MIN_FRAMES:
+                mode = "parallel"
+            else:
+                mode = "batched"
+
+        if mode == "parallel":
+            try:
+                stats = process_parallel(video_path, output_path, progress=progress)
+            except Exception as e:
+                print(f"⚠️ Parallel video processing failed ({e}), falling back to batched")
+                stats = process_batched(self, video_path, output_path, progress=progress)
+        elif mode == "batched":
+            stats = process_batched(self, video_path, output_path, progress=progress)
+        else:
+            stats = self._process_video_sequential(video_path, output_path, every_k, progress=progress)
+
+        if stats is None:
+            return False, "Could not open video"
+
+        fire_frames = stats["fire_frames"]
+        if fire_frames > 0:
+            self.send_telegram_alert(f"🔥 FIRE DETECTED in uploaded video! ({fire_frames} frames)", source="upload")
             
+        return True, "Video processed successfully"
+
+    def analyze_video(self, video_path, progress=None):
+        """
+        Detect fire in a video file without rendering an annotated copy.
+
+        Args:
+            video_path: Input video path
+            progress: Optional callback(frames_done, fire_frames)
+
+        Returns:
+            dict with the detection timeline and fire time ranges, or {"error": ...}
+        """
+        if not self.model:
+            return {"error": "Model not loaded"}
+
+        result = analyze_batched(self, video_path, progress=progress)
+        if result is None:
+            return {"error": "Could not open video"}
+
+        if result["fire_frames"] > 0:
+            self.send_telegram_alert(f"🔥 FIRE DETECTED in uploaded video! ({result['fire_frames']} frames)", source="upload")
+        return result
+
+    def _process_video_sequential(self, video_path, output_path, every_k=1, progress=None):
+        """Decode, detect, draw and write one frame at a time (used by tracker mode)."""
         cap = cv2.VideoCapture(video_path)
         if not cap.isOpened():
-            return False, "Could not open video"
+            return None
             
         width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
         height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
         fps = int(cap.get(cv2.CAP_PROP_FPS))
         
         # Define codec and create VideoWriter
-        fourcc = cv2.VideoWriter_fourcc(*'avc1') 
-        out = cv2.VideoWriter(output_path, fourcc, fps, (width, height))
+        out = open_writer(output_path, fps, (width, height))
         
         frame_count = 0
         fire_frames = 0
-        
-        # Override class names
-        CUSTOM_NAMES = {0: 'Smoke', 1: 'Fire'}
+
+        detect = TrackedDetector(self.detect_video_frame, every_k) if every_k > 1 else self.detect_video_frame
 
         while cap.isOpened():
             ret, frame = cap.read()
@@ -242,46 +436,27 @@ class YoloService:
                 break
                 
             frame_count += 1
-            # Enhance and run inference with optimized parameters
-            enhanced_frame = self.enhance_frame(frame)
-            results = self.model(
-                enhanced_frame,
-                conf=self.CONF_THRESHOLD,
-                iou=self.IOU_THRESHOLD,
-                imgsz=self.IMG_SIZE,
-                verbose=False
-            )
-            
-            frame_fire_detected = False
-            for result in results:
-                boxes = result.boxes
-                for box in boxes:
-                    cls = int(box.cls[0])
-                    # class_name = self.model.names[cls]
-                    class_name = CUSTOM_NAMES.get(cls, self.model.names[cls])
-
-                    x1, y1, x2, y2 = map(int, box.xyxy[0])
-                    conf = float(box.conf[0])
-                    
-                    color = (0, 0, 255) if 'Fire' in class_name or 'fire' in class_name else (0, 255, 0)
-                    cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
-                    cv2.putText(frame, f"{class_name} {conf:.2f}", (x1, y1 - 10),
-                                cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
-                                
-                    if 'Fire' in class_name or 'fire' in class_name:
-                        frame_fire_detected = True
+            detection = detect(frame)
+            self.draw_video_detections(frame, detection)
             
-            if frame_fire_detected:
+            if detection["fire_detected"]:
                 fire_frames += 1
                 
             out.write(frame)
+
+            if progress and frame_count % 10 == 0:
+                progress(frame_count, fire_frames)
             
         cap.release()
         out.release()
-        
-        if fire_frames > 0:
-            self.send_telegram_alert(f"🔥 FIRE DETECTED in uploaded video! ({fire_frames} frames)")
-            
-        return True, "Video processed successfully"
+        if progress:
+            progress(frame_count, fire_frames)
+
+        if isinstance(detect, TrackedDetector):
+            stats = detect.get_stats()
+            print(f"🎯 Tracker mode (k={every_k}): {stats['detector_runs']}/{stats['frames']} frames detected, "
+                  f"{stats['fps_gain']}x effective fps")
+
+        return {"frames": frame_count, "fire_frames": fire_frames, "fps": fps, "size": (width, height)}
 
 yolo_service = YoloService()
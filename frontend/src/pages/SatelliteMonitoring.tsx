@@ -13,7 +13,8 @@ interface ScanResult {
     is_fire: boolean;
     coordinates: [number, number];
     timestamp: string;
-    image_base64?: string;
+    scan_id?: string;
+    image_url?: string;
 }
 
 interface MonitoringStatus {
@@ -143,8 +144,8 @@ const SatelliteMonitoring = () => {
             const res = await fetch(`${API_BASE}/api/satellite/image/${zoneName}`);
             const data = await res.json();
 
-            if (data.image_base64) {
-                setZoneImage(data.image_base64);
+            if (data.image_url) {
+                setZoneImage(`${API_BASE}${data.image_url}`);
             }
         } catch {
             console.error('Failed to fetch zone image');
@@ -439,7 +440,7 @@ const SatelliteMonitoring = () => {
                         ) : zoneImage ? (
                             <div className="relative">
                                 <img
-                                    src={`data:image/png;base64,${zoneImage}`}
+                                    src={zoneImage}
                                     alt={`Satellite view of ${selectedZone}`}
                                     className="w-full rounded-xl border border-white/10"
                                 />
@@ -1,4 +1,4 @@
-import React, { useState, useRef } from 'react';
+import React, { useState, useRef, useEffect } from 'react';
 import { Link } from 'react-router-dom';
 
 interface Detection {
@@ -17,6 +17,14 @@ const UploadDetection: React.FC = () => {
     const [showModal, setShowModal] = useState(false);
     const [modalType, setModalType] = useState<'image' | 'video' | null>(null);
 
+    // Release each result blob once it is replaced or the page unmounts
+    useEffect(() => () => {
+        if (resultImage) URL.revokeObjectURL(resultImage);
+    }, [resultImage]);
+    useEffect(() => () => {
+        if (videoResultUrl) URL.revokeObjectURL(videoResultUrl);
+    }, [videoResultUrl]);
+
     const imageInputRef = useRef<HTMLInputElement>(null);
     const videoInputRef = useRef<HTMLInputElement>(null);
 
@@ -55,11 +63,14 @@ const UploadDetection: React.FC = () => {
             }
 
             if (type === 'image') {
-                const data = await response.json();
-                if (data.error) throw new Error(data.error);
-                const base64Img = `data:image/jpeg;base64,${data.image}`;
-                setResultImage(base64Img);
-                setDetections(data.detections);
+                // Annotated image comes back as binary JPEG; errors as JSON
+                if (response.headers.get('content-type')?.includes('application/json')) {
+                    const data = await response.json();
+                    throw new Error(data.error || 'Detection failed');
+                }
+                const blob = await response.blob();
+                setResultImage(URL.createObjectURL(blob));
+                setDetections(JSON.parse(response.headers.get('X-Detections') || '[]'));
                 setModalType('image');
                 setShowModal(true);
             } else {